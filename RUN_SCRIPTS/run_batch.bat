@@ -0,0 +1,19 @@
+@echo off
+cd ..
+echo ========================================
+echo  Executing Batch Processing
+echo ========================================
+echo.
+
+REM Activate virtual environment
+call venv\Scripts\activate.bat
+
+REM Run the script
+python scripts\run_batch.py
+
+echo.
+echo ========================================
+echo  Script finished!
+echo ========================================
+echo.
+pause
@@ -0,0 +1,19 @@
+@echo off
+cd ..
+echo ========================================
+echo  Executing Parameter Sweep
+echo ========================================
+echo.
+
+REM Activate virtual environment
+call venv\Scripts\activate.bat
+
+REM Run the script
+python scripts\run_sweep.py
+
+echo.
+echo ========================================
+echo  Script finished!
+echo ========================================
+echo.
+pause
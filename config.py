@@ -14,9 +14,46 @@ INPUT_FILE = os.path.join(INPUT_DIR, "data.csv")
 # Processing settings
 CHUNK_SIZE = 10000  # Number of lines to process at once (for large files)
 ENCODING = 'utf-8-sig'  # To handle BOM (﻿) at the beginning of file
+PARALLEL_READ_MIN_SIZE = 100 * 1024 * 1024  # Raw files at least this large (bytes) are parsed in parallel
+PARALLEL_READ_WORKERS = None  # Worker processes for the parallel read (None = number of CPU cores, 1 = off)
+SAMPLE_WORKERS = None  # Threads for the per-sample work of Steps 03-04 (None = number of CPU cores, 1 = off)
 
 # Separators
 DELIMITER = ';'  # File uses semicolon as separator
 
 # Output settings
 OUTPUT_ENCODING = 'utf-8'
+
+# Intermediate step files (03 to 10): 'npz' (binary + .header.json), 'feather' / 'parquet'
+# (binary, need the optional pyarrow package: pip install pyarrow) or 'csv' (text, readable in Excel)
+# The final 11_aligned_qc_filtered.csv is always written as CSV
+INTERMEDIATE_FORMAT = 'npz'
+
+# Compression of the step outputs: None, 'gzip', 'xz' or 'zstd'
+# ('zstd' needs the optional zstandard package: pip install zstandard)
+# CSV outputs get a .gz/.xz/.zst extension, 'npz' intermediates are stored compressed
+# Compressed raw exports (data.csv.gz, .xz, .zst) are always read directly
+OUTPUT_COMPRESSION = None
+
+# Full pipeline runner (scripts/run_pipeline.py)
+# Step outputs written to OUTPUT_DIR - all other steps stay in memory
+PIPELINE_SAVE_STEPS = ['11']  # e.g. ['04', '06', '09', '11']
+ALIGNED_BACKEND = 'dense'  # 'dense', 'sparse' (scipy.sparse, mostly empty cells) or 'memmap' (tables larger than RAM)
+MEMMAP_DTYPE = 'float64'  # Storage of the memory-mapped table: 'float64' or 'float32' (half the disk space)
+INTENSITY_DTYPE = 'float64'  # Storage of the dense table in Steps 04-11: 'float64' or 'float32' (half the memory)
+PRECISION_REPORT = False  # With float32: also run Steps 05-11 in float64, deviation in OUTPUT_DIR/precision_report.json
+ROW_WORKERS = 1  # Worker processes for Steps 05-11 of the dense table (None = number of CPU cores, 1 = off)
+
+# Stage cache (run_pipeline.bat): results of unchanged stages are reused from OUTPUT_DIR/.stage_cache
+# Off by default: the cache hashes the input file on every run and stores full-precision copies of
+# the aligned tables (several times the size of the raw export, see README)
+STAGE_CACHE = False
+STAGE_CACHE_HASH_INPUT = True  # False = detect input changes by size/modification time only (faster on huge files)
+STAGE_CACHE_KEEP = 1  # Cached results kept per stage (older ones are deleted)
+INPUT_CACHE = False  # Keep the parsed raw export as binary (.npy) in the stage cache folder (pipeline and sweep)
+
+# Batch processing (run_batch.bat): every raw export in BATCH_INPUT runs the full pipeline
+# in its own folder inside BATCH_OUTPUT_DIR (input/data.csv is not used)
+BATCH_INPUT = os.path.join(INPUT_DIR, "batch")  # Folder or glob pattern (e.g. 'D:/exports/*.csv')
+BATCH_OUTPUT_DIR = os.path.join(OUTPUT_DIR, "batch")
+BATCH_WORKERS = None  # Number of files processed at the same time (None = number of CPU cores)
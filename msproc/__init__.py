@@ -0,0 +1,4 @@
+"""
+Command line interface for the mass spectrometry data processing pipeline
+Run `python -m msproc --help` from the project folder
+"""
@@ -0,0 +1,9 @@
+"""
+Entry point for `python -m msproc`
+"""
+import sys
+
+from msproc.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,391 @@
+"""
+Non-interactive command line interface
+All parameters are given as options (no input() prompts), so the pipeline can run
+unattended (scheduled jobs, benchmarks). Each command ends with an exit code and
+can write a JSON summary with the run time of every stage
+
+Examples:
+    python -m msproc run --decimals 3 --bff-threshold 10 --noise 500 --steps 01-11
+    python -m msproc run --bff-threshold 5 --steps 07-11 --json
+    python -m msproc batch --input "D:/exports/*.csv" --decimals 3 --bff-threshold 10 --workers 4
+    python -m msproc sweep --decimals 2,3,4 --bff-threshold 3,5,10
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+import traceback
+
+# Add root directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import (INPUT_FILE, OUTPUT_DIR, DELIMITER, PIPELINE_SAVE_STEPS, ALIGNED_BACKEND, STAGE_CACHE,
+                    INPUT_CACHE, CHUNK_SIZE, ROW_WORKERS, INTENSITY_DTYPE, PRECISION_REPORT, BATCH_INPUT,
+                    BATCH_OUTPUT_DIR, BATCH_WORKERS)
+
+# Exit codes
+EXIT_OK = 0
+EXIT_FAILED = 1  # Processing error (or at least one failed file in a batch)
+EXIT_USAGE = 2  # Invalid options or missing input (same code as argparse errors)
+EXIT_INTERRUPTED = 130  # Cancelled with Ctrl+C
+
+ALL_STEPS = [f"{step:02d}" for step in range(1, 12)]
+
+
+def step_id(text):
+    """
+    Normalizes a step id ('5' -> '05')
+    """
+    text = text.strip()
+    if not text.isdigit() or f"{int(text):02d}" not in ALL_STEPS:
+        raise argparse.ArgumentTypeError(f"invalid step '{text}' (use 01 to 11)")
+    return f"{int(text):02d}"
+
+
+def step_range(text):
+    """
+    Parses a step range: '01-11', '5-11' or a single step '07'
+
+    Returns:
+        Tuple (first step id, last step id)
+    """
+    first, _, last = text.partition('-')
+    first, last = step_id(first), step_id(last or first)
+    if first > last:
+        raise argparse.ArgumentTypeError(f"invalid step range '{text}' (first step after last step)")
+    return first, last
+
+
+def step_list(text):
+    """
+    Parses the steps to save: '04,06,11', a range '05-11' or 'all'
+
+    Returns:
+        List of step ids
+    """
+    if text.strip().lower() == 'all':
+        return list(ALL_STEPS)
+
+    steps = []
+    for item in text.split(','):
+        if item.strip():
+            first, last = step_range(item)
+            steps += [step for step in ALL_STEPS if first <= step <= last and step not in steps]
+    return steps
+
+
+def number(cast, minimum, strict=False):
+    """
+    Returns an argparse type for a number >= minimum (> minimum when strict)
+    """
+    def parse(text):
+        try:
+            value = cast(text)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid number '{text}'")
+        if value < minimum or (strict and value == minimum):
+            raise argparse.ArgumentTypeError(f"'{text}' must be {'>' if strict else '>='} {minimum}")
+        return value
+    return parse
+
+
+def number_list(cast, minimum, strict=False):
+    """
+    Returns an argparse type for a comma separated list of numbers (duplicates removed, order kept)
+    """
+    parse_number = number(cast, minimum, strict)
+
+    def parse(text):
+        values = []
+        for item in text.replace(';', ',').split(','):
+            if item.strip():
+                value = parse_number(item.strip())
+                if value not in values:
+                    values.append(value)
+        if not values:
+            raise argparse.ArgumentTypeError("at least one value is needed")
+        return values
+    return parse
+
+
+def build_parser():
+    """
+    Builds the argument parser with the run, batch and sweep commands
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m msproc",
+        description="Mass spectrometry data processing pipeline (Steps 01-11) without prompts.")
+    commands = parser.add_subparsers(dest='command', metavar='COMMAND')
+    commands.required = True
+
+    def add_common(command, input_default, output_default, input_help="raw input file", list_values=False):
+        command.add_argument('--input', default=input_default, help=f"{input_help} (default: {input_default})")
+        command.add_argument('--output-dir', default=output_default,
+                             help=f"output directory (default: {output_default})")
+        if list_values:
+            command.add_argument('--decimals', type=number_list(int, 0), required=True,
+                                 help="decimal places to try, comma separated (e.g. 2,3,4)")
+            command.add_argument('--bff-threshold', type=number_list(float, 0, strict=True), required=True,
+                                 help="BFF threshold multipliers to try, comma separated (e.g. 3,5,10)")
+        else:
+            command.add_argument('--decimals', type=number(int, 0),
+                                 help="decimal places for mass rounding (Step 02)")
+            command.add_argument('--bff-threshold', type=number(float, 0, strict=True),
+                                 help="BFF threshold multiplier: BFF = mean + (threshold x std_dev) (Step 07)")
+        command.add_argument('--noise', type=number(float, 0), default=None,
+                             help="optional noise threshold applied after Step 04 (default: skipped)")
+        command.add_argument('--json', action='store_true',
+                             help="print the JSON summary on stdout (step messages go to stderr)")
+        command.add_argument('--timings', metavar='FILE',
+                             help="write the JSON summary (status, exit code, seconds per stage) to FILE")
+
+    run = commands.add_parser('run', help="run Steps 01-11 (or a range of steps) for one file")
+    add_common(run, INPUT_FILE, OUTPUT_DIR)
+    run.add_argument('--steps', type=step_range, default=('01', '11'),
+                     help="steps to run, e.g. 01-11 (default), 05-11 or 07. A range that does not start "
+                          "at 01 continues from the saved output of the previous step")
+    run.add_argument('--save', type=step_list, default=None,
+                     help="step outputs to save, e.g. 04,06,11 or all "
+                          f"(default: {','.join(PIPELINE_SAVE_STEPS)} for 01-11, the last step otherwise)")
+    run.add_argument('--backend', choices=['dense', 'sparse', 'memmap'], default=None,
+                     help=f"aligned table storage, full 01-11 runs only (default: {ALIGNED_BACKEND})")
+    cache = run.add_mutually_exclusive_group()
+    cache.add_argument('--cache', action='store_true',
+                       help="reuse and store stage results and the parsed input in OUTPUT_DIR/.stage_cache "
+                            f"(default: {'on' if STAGE_CACHE else 'off'})")
+    cache.add_argument('--no-cache', action='store_true', help="do not reuse cached stage results or the cached parse")
+    run.add_argument('--chunk-size', type=number(int, 1), nargs='?', const=CHUNK_SIZE, default=None, metavar='ROWS',
+                     help="stream the saved table through Steps 05-11 in blocks of ROWS rows "
+                          f"(default: {CHUNK_SIZE}; ranges starting at Step 05 or later)")
+    run.add_argument('--workers', type=number(int, 1), default=None,
+                     help="worker processes for Steps 05-11, each one runs a block of rows of the table "
+                          f"(dense backend; default: {ROW_WORKERS or 'number of CPU cores'})")
+    run.add_argument('--intensity-dtype', choices=['float64', 'float32'], default=None,
+                     help="storage of the intensities in Steps 04-11, float32 halves the memory "
+                          f"(full 01-11 runs, dense backend; default: {INTENSITY_DTYPE})")
+    report = run.add_mutually_exclusive_group()
+    report.add_argument('--precision-report', action='store_true',
+                        help="with float32, also run Steps 05-11 in float64 and write the deviation to "
+                             f"precision_report.json (default: {'on' if PRECISION_REPORT else 'off'})")
+    report.add_argument('--no-precision-report', action='store_true',
+                        help="with float32, skip the float64 comparison run and precision_report.json")
+
+    batch = commands.add_parser('batch', help="run Steps 01-11 for every file in a folder or glob pattern")
+    add_common(batch, BATCH_INPUT, BATCH_OUTPUT_DIR, input_help="folder or glob pattern of raw input files")
+    batch.add_argument('--save', type=step_list, default=list(PIPELINE_SAVE_STEPS),
+                       help=f"step outputs to save for each file (default: {','.join(PIPELINE_SAVE_STEPS)})")
+    batch.add_argument('--backend', choices=['dense', 'sparse', 'memmap'], default=ALIGNED_BACKEND,
+                       help=f"aligned table storage (default: {ALIGNED_BACKEND})")
+    batch.add_argument('--workers', type=number(int, 1), default=BATCH_WORKERS,
+                       help="files processed at the same time (default: number of CPU cores)")
+
+    sweep = commands.add_parser('sweep', help="run Steps 01-11 for every decimal places x BFF threshold combination")
+    add_common(sweep, INPUT_FILE, OUTPUT_DIR, list_values=True)
+    cache = sweep.add_mutually_exclusive_group()
+    cache.add_argument('--cache', action='store_true',
+                       help=f"reuse and store the parsed input file (default: {'on' if INPUT_CACHE else 'off'})")
+    cache.add_argument('--no-cache', action='store_true', help="parse the input file again (no cached parse)")
+
+    return parser
+
+
+def check_run_options(parser, args):
+    """
+    Checks the options of the run command that depend on each other
+    """
+    first, last = args.steps
+    if first <= '02' <= last and args.decimals is None:
+        parser.error("--decimals is required when Step 02 is run")
+    if first <= '07' <= last and args.bff_threshold is None:
+        parser.error("--bff-threshold is required when Step 07 is run")
+    if args.noise is not None and not (first <= '05' and last >= '04'):
+        parser.error("--noise needs a step range that includes Step 04 or starts at Step 05 "
+                     "(it is applied after Step 04)")
+    if (first, last) != ('01', '11') and args.backend not in (None, 'dense'):
+        parser.error("--backend sparse/memmap is only available for the full 01-11 range")
+    if args.chunk_size is not None and first < '05':
+        parser.error("--chunk-size needs a step range that starts at Step 05 or later")
+    if args.backend is None:
+        args.backend = ALIGNED_BACKEND if (first, last) == ('01', '11') else 'dense'
+    if args.workers is not None and (args.chunk_size is not None or args.backend != 'dense'):
+        parser.error("--workers is only available for the dense backend without --chunk-size")
+    if args.workers is None:
+        args.workers = ROW_WORKERS if args.chunk_size is None and args.backend == 'dense' else 1
+    if args.intensity_dtype not in (None, 'float64') and ((first, last) != ('01', '11') or args.backend != 'dense'):
+        parser.error("--intensity-dtype float32 is only available for the full 01-11 range with the dense backend")
+    if args.intensity_dtype is None:
+        args.intensity_dtype = INTENSITY_DTYPE if (first, last) == ('01', '11') and args.backend == 'dense' \
+            else 'float64'
+
+
+def run_command(args, timings):
+    """
+    Runs the 'run' command
+
+    Returns:
+        Dictionary with the values added to the summary
+    """
+    from utils.pipeline import run_pipeline, run_step_range
+    from utils.precision import REPORT_FILE
+
+    first, last = args.steps
+    precision_report = (args.intensity_dtype != 'float64' and (PRECISION_REPORT or args.precision_report)
+                        and not args.no_precision_report)
+    if first <= '02' and not os.path.exists(args.input):
+        raise FileNotFoundError(f"Input file not found: {args.input}")
+
+    if (first, last) == ('01', '11'):
+        df = run_pipeline(args.input, args.output_dir, args.decimals, args.bff_threshold,
+                          noise_level=args.noise,
+                          save_steps=args.save if args.save is not None else PIPELINE_SAVE_STEPS,
+                          backend=args.backend, cache=(STAGE_CACHE or args.cache) and not args.no_cache,
+                          use_input_cache=(INPUT_CACHE or args.cache) and not args.no_cache, workers=args.workers,
+                          timings=timings, intensity_dtype=args.intensity_dtype, precision_report=precision_report)
+    else:
+        df = run_step_range(args.output_dir, first, last, decimal_places=args.decimals,
+                            threshold=args.bff_threshold, noise_level=args.noise,
+                            input_file=args.input if first <= '02' else None, save_steps=args.save or (),
+                            use_input_cache=(INPUT_CACHE or args.cache) and not args.no_cache,
+                            chunk_size=args.chunk_size, workers=args.workers, timings=timings)
+
+    result = {'final_rows': len(df) if df is not None else None}
+    if precision_report:
+        with open(os.path.join(args.output_dir, REPORT_FILE), encoding='utf-8') as f:
+            result['precision'] = json.load(f)
+    return result
+
+
+def batch_command(args, timings):
+    """
+    Runs the 'batch' command
+
+    Returns:
+        Dictionary with the values added to the summary (per-file results, failed file count)
+    """
+    from utils.batch import find_input_files, run_batch
+    from utils.pipeline import stage_timer
+
+    input_files = find_input_files(args.input)
+    if not input_files:
+        raise FileNotFoundError(f"No input files found: {args.input}")
+
+    with stage_timer(timings, 'batch'):
+        df_summary = run_batch(input_files, args.output_dir, args.decimals, args.bff_threshold,
+                               noise_level=args.noise, save_steps=args.save, backend=args.backend,
+                               max_workers=args.workers, delimiter=DELIMITER)
+
+    files = json.loads(df_summary.to_json(orient='records'))
+    return {'files': files, 'failed_files': sum(1 for f in files if f['status'] != 'ok')}
+
+
+def sweep_command(args, timings):
+    """
+    Runs the 'sweep' command
+
+    Returns:
+        Dictionary with the values added to the summary (one record per combination)
+    """
+    from utils.sweep import run_sweep
+    from utils.pipeline import stage_timer
+
+    if not os.path.exists(args.input):
+        raise FileNotFoundError(f"Input file not found: {args.input}")
+
+    with stage_timer(timings, 'sweep'):
+        df_summary = run_sweep(args.input, args.output_dir, args.decimals, args.bff_threshold,
+                               noise_level=args.noise,
+                               use_input_cache=(INPUT_CACHE or args.cache) and not args.no_cache)
+    return {'combinations': json.loads(df_summary.to_json(orient='records'))}
+
+
+COMMANDS = {'run': run_command, 'batch': batch_command, 'sweep': sweep_command}
+
+
+def main(argv=None):
+    """
+    Parses the command line and runs the command
+
+    Args:
+        argv: Arguments (default: sys.argv[1:])
+
+    Returns:
+        Exit code (see EXIT_*)
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        check_run_options(parser, args)
+    elif args.command == 'batch' and (args.decimals is None or args.bff_threshold is None):
+        parser.error("--decimals and --bff-threshold are required for batch runs")
+
+    # Settings of config.py and input files that need optional packages fail here, not mid-run
+    from utils.compression import check_input_compression
+    from utils.table_io import check_output_settings
+    try:
+        check_output_settings()
+        if args.command == 'batch':
+            from utils.batch import find_input_files
+            check_input_compression(find_input_files(args.input))
+        else:
+            check_input_compression([args.input])
+    except (ValueError, ImportError) as e:
+        parser.error(str(e))
+
+    parameters = {key: value for key, value in vars(args).items()
+                  if key not in ('command', 'json', 'timings', 'input', 'output_dir')}
+    if 'steps' in parameters:
+        parameters['steps'] = '-'.join(parameters['steps'])
+    summary = {
+        'command': args.command,
+        'status': 'ok',
+        'exit_code': EXIT_OK,
+        'input': args.input,
+        'output_dir': args.output_dir,
+        'parameters': parameters,
+        'stages': [],
+        'total_seconds': None,
+        'error': None,
+    }
+
+    # With --json, stdout only carries the summary
+    messages = sys.stderr if args.json else sys.stdout
+    timings = {}
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(messages):
+        try:
+            summary.update(COMMANDS[args.command](args, timings))
+            if summary.get('failed_files'):
+                summary['status'] = 'failed'
+                summary['exit_code'] = EXIT_FAILED
+        except KeyboardInterrupt:
+            print("\n[INFO] Operation cancelled by user")
+            summary.update(status='interrupted', exit_code=EXIT_INTERRUPTED, error="Cancelled by user")
+        except FileNotFoundError as e:
+            print(f"[ERROR] {str(e)}")
+            summary.update(status='failed', exit_code=EXIT_USAGE, error=str(e))
+        except Exception as e:
+            print(f"\n[ERROR] {str(e)}")
+            traceback.print_exc(file=messages)
+            summary.update(status='failed', exit_code=EXIT_FAILED, error=f"{type(e).__name__}: {e}")
+
+    summary['total_seconds'] = round(time.perf_counter() - start, 4)
+    summary['stages'] = [{'stage': stage, 'seconds': round(seconds, 4)} for stage, seconds in timings.items()]
+
+    if args.timings:
+        with open(args.timings, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print("\n" + "="*70)
+        print("STAGE TIMINGS")
+        print("="*70)
+        for stage in summary['stages']:
+            print(f"  {stage['stage']:<8} {stage['seconds']:>10.3f} s")
+        print(f"  {'total':<8} {summary['total_seconds']:>10.3f} s")
+        print(f"\n[{'OK' if summary['exit_code'] == EXIT_OK else 'ERROR'}] "
+              f"Finished with status '{summary['status']}' (exit code {summary['exit_code']})")
+
+    return summary['exit_code']
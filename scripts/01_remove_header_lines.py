@@ -1,6 +1,8 @@
 """
-Script 01: Remove header lines
-Keeps only lines 2 and 8 from the first 8 lines, removes the rest
+Script 01: Read header layout
+Finds the sample names (line 2), the column headers (line 8) and the byte offset of the
+first data line (line 9) in the raw export. The data is not copied: the next steps read
+the raw file directly and skip the header lines by seeking to that offset
 """
 import os
 import sys
@@ -8,30 +10,35 @@ import sys
 # Add root directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from config import INPUT_FILE, OUTPUT_DIR
+from config import INPUT_FILE, OUTPUT_DIR, PARALLEL_READ_MIN_SIZE, PARALLEL_READ_WORKERS
+from utils.compression import open_text, check_input_compression
+from utils.csv_helper import read_numeric_csv, report_coerced
+from utils.raw_header import HEADER_LINES, read_header_layout, save_header_layout, read_text_columns
+from utils.table_io import check_output_settings
+
+# Lines kept by remove_header_lines (indices start at 0, so line 2 = index 1, line 8 = index 7)
+LINES_TO_KEEP = {1, 7}  # line 2 and line 8
+LAYOUT_FILE = "01_header_layout.json"
 
 
 def remove_header_lines(input_file, output_file):
     """
-    Removes lines 1, 3, 4, 5, 6, 7 from the header
-    Keeps line 2, line 8 and all subsequent lines
+    Writes a copy of the raw file without lines 1, 3, 4, 5, 6, 7 of the header
+    Keeps line 2, line 8 and all subsequent lines (only used when the pipeline saves step 01)
 
     Args:
-        input_file: Input file path
-        output_file: Output file path
+        input_file: Input file path (.gz, .xz and .zst files are decompressed while reading)
+        output_file: Output file path (compressed if it ends with .gz, .xz or .zst)
     """
     print(f"Reading file: {input_file}")
 
-    # Lines to keep (indices start at 0, so line 2 = index 1, line 8 = index 7)
-    lines_to_keep_start = {1, 7}  # line 2 and line 8
-
-    with open(input_file, 'r', encoding='utf-8-sig') as f_in:
-        with open(output_file, 'w', encoding='utf-8') as f_out:
+    with open_text(input_file, 'r', encoding='utf-8-sig') as f_in:
+        with open_text(output_file, 'w', encoding='utf-8') as f_out:
             for i, line in enumerate(f_in):
                 # If in the first 8 lines (indices 0-7)
-                if i < 8:
+                if i < HEADER_LINES:
                     # Only write if it's line 2 or line 8
-                    if i in lines_to_keep_start:
+                    if i in LINES_TO_KEEP:
                         f_out.write(line)
                         print(f"[OK] Line {i+1} kept")
                     else:
@@ -48,32 +55,90 @@ def remove_header_lines(input_file, output_file):
     print(f"[OK] Total lines processed: {i + 1}")
 
 
-if __name__ == "__main__":
-    from config import INPUT_DIR
-    import shutil
+def print_layout(layout):
+    """
+    Prints where the sample names, column headers and data were found
+    """
+    print(f"[INFO] Detected delimiter: '{layout['delimiter']}'")
+    print(f"[OK] Sample names from line {layout['names_line'] + 1}, column headers from line "
+          f"{layout['labels_line'] + 1}, data from line {layout['data_line'] + 1} (byte {layout['data_offset']})")
+
 
-    # Define output file (for history/backup)
-    output_file = os.path.join(OUTPUT_DIR, "01_header_removed.csv")
+def read_without_header(input_file, encoding='utf-8-sig'):
+    """
+    Reads the raw file straight into a DataFrame, skipping the same header lines
+    that remove_header_lines drops (no intermediate file is written)
 
-    # Input file will be updated with the latest version
-    updated_input = os.path.join(INPUT_DIR, "data.csv")
+    Args:
+        input_file: Input file path (raw export with the 8 header lines)
+        encoding: File encoding
+
+    Returns:
+        DataFrame (same content as reading 01_header_removed.csv) and the delimiter
+    """
+    print(f"Reading file: {input_file}")
+
+    layout = read_header_layout(input_file, encoding)
+    print_layout(layout)
+
+    df = read_text_columns(input_file, layout, encoding, workers=PARALLEL_READ_WORKERS or os.cpu_count() or 1,
+                           min_parallel_size=PARALLEL_READ_MIN_SIZE)
+    return df, layout['delimiter']
+
+
+def read_numeric_without_header(input_file, encoding='utf-8-sig'):
+    """
+    Reads the raw file straight into float64 Mass/Intensity columns (sample names from
+    line 2, data from line 9), for the in-memory pipeline
+
+    The 'Mass'/'Intensity' labels of line 8 are not kept, and the values are already numbers,
+    so steps 02-04 do not convert text again (see utils.csv_helper.read_numeric_csv)
+
+    Args:
+        input_file: Input file path (raw export with the 8 header lines)
+        encoding: File encoding
+
+    Returns:
+        DataFrame with float64 columns and the delimiter
+    """
+    print(f"Reading file: {input_file}")
+
+    layout = read_header_layout(input_file, encoding)
+    print_layout(layout)
+
+    df, coerced = read_numeric_csv(input_file, layout['delimiter'], encoding, names_line=layout['names_line'],
+                                   data_line=layout['data_line'],
+                                   workers=PARALLEL_READ_WORKERS or os.cpu_count() or 1,
+                                   min_parallel_size=PARALLEL_READ_MIN_SIZE)
+    report_coerced(coerced)
+
+    return df, layout['delimiter']
+
+
+if __name__ == "__main__":
+    output_file = os.path.join(OUTPUT_DIR, LAYOUT_FILE)
 
     print("="*70)
-    print("SCRIPT 01: REMOVE HEADER LINES")
+    print("SCRIPT 01: READ HEADER LAYOUT")
     print("="*70)
     print(f"Input: {INPUT_FILE}")
-    print(f"Output (backup): {output_file}")
-    print(f"Updated input: {updated_input}")
-    print("\nOperation: Keep only lines 2 and 8 from the first 8 lines")
+    print(f"Output: {output_file}")
+    print("\nOperation: Find the sample names (line 2), column headers (line 8) and first data line (line 9)")
     print("="*70 + "\n")
 
     try:
-        # Save to OUTPUT for history
-        remove_header_lines(INPUT_FILE, output_file)
-
-        # Copy result to INPUT as updated version
-        shutil.copy2(output_file, updated_input)
-        print(f"\n[OK] Updated input file: {updated_input}")
+        # Settings and input files that need optional packages fail here, not at the first file written
+        check_output_settings()
+        check_input_compression([INPUT_FILE])
+
+        layout = read_header_layout(INPUT_FILE)
+        print_layout(layout)
+        print(f"[INFO] {len(layout['sample_names'])} columns: {', '.join(layout['sample_names'][:6])}"
+              f"{', ...' if len(layout['sample_names']) > 6 else ''}")
+
+        save_header_layout(layout, output_file)
+        print(f"\n[OK] Header layout saved at: {output_file}")
+        print(f"[INFO] {INPUT_FILE} is not modified - the next steps skip its header lines when reading")
 
         print("\n" + "="*70)
         print("[OK] PROCESSING COMPLETED SUCCESSFULLY!")
@@ -4,35 +4,28 @@ Rounds all odd-numbered columns (Mass columns) to N decimal places
 """
 import os
 import sys
-import pandas as pd
-import shutil
 
 # Add root directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from config import INPUT_FILE, INPUT_DIR, OUTPUT_DIR, ENCODING
-from utils.csv_helper import read_csv_auto, validate_dataframe
+from config import INPUT_FILE, OUTPUT_DIR, ENCODING, PARALLEL_READ_MIN_SIZE, PARALLEL_READ_WORKERS
+from utils.compression import copy_file
+from utils.csv_helper import validate_dataframe, to_numeric_column
+from utils.table_io import output_csv_path
+from utils.raw_header import read_header_layout, read_text_columns
 
 
-def round_mass_columns(input_file, output_file, decimal_places):
+def round_mass_df(df, decimal_places):
     """
-    Rounds all odd-numbered columns (Mass columns) to specified decimal places
+    Rounds all odd-numbered columns (Mass columns) of a DataFrame in place
 
     Args:
-        input_file: Input file path
-        output_file: Output file path
+        df: DataFrame with Mass/Intensity column pairs
         decimal_places: Number of decimal places to round to
-    """
-    print(f"Reading file: {input_file}")
-
-    # Read CSV file with automatic delimiter detection
-    df, delimiter = read_csv_auto(input_file, ENCODING)
-
-    print(f"[INFO] File loaded: {len(df)} rows, {len(df.columns)} columns")
-
-    # Validate file structure (should have at least 2 columns: Mass + Intensity)
-    validate_dataframe(df, min_columns=2, script_name="Script 02")
 
+    Returns:
+        The same DataFrame, with Mass columns numeric and rounded
+    """
     print(f"[INFO] Processing odd-numbered columns (Mass columns)...")
 
     # Process odd-numbered columns (indices 0, 2, 4, 6, ...)
@@ -49,8 +42,8 @@ def round_mass_columns(input_file, output_file, decimal_places):
             continue
 
         # Convert to numeric (handles comma decimal separator if present)
-        # coerce will turn non-numeric values into NaN
-        df[col_name] = pd.to_numeric(df[col_name].astype(str).str.replace(',', '.'), errors='coerce')
+        # non-numeric values become NaN; columns that are already numbers are kept as they are
+        df[col_name] = to_numeric_column(df[col_name])
 
         # Round to specified decimal places
         df[col_name] = df[col_name].round(decimal_places)
@@ -58,6 +51,35 @@ def round_mass_columns(input_file, output_file, decimal_places):
         columns_processed += 1
         print(f"[OK] Column {col_idx + 1} ({col_name}) - rounded to {decimal_places} decimals")
 
+    print(f"[OK] Total columns processed: {columns_processed}")
+    return df
+
+
+def round_mass_columns(input_file, output_file, decimal_places):
+    """
+    Rounds all odd-numbered columns (Mass columns) to specified decimal places
+
+    Args:
+        input_file: Input file path
+        output_file: Output file path
+        decimal_places: Number of decimal places to round to
+    """
+    print(f"Reading file: {input_file}")
+
+    # Read the raw file from its column header line (the other header lines are skipped, see step 01)
+    layout = read_header_layout(input_file, ENCODING)
+    delimiter = layout['delimiter']
+    print(f"[INFO] Detected delimiter: '{delimiter}'")
+    df = read_text_columns(input_file, layout, ENCODING, workers=PARALLEL_READ_WORKERS or os.cpu_count() or 1,
+                           min_parallel_size=PARALLEL_READ_MIN_SIZE)
+
+    print(f"[INFO] File loaded: {len(df)} rows, {len(df.columns)} columns")
+
+    # Validate file structure (should have at least 2 columns: Mass + Intensity)
+    validate_dataframe(df, min_columns=2, script_name="Script 02")
+
+    df = round_mass_df(df, decimal_places)
+
     # Save to output file
     print(f"\n[INFO] Saving processed file...")
     # Use float_format to preserve the exact number of decimal places
@@ -65,7 +87,6 @@ def round_mass_columns(input_file, output_file, decimal_places):
     df.to_csv(output_file, sep=delimiter, encoding='utf-8', index=False, float_format=float_format)
 
     print(f"\n[OK] Processed file saved at: {output_file}")
-    print(f"[OK] Total columns processed: {columns_processed}")
     print(f"[OK] Total rows: {len(df)}")
 
 
@@ -102,8 +123,8 @@ def get_decimal_places():
 
 if __name__ == "__main__":
     # Input and output files
-    output_file = os.path.join(OUTPUT_DIR, "02_mass_rounded.csv")
-    updated_input = os.path.join(INPUT_DIR, "data.csv")
+    output_file = output_csv_path(os.path.join(OUTPUT_DIR, "02_mass_rounded.csv"))
+    updated_input = INPUT_FILE
 
     print("="*70)
     print("SCRIPT 02: ROUND MASS COLUMNS")
@@ -132,7 +153,8 @@ if __name__ == "__main__":
         round_mass_columns(INPUT_FILE, output_file, decimal_places)
 
         # Copy result to INPUT as updated version
-        shutil.copy2(output_file, updated_input)
+        # (compressed like the input file when it is a .gz/.xz/.zst file)
+        copy_file(output_file, updated_input)
         print(f"\n[OK] Updated input file: {updated_input}")
 
         print("\n" + "="*70)
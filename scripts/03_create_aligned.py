@@ -11,33 +11,31 @@ import numpy as np
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config import INPUT_FILE, OUTPUT_DIR, ENCODING
-from utils.csv_helper import read_csv_auto, validate_dataframe
+from utils.csv_helper import read_csv_auto, validate_dataframe, to_numeric_column
+from utils.table_io import intermediate_path, save_table
 from utils import get_decimal_places
+from utils.alignment import mass_keys, keys_to_masses
 
 
-def create_aligned_masses(input_file, output_file):
+def build_aligned_df(df, decimal_places):
     """
-    Creates a sorted list of unique mass values from all odd-numbered columns
-    and adds sample headers from the first row
+    Builds the aligned table (sorted unique masses + one empty column per sample)
+    from a DataFrame with Mass/Intensity column pairs
 
-    Args:
-        input_file: Input file path
-        output_file: Output file path (03_aligned.csv)
-    """
-    print(f"Reading file: {input_file}")
+    Masses are collected as fixed-point integer keys (mass x 10^decimal_places),
+    so unique and sort run on int64 arrays
 
-    # Read CSV file with automatic delimiter detection
-    df, delimiter = read_csv_auto(input_file, ENCODING)
-
-    print(f"[INFO] File loaded: {len(df)} rows, {len(df.columns)} columns")
-
-    # Validate file structure
-    validate_dataframe(df, min_columns=2, script_name="Script 03")
+    Args:
+        df: DataFrame with rounded Mass columns (output of step 02)
+        decimal_places: Number of decimal places (from .decimal_config)
 
+    Returns:
+        Aligned DataFrame, or None if no numeric mass values were found
+    """
     print(f"[INFO] Collecting unique mass values from odd-numbered columns...")
 
-    # Collect all unique mass values from odd columns (indices 0, 2, 4, 6, ...)
-    all_masses = set()
+    # Collect the unique mass keys of each odd column (indices 0, 2, 4, 6, ...)
+    column_keys = []
     sample_headers = []  # Store sample names from odd columns
 
     for col_idx in range(0, len(df.columns), 2):  # Step by 2 to get odd-numbered columns
@@ -51,28 +49,27 @@ def create_aligned_masses(input_file, output_file):
             continue
 
         # Convert to numeric (handles comma decimal separator if present)
-        numeric_values = pd.to_numeric(df[col_name].astype(str).str.replace(',', '.'), errors='coerce')
+        numeric_values = to_numeric_column(df[col_name])
 
-        # Add non-null values to the set
-        valid_values = numeric_values.dropna().values
-        all_masses.update(valid_values)
+        # Keep the unique keys of the non-null values
+        valid_values = numeric_values[~np.isnan(numeric_values)]
+        column_keys.append(np.unique(mass_keys(valid_values, decimal_places)))
 
         print(f"[OK] Column {col_idx + 1} ({col_name}) - {len(valid_values)} values processed")
 
-    print(f"\n[INFO] Total unique mass values collected: {len(all_masses)}")
+    # np.unique returns the keys sorted
+    print(f"[INFO] Sorting mass values...")
+    sorted_keys = np.unique(np.concatenate(column_keys)) if column_keys else np.array([], dtype=np.int64)
+
+    print(f"\n[INFO] Total unique mass values collected: {len(sorted_keys)}")
     print(f"[INFO] Total sample headers collected: {len(sample_headers)}")
 
-    if len(all_masses) == 0:
+    if len(sorted_keys) == 0:
         print("[ERROR] No numeric mass values found!")
-        return
+        return None
 
-    # Convert set to sorted list
-    print(f"[INFO] Sorting mass values...")
-    sorted_masses = sorted(all_masses)
-
-    # Get decimal places from config (saved in script 02)
-    decimal_places = get_decimal_places(OUTPUT_DIR)
-    print(f"[INFO] Using {decimal_places} decimal places (from config)")
+    # Back to float masses for the output table
+    sorted_masses = keys_to_masses(sorted_keys, decimal_places)
 
     # Create DataFrame with Aligned column + empty columns for each sample
     print(f"[INFO] Creating aligned DataFrame with sample headers...")
@@ -87,21 +84,52 @@ def create_aligned_masses(input_file, output_file):
         if (i + 1) % 20 == 0:  # Progress update every 20 columns
             print(f"[INFO] Added {i + 1}/{len(sample_headers)} columns...")
 
+    print(f"[OK] Total distinct masses: {len(sorted_masses)}")
+    print(f"[OK] Total sample columns: {len(sample_headers)}")
+    print(f"[OK] Range: {sorted_masses[0]:.2f} to {sorted_masses[-1]:.2f}")
+
+    return df_aligned
+
+
+def create_aligned_masses(input_file, output_file):
+    """
+    Creates a sorted list of unique mass values from all odd-numbered columns
+    and adds sample headers from the first row
+
+    Args:
+        input_file: Input file path
+        output_file: Output file path (03_aligned.csv)
+    """
+    print(f"Reading file: {input_file}")
+
+    # Read CSV file with automatic delimiter detection
+    df, delimiter = read_csv_auto(input_file, ENCODING)
+
+    print(f"[INFO] File loaded: {len(df)} rows, {len(df.columns)} columns")
+
+    # Validate file structure
+    validate_dataframe(df, min_columns=2, script_name="Script 03")
+
+    # Get decimal places from config (saved in script 02)
+    decimal_places = get_decimal_places(OUTPUT_DIR)
+    print(f"[INFO] Using {decimal_places} decimal places (from config)")
+
+    df_aligned = build_aligned_df(df, decimal_places)
+    if df_aligned is None:
+        return
+
     # Save to output file
     print(f"[INFO] Saving aligned masses to file...")
     # Use float_format to preserve the exact number of decimal places
     float_format = f'%.{decimal_places}f'
-    df_aligned.to_csv(output_file, sep=delimiter, encoding='utf-8', index=False, float_format=float_format)
+    save_table(df_aligned, output_file, delimiter, float_format)
 
     print(f"\n[OK] Aligned mass file created: {output_file}")
-    print(f"[OK] Total distinct masses: {len(sorted_masses)}")
-    print(f"[OK] Total sample columns: {len(sample_headers)}")
-    print(f"[OK] Range: {sorted_masses[0]:.2f} to {sorted_masses[-1]:.2f}")
 
 
 if __name__ == "__main__":
     # Output file for aligned masses
-    output_file = os.path.join(OUTPUT_DIR, "03_aligned.csv")
+    output_file = intermediate_path(os.path.join(OUTPUT_DIR, "03_aligned.csv"))
 
     print("="*70)
     print("SCRIPT 03: CREATE ALIGNED MASS LIST")
@@ -11,9 +11,97 @@ import numpy as np
 # Add root directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from config import INPUT_FILE, OUTPUT_DIR, ENCODING
-from utils.csv_helper import read_csv_auto, validate_dataframe
+from config import INPUT_FILE, OUTPUT_DIR, ENCODING, SAMPLE_WORKERS
+from utils.csv_helper import read_csv_auto, validate_dataframe, to_numeric_column
+from utils.table_io import intermediate_path, read_table_auto, save_table
 from utils import get_decimal_places
+from utils.alignment import mass_keys, aligned_sorter, locate_masses, scatter_column, map_samples, sum_duplicates
+
+
+def fill_aligned_df(df_data, df_aligned, decimal_places, workers=1):
+    """
+    Fills the aligned table with intensity sums from the data DataFrame
+
+    Args:
+        df_data: DataFrame with Mass/Intensity column pairs (data.csv)
+        df_aligned: Aligned DataFrame with empty sample columns (step 03)
+        decimal_places: Number of decimal places used to match masses
+        workers: Number of threads filling the sample columns (None = number of CPU cores, 1 = off)
+
+    Returns:
+        Filled aligned DataFrame (empty cells filled with 0)
+    """
+    print(f"\n[INFO] Processing each sample and filling intensities...")
+
+    # One preallocated (masses x samples) array, filled column by column
+    # (column-major: each sample column is one contiguous block, written by one thread)
+    sample_columns = [col for col in df_aligned.columns if col != 'Aligned']
+    column_index = {col: i for i, col in enumerate(sample_columns)}
+    matrix = np.array(df_aligned[sample_columns].to_numpy(dtype=np.float64), order='F')
+
+    # Masses are joined on fixed-point integer keys (mass x 10^decimal_places),
+    # looked up by binary search (searchsorted) in the aligned keys
+    aligned_keys = mass_keys(df_aligned['Aligned'].to_numpy(dtype=np.float64), decimal_places)
+    sorter = aligned_sorter(aligned_keys)
+
+    def fill_sample(item):
+        col_idx, mass_col_name, mass_column, intensity_column = item
+
+        # Check if this sample exists in aligned
+        if mass_col_name not in column_index:
+            return False, f"[SKIP] Sample {mass_col_name} not found in aligned file"
+
+        # Convert to numeric (no conversion for columns that are already numbers)
+        masses = to_numeric_column(mass_column)
+        intensities = to_numeric_column(intensity_column)
+
+        # Remove NaN values
+        valid = ~np.isnan(masses) & ~np.isnan(intensities)
+        masses, intensities = masses[valid], intensities[valid]
+
+        if len(masses) == 0:
+            return False, f"[SKIP] Sample {mass_col_name} - no valid data"
+
+        # Sum the intensities of duplicate masses: scatter-add on the mass keys, same sums as
+        # groupby('Mass').sum() (mass keys match the aligned keys whatever the float representation)
+        keys, sums = sum_duplicates(mass_keys(masses, decimal_places), intensities)
+        if len(keys) != len(np.unique(masses)):
+            raise ValueError(f"Sample {mass_col_name} has masses that only match after rounding to "
+                             f"{decimal_places} decimals. Please run Step 02 first.")
+
+        # Place the intensities at the rows of their aligned masses (unmatched cells stay empty)
+        column = column_index[mass_col_name]
+        matrix[:, column] = np.nan
+        scatter_column(matrix, column, locate_masses(aligned_keys, keys, sorter), sums)
+
+        return True, (f"[OK] Sample {col_idx // 2 + 1}/{len(df_data.columns) // 2} ({mass_col_name}) - "
+                      f"{len(keys)} unique masses")
+
+    # Pairs of Mass (0, 2, 4...) and Intensity (1, 3, 5...) columns, taken from the DataFrame here:
+    # the threads only read their own pair and write their own column of the matrix
+    columns = list(df_data.columns)
+    pairs = [(col_idx, columns[col_idx], df_data[columns[col_idx]], df_data[columns[col_idx + 1]])
+             for col_idx in range(0, len(columns) - 1, 2)]
+
+    # Process each pair of Mass/Intensity columns
+    samples_processed = 0
+    for processed, message in map_samples(fill_sample, pairs, workers):
+        samples_processed += processed
+        print(message)
+
+    if len(df_data.columns) % 2 == 1:
+        print(f"[SKIP] Column {len(df_data.columns)} ({df_data.columns[-1]}) - no corresponding intensity column")
+
+    # Fill empty cells (NaN) with 0
+    print(f"\n[INFO] Filling empty cells with 0...")
+    matrix[np.isnan(matrix)] = 0
+
+    # Assemble the DataFrame once, keeping the column order of the aligned table
+    df_filled = pd.DataFrame(matrix, columns=sample_columns, index=df_aligned.index)
+    df_filled.insert(list(df_aligned.columns).index('Aligned'), 'Aligned', df_aligned['Aligned'].to_numpy())
+
+    print(f"[OK] Samples processed: {samples_processed}")
+    return df_filled
 
 
 def fill_aligned_with_intensities(data_file, aligned_file, output_file):
@@ -29,7 +117,7 @@ def fill_aligned_with_intensities(data_file, aligned_file, output_file):
     df_data, delimiter_data = read_csv_auto(data_file, ENCODING)
 
     print(f"Reading aligned file: {aligned_file}")
-    df_aligned, delimiter_aligned = read_csv_auto(aligned_file, 'utf-8')
+    df_aligned, delimiter_aligned = read_table_auto(aligned_file, 'utf-8')
 
     print(f"[INFO] Data file: {len(df_data)} rows, {len(df_data.columns)} columns")
     print(f"[INFO] Aligned file: {len(df_aligned)} rows, {len(df_aligned.columns)} columns")
@@ -42,79 +130,23 @@ def fill_aligned_with_intensities(data_file, aligned_file, output_file):
     decimal_places = get_decimal_places(OUTPUT_DIR)
     print(f"[INFO] Using {decimal_places} decimal places (from config)")
 
-    print(f"\n[INFO] Processing each sample and filling intensities...")
-
-    # Process each pair of Mass/Intensity columns
-    samples_processed = 0
-
-    for col_idx in range(0, len(df_data.columns), 2):
-        # Mass column (odd: 0, 2, 4, 6...)
-        mass_col_name = df_data.columns[col_idx]
-
-        # Intensity column (even: 1, 3, 5, 7...)
-        if col_idx + 1 >= len(df_data.columns):
-            print(f"[SKIP] Column {col_idx + 1} ({mass_col_name}) - no corresponding intensity column")
-            break
-
-        intensity_col_name = df_data.columns[col_idx + 1]
-
-        # Check if this sample exists in aligned
-        if mass_col_name not in df_aligned.columns:
-            print(f"[SKIP] Sample {mass_col_name} not found in aligned file")
-            continue
-
-        # Extract Mass and Intensity for this sample
-        df_sample = df_data[[mass_col_name, intensity_col_name]].copy()
-        df_sample.columns = ['Mass', 'Intensity']
-
-        # Convert to numeric
-        df_sample['Mass'] = pd.to_numeric(df_sample['Mass'].astype(str).str.replace(',', '.'), errors='coerce')
-        df_sample['Intensity'] = pd.to_numeric(df_sample['Intensity'].astype(str).str.replace(',', '.'), errors='coerce')
-
-        # Remove NaN values
-        df_sample = df_sample.dropna()
-
-        if len(df_sample) == 0:
-            print(f"[SKIP] Sample {mass_col_name} - no valid data")
-            continue
-
-        # Group by Mass and sum intensities (in case there are duplicates)
-        df_grouped = df_sample.groupby('Mass', as_index=False)['Intensity'].sum()
-
-        # Round mass to match aligned masses (handle floating point precision)
-        df_grouped['Mass'] = df_grouped['Mass'].round(decimal_places)
-
-        # Merge with aligned based on Mass
-        # Use a temporary dataframe to avoid modifying df_aligned multiple times
-        df_temp = df_aligned[['Aligned']].copy()
-        df_temp = df_temp.merge(df_grouped, left_on='Aligned', right_on='Mass', how='left')
-
-        # Fill the corresponding column in df_aligned
-        df_aligned[mass_col_name] = df_temp['Intensity'].values
-
-        samples_processed += 1
-        print(f"[OK] Sample {col_idx // 2 + 1}/{len(df_data.columns) // 2} ({mass_col_name}) - {len(df_grouped)} unique masses")
-
-    # Fill empty cells (NaN) with 0
-    print(f"\n[INFO] Filling empty cells with 0...")
-    df_aligned = df_aligned.fillna(0)
+    df_aligned = fill_aligned_df(df_data, df_aligned, decimal_places, SAMPLE_WORKERS)
 
     # Save to output
     print(f"[INFO] Saving filled aligned file...")
     # Use float_format to preserve the exact number of decimal places
     float_format = f'%.{decimal_places}f'
-    df_aligned.to_csv(output_file, sep=delimiter_aligned, encoding='utf-8', index=False, float_format=float_format)
+    save_table(df_aligned, output_file, delimiter_aligned, float_format)
 
     print(f"\n[OK] Aligned file filled successfully: {output_file}")
-    print(f"[OK] Samples processed: {samples_processed}")
     print(f"[OK] Total rows: {len(df_aligned)}")
     print(f"[OK] Total columns: {len(df_aligned.columns)}")
 
 
 if __name__ == "__main__":
     # Input and output files
-    aligned_input = os.path.join(OUTPUT_DIR, "03_aligned.csv")
-    output_file = os.path.join(OUTPUT_DIR, "04_aligned_filled.csv")
+    aligned_input = intermediate_path(os.path.join(OUTPUT_DIR, "03_aligned.csv"))
+    output_file = intermediate_path(os.path.join(OUTPUT_DIR, "04_aligned_filled.csv"))
 
     print("="*70)
     print("SCRIPT 04: FILL ALIGNED WITH INTENSITY SUMS")
@@ -10,10 +10,39 @@ import pandas as pd
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config import OUTPUT_DIR
-from utils.csv_helper import read_csv_auto, validate_dataframe
+from utils.csv_helper import validate_dataframe
+from utils.table_io import intermediate_path, read_table_auto, save_table
+from utils.precision import sum_rows
 from utils import get_decimal_places
 
 
+def add_total_df(df):
+    """
+    Adds a 'Total' column with sum of all intensities for each mass
+
+    Args:
+        df: Aligned DataFrame (step 04 result)
+
+    Returns:
+        The same DataFrame with the 'Total' column added
+    """
+    # Calculate row sum for all intensity columns (all columns except 'Aligned')
+    print(f"[INFO] Calculating total sum for each row...")
+
+    # Sum all columns except the first one (Aligned) and add as 'Total' column
+    # (float32 intensities are summed in float64)
+    df['Total'] = sum_rows(df.iloc[:, 1:])
+
+    # Count zero rows for information
+    zero_rows = len(df[df['Total'] == 0])
+    non_zero_rows = len(df[df['Total'] > 0])
+
+    print(f"[OK] Rows with signal (Total > 0): {non_zero_rows}")
+    print(f"[OK] Rows without signal (Total = 0): {zero_rows}")
+
+    return df
+
+
 def add_total_column(input_file, output_file):
     """
     Adds a 'Total' column with sum of all intensities for each mass
@@ -23,22 +52,14 @@ def add_total_column(input_file, output_file):
         output_file: Output file with total column (05_aligned_with_total.csv)
     """
     print(f"Reading aligned file: {input_file}")
-    df, delimiter = read_csv_auto(input_file, 'utf-8')
+    df, delimiter = read_table_auto(input_file, 'utf-8')
 
     print(f"[INFO] File loaded: {len(df)} rows, {len(df.columns)} columns")
 
     # Validate file structure
     validate_dataframe(df, min_columns=2, script_name="Script 05")
 
-    # Calculate row sum for all intensity columns (all columns except 'Aligned')
-    print(f"[INFO] Calculating total sum for each row...")
-
-    # Sum all columns except the first one (Aligned) and add as 'Total' column
-    df['Total'] = df.iloc[:, 1:].sum(axis=1)
-
-    # Count zero rows for information
-    zero_rows = len(df[df['Total'] == 0])
-    non_zero_rows = len(df[df['Total'] > 0])
+    df = add_total_df(df)
 
     # Get decimal places from config (saved in script 02)
     decimal_places = get_decimal_places(OUTPUT_DIR)
@@ -47,19 +68,17 @@ def add_total_column(input_file, output_file):
     print(f"[INFO] Saving file with total column...")
     # Use float_format to preserve the exact number of decimal places
     float_format = f'%.{decimal_places}f'
-    df.to_csv(output_file, sep=delimiter, encoding='utf-8', index=False, float_format=float_format)
+    save_table(df, output_file, delimiter, float_format)
 
     print(f"\n[OK] File with total column created: {output_file}")
     print(f"[OK] Total rows: {len(df)}")
-    print(f"[OK] Rows with signal (Total > 0): {non_zero_rows}")
-    print(f"[OK] Rows without signal (Total = 0): {zero_rows}")
     print(f"[OK] 'Total' column added as the last column")
 
 
 if __name__ == "__main__":
     # Input and output files
-    input_file = os.path.join(OUTPUT_DIR, "04_aligned_filled.csv")
-    output_file = os.path.join(OUTPUT_DIR, "05_aligned_with_total.csv")
+    input_file = intermediate_path(os.path.join(OUTPUT_DIR, "04_aligned_filled.csv"))
+    output_file = intermediate_path(os.path.join(OUTPUT_DIR, "05_aligned_with_total.csv"))
 
     print("="*70)
     print("SCRIPT 05: ADD TOTAL SUM COLUMN")
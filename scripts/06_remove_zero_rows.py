@@ -10,26 +10,21 @@ import pandas as pd
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config import OUTPUT_DIR
-from utils.csv_helper import read_csv_auto, validate_dataframe
+from utils.csv_helper import validate_dataframe
+from utils.table_io import intermediate_path, read_table_auto, save_table
 from utils import get_decimal_places
 
 
-def remove_zero_rows(input_file, output_file):
+def remove_zero_rows_df(df):
     """
-    Removes rows where Total column equals zero
+    Removes rows where Total column equals zero, then drops the Total column
 
     Args:
-        input_file: Input file with Total column (05_aligned_with_total.csv)
-        output_file: Output clean file (06_aligned_clean.csv)
-    """
-    print(f"Reading file with total column: {input_file}")
-    df, delimiter = read_csv_auto(input_file, 'utf-8')
-
-    print(f"[INFO] File loaded: {len(df)} rows, {len(df.columns)} columns")
-
-    # Validate file structure
-    validate_dataframe(df, min_columns=2, script_name="Script 06")
+        df: DataFrame with Total column (step 05 result)
 
+    Returns:
+        Clean DataFrame (new object, index reset)
+    """
     # Check if 'Total' column exists
     if 'Total' not in df.columns:
         print(f"[ERROR] 'Total' column not found in the file")
@@ -39,12 +34,10 @@ def remove_zero_rows(input_file, output_file):
 
     # Count rows before filtering
     rows_before = len(df)
-    zero_rows = len(df[df['Total'] == 0])
-    non_zero_rows = len(df[df['Total'] > 0])
 
     # Filter rows where Total > 0
     print(f"[INFO] Filtering rows where Total > 0...")
-    df_clean = df[df['Total'] > 0].copy()
+    df_clean = df[df['Total'] > 0].reset_index(drop=True)
 
     # Remove the Total column from final output
     print(f"[INFO] Removing 'Total' column from final output...")
@@ -54,25 +47,48 @@ def remove_zero_rows(input_file, output_file):
     rows_after = len(df_clean)
     rows_removed = rows_before - rows_after
 
+    print(f"[OK] Rows before: {rows_before}")
+    print(f"[OK] Rows after: {rows_after}")
+    print(f"[OK] Rows removed (Total = 0): {rows_removed}")
+    if rows_before > 0:
+        print(f"[OK] Percentage kept: {rows_after / rows_before * 100:.1f}%")
+
+    return df_clean
+
+
+def remove_zero_rows(input_file, output_file):
+    """
+    Removes rows where Total column equals zero
+
+    Args:
+        input_file: Input file with Total column (05_aligned_with_total.csv)
+        output_file: Output clean file (06_aligned_clean.csv)
+    """
+    print(f"Reading file with total column: {input_file}")
+    df, delimiter = read_table_auto(input_file, 'utf-8')
+
+    print(f"[INFO] File loaded: {len(df)} rows, {len(df.columns)} columns")
+
+    # Validate file structure
+    validate_dataframe(df, min_columns=2, script_name="Script 06")
+
+    df_clean = remove_zero_rows_df(df)
+
     # Get decimal places from config
     decimal_places = get_decimal_places(OUTPUT_DIR)
 
     # Save to output file
     print(f"[INFO] Saving cleaned file...")
     float_format = f'%.{decimal_places}f'
-    df_clean.to_csv(output_file, sep=delimiter, encoding='utf-8', index=False, float_format=float_format)
+    save_table(df_clean, output_file, delimiter, float_format)
 
     print(f"\n[OK] Clean aligned file created: {output_file}")
-    print(f"[OK] Rows before: {rows_before}")
-    print(f"[OK] Rows after: {rows_after}")
-    print(f"[OK] Rows removed (Total = 0): {rows_removed}")
-    print(f"[OK] Percentage kept: {rows_after / rows_before * 100:.1f}%")
 
 
 if __name__ == "__main__":
     # Input and output files
-    input_file = os.path.join(OUTPUT_DIR, "05_aligned_with_total.csv")
-    output_file = os.path.join(OUTPUT_DIR, "06_aligned_clean.csv")
+    input_file = intermediate_path(os.path.join(OUTPUT_DIR, "05_aligned_with_total.csv"))
+    output_file = intermediate_path(os.path.join(OUTPUT_DIR, "06_aligned_clean.csv"))
 
     print("="*70)
     print("SCRIPT 06: REMOVE ZERO ROWS")
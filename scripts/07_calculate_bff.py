@@ -4,15 +4,15 @@ Calculates BFF = mean + (threshold * std_dev) from all "Blank" columns (excludin
 """
 import os
 import sys
-import pandas as pd
-import numpy as np
 
 # Add root directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config import OUTPUT_DIR
-from utils.csv_helper import read_csv_auto, validate_dataframe
+from utils.csv_helper import validate_dataframe
+from utils.table_io import intermediate_path, read_table_auto, save_table
 from utils import get_decimal_places
+from utils.bff import find_blank_columns, blank_matrix, compute_bff
 
 
 def get_threshold():
@@ -56,33 +56,23 @@ def get_threshold():
             sys.exit(0)
 
 
-def calculate_bff(input_file, output_file, threshold):
+def calculate_bff_df(df, threshold):
     """
-    Calculates BFF column based on "Blank" columns (excluding "BlankExt")
+    Adds the BFF column to a DataFrame, based on "Blank" columns (excluding "BlankExt")
 
     BFF = mean + (threshold * standard_deviation) of all Blank column values per row
 
     Args:
-        input_file: Input aligned file
-        output_file: Output file with BFF column added
+        df: Aligned DataFrame (step 06 result)
         threshold: Multiplier for standard deviation (e.g., 3 or 10)
-    """
-    print(f"Reading file: {input_file}")
-    df, delimiter = read_csv_auto(input_file, 'utf-8')
-
-    print(f"[INFO] File loaded: {len(df)} rows, {len(df.columns)} columns")
-
-    # Validate file structure
-    validate_dataframe(df, min_columns=2, script_name="Script 07")
 
+    Returns:
+        The same DataFrame with the 'BFF' column added
+    """
     # Find columns containing "Blank" but not "BlankExt"
     print(f"\n[INFO] Searching for 'Blank' columns (excluding 'BlankExt')...")
 
-    blank_cols = []
-    for col in df.columns:
-        col_str = str(col).lower()
-        if 'blank' in col_str and 'blankext' not in col_str:
-            blank_cols.append(col)
+    blank_cols = find_blank_columns(df.columns)
 
     if len(blank_cols) == 0:
         print("[ERROR] No columns with 'Blank' found (excluding 'BlankExt').")
@@ -93,43 +83,41 @@ def calculate_bff(input_file, output_file, threshold):
     for col in blank_cols:
         print(f"     - {col}")
 
-    print(f"\n[INFO] Calculating BFF for each row...")
+    print(f"\n[INFO] Calculating BFF for all rows (vectorized)...")
     print(f"[INFO] Formula: BFF = mean + ({threshold} × std_dev)")
 
-    # Calculate BFF for each row
-    bff_values = []
+    # Calculate BFF for all rows at once from the Blank column block
+    df['BFF'] = compute_bff(blank_matrix(df, blank_cols), threshold)
+
+    # Count valid BFF values
+    valid_bff = df['BFF'].notna().sum()
+
+    print(f"[OK] Rows with valid BFF: {valid_bff}")
+    print(f"[INFO] BFF range: {df['BFF'].min():.2f} to {df['BFF'].max():.2f}")
+
+    return df
 
-    for idx, row in df.iterrows():
-        # Extract values from Blank columns
-        blank_values = []
-        for col in blank_cols:
-            val = row[col]
-            if pd.notna(val) and isinstance(val, (int, float)):
-                blank_values.append(float(val))
 
-        # Calculate BFF if we have values
-        if len(blank_values) > 0:
-            mean_val = np.mean(blank_values)
+def calculate_bff(input_file, output_file, threshold):
+    """
+    Calculates BFF column based on "Blank" columns (excluding "BlankExt")
 
-            if len(blank_values) > 1:
-                std_val = np.std(blank_values, ddof=1)  # Sample standard deviation
-            else:
-                std_val = 0
+    BFF = mean + (threshold * standard_deviation) of all Blank column values per row
 
-            bff = mean_val + (threshold * std_val)
-            bff_values.append(bff)
-        else:
-            bff_values.append(np.nan)
+    Args:
+        input_file: Input aligned file
+        output_file: Output file with BFF column added
+        threshold: Multiplier for standard deviation (e.g., 3 or 10)
+    """
+    print(f"Reading file: {input_file}")
+    df, delimiter = read_table_auto(input_file, 'utf-8')
 
-        # Progress feedback
-        if (idx + 1) % 5000 == 0:
-            print(f"[INFO] Processed {idx + 1}/{len(df)} rows...")
+    print(f"[INFO] File loaded: {len(df)} rows, {len(df.columns)} columns")
 
-    # Add BFF column to dataframe
-    df['BFF'] = bff_values
+    # Validate file structure
+    validate_dataframe(df, min_columns=2, script_name="Script 07")
 
-    # Count valid BFF values
-    valid_bff = df['BFF'].notna().sum()
+    df = calculate_bff_df(df, threshold)
 
     # Get decimal places from config
     decimal_places = get_decimal_places(OUTPUT_DIR)
@@ -137,19 +125,17 @@ def calculate_bff(input_file, output_file, threshold):
     # Save to output file
     print(f"\n[INFO] Saving file with BFF column...")
     float_format = f'%.{decimal_places}f'
-    df.to_csv(output_file, sep=delimiter, encoding='utf-8', index=False, float_format=float_format)
+    save_table(df, output_file, delimiter, float_format)
 
     print(f"\n[OK] File with BFF column created: {output_file}")
     print(f"[OK] Total rows: {len(df)}")
-    print(f"[OK] Rows with valid BFF: {valid_bff}")
     print(f"[OK] BFF column added as the last column")
-    print(f"[INFO] BFF range: {df['BFF'].min():.2f} to {df['BFF'].max():.2f}")
 
 
 if __name__ == "__main__":
     # Input and output files
-    input_file = os.path.join(OUTPUT_DIR, "06_aligned_clean.csv")
-    output_file = os.path.join(OUTPUT_DIR, "07_aligned_with_bff.csv")
+    input_file = intermediate_path(os.path.join(OUTPUT_DIR, "06_aligned_clean.csv"))
+    output_file = intermediate_path(os.path.join(OUTPUT_DIR, "07_aligned_with_bff.csv"))
 
     print("="*70)
     print("SCRIPT 07: CALCULATE BFF (BACKGROUND FILTER FACTOR)")
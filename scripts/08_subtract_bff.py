@@ -4,32 +4,27 @@ Subtracts the BFF value from each row across all sample columns (background corr
 """
 import os
 import sys
-import pandas as pd
 
 # Add root directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config import OUTPUT_DIR
-from utils.csv_helper import read_csv_auto, validate_dataframe
+from utils.csv_helper import validate_dataframe
+from utils.table_io import intermediate_path, read_table_auto, save_table
 from utils import get_decimal_places
+from utils.bff import find_subtract_columns, numeric_values, subtract_bff_block
 
 
-def subtract_bff(input_file, output_file):
+def subtract_bff_df(df):
     """
-    Subtracts BFF value from all sample columns (horizontally, row by row)
+    Subtracts BFF value from all sample columns of a DataFrame (horizontally, row by row)
 
     Args:
-        input_file: Input file with BFF column (07_aligned_with_bff.csv)
-        output_file: Output file with BFF subtracted (08_aligned_bff_subtracted.csv)
-    """
-    print(f"Reading file with BFF column: {input_file}")
-    df, delimiter = read_csv_auto(input_file, 'utf-8')
-
-    print(f"[INFO] File loaded: {len(df)} rows, {len(df.columns)} columns")
-
-    # Validate file structure
-    validate_dataframe(df, min_columns=2, script_name="Script 08")
+        df: DataFrame with BFF column (step 07 result)
 
+    Returns:
+        The same DataFrame with BFF subtracted
+    """
     # Check if BFF column exists
     if 'BFF' not in df.columns:
         print(f"[ERROR] 'BFF' column not found in the file")
@@ -42,13 +37,7 @@ def subtract_bff(input_file, output_file):
     # Identify columns to process
     # Skip: 'Aligned' column (first) and 'BFF' column (last)
     # Also skip any "Blank" columns since we don't want to subtract BFF from blanks
-
-    columns_to_process = []
-    for col in df.columns:
-        col_str = str(col).lower()
-        # Skip Aligned, BFF, and Blank columns
-        if col not in ['Aligned', 'BFF'] and 'blank' not in col_str:
-            columns_to_process.append(col)
+    columns_to_process = find_subtract_columns(df.columns)
 
     print(f"\n[INFO] Found {len(columns_to_process)} sample columns to process")
     print(f"[INFO] Skipping: 'Aligned', 'BFF', and any 'Blank' columns")
@@ -57,49 +46,55 @@ def subtract_bff(input_file, output_file):
     valid_bff_count = df['BFF'].notna().sum()
     print(f"[INFO] Rows with valid BFF values: {valid_bff_count}/{len(df)}")
 
-    print(f"\n[INFO] Subtracting BFF from each sample column (row by row)...")
+    print(f"\n[INFO] Subtracting BFF from all sample columns at once...")
 
-    # Subtract BFF from each sample column
-    rows_processed = 0
+    # Subtract BFF from the whole sample column block (rows with NaN BFF are left untouched)
+    rows_processed = subtract_bff_block(df, columns_to_process, numeric_values(df['BFF']))
 
-    for idx, row in df.iterrows():
-        bff_value = row['BFF']
+    # Remove BFF column from final output (optional - keep it for reference)
+    # Uncomment the line below if you want to remove BFF column
+    # df = df.drop(columns=['BFF'])
 
-        # Only process if BFF is numeric
-        if pd.notna(bff_value) and isinstance(bff_value, (int, float)):
-            for col in columns_to_process:
-                val = row[col]
-                if pd.notna(val) and isinstance(val, (int, float)):
-                    df.at[idx, col] = val - bff_value
+    print(f"[OK] Rows processed: {rows_processed}")
+    print(f"[OK] Columns processed: {len(columns_to_process)}")
 
-            rows_processed += 1
+    return df
 
-        # Progress feedback
-        if (idx + 1) % 1000 == 0:
-            print(f"[INFO] Processed {idx + 1}/{len(df)} rows...")
 
-    # Remove BFF column from final output (optional - keep it for reference)
-    # Uncomment the line below if you want to remove BFF column
-    # df = df.drop(columns=['BFF'])
+def subtract_bff(input_file, output_file):
+    """
+    Subtracts BFF value from all sample columns (horizontally, row by row)
+
+    Args:
+        input_file: Input file with BFF column (07_aligned_with_bff.csv)
+        output_file: Output file with BFF subtracted (08_aligned_bff_subtracted.csv)
+    """
+    print(f"Reading file with BFF column: {input_file}")
+    df, delimiter = read_table_auto(input_file, 'utf-8')
+
+    print(f"[INFO] File loaded: {len(df)} rows, {len(df.columns)} columns")
+
+    # Validate file structure
+    validate_dataframe(df, min_columns=2, script_name="Script 08")
+
+    df = subtract_bff_df(df)
 
     # Get decimal places from config
     decimal_places = get_decimal_places(OUTPUT_DIR)
 
     print(f"\n[INFO] Saving file with BFF subtracted...")
     float_format = f'%.{decimal_places}f'
-    df.to_csv(output_file, sep=delimiter, encoding='utf-8', index=False, float_format=float_format)
+    save_table(df, output_file, delimiter, float_format)
 
     print(f"\n[OK] BFF subtraction completed: {output_file}")
     print(f"[OK] Total rows: {len(df)}")
-    print(f"[OK] Rows processed: {rows_processed}")
-    print(f"[OK] Columns processed: {len(columns_to_process)}")
     print(f"[INFO] BFF column kept in output for reference")
 
 
 if __name__ == "__main__":
     # Input and output files
-    input_file = os.path.join(OUTPUT_DIR, "07_aligned_with_bff.csv")
-    output_file = os.path.join(OUTPUT_DIR, "08_aligned_bff_subtracted.csv")
+    input_file = intermediate_path(os.path.join(OUTPUT_DIR, "07_aligned_with_bff.csv"))
+    output_file = intermediate_path(os.path.join(OUTPUT_DIR, "08_aligned_bff_subtracted.csv"))
 
     print("="*70)
     print("SCRIPT 08: SUBTRACT BFF FROM SAMPLE COLUMNS")
@@ -10,26 +10,21 @@ import pandas as pd
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config import OUTPUT_DIR
-from utils.csv_helper import read_csv_auto, validate_dataframe
+from utils.csv_helper import validate_dataframe
+from utils.table_io import intermediate_path, read_table_auto, save_table
 from utils import get_decimal_places
 
 
-def zero_negatives(input_file, output_file):
+def zero_negatives_df(df):
     """
-    Converts all negative values to zero in sample columns
+    Converts all negative values to zero in the sample columns of a DataFrame
 
     Args:
-        input_file: Input file with BFF subtracted (08_aligned_bff_subtracted.csv)
-        output_file: Output file with negatives zeroed (09_aligned_final.csv)
-    """
-    print(f"Reading file: {input_file}")
-    df, delimiter = read_csv_auto(input_file, 'utf-8')
-
-    print(f"[INFO] File loaded: {len(df)} rows, {len(df.columns)} columns")
-
-    # Validate file structure
-    validate_dataframe(df, min_columns=2, script_name="Script 09")
+        df: DataFrame with BFF subtracted (step 08 result)
 
+    Returns:
+        The same DataFrame with negatives replaced by 0
+    """
     # Identify columns to process (all except 'Aligned' and 'BFF')
     columns_to_process = []
     for col in df.columns:
@@ -76,25 +71,47 @@ def zero_negatives(input_file, output_file):
         if len(columns_to_process) > 50 and (columns_to_process.index(col) + 1) % 50 == 0:
             print(f"[INFO] Processed {columns_to_process.index(col) + 1}/{len(columns_to_process)} columns...")
 
+    print(f"[OK] Values converted to zero: {values_changed}")
+
+    return df
+
+
+def zero_negatives(input_file, output_file):
+    """
+    Converts all negative values to zero in sample columns
+
+    Args:
+        input_file: Input file with BFF subtracted (08_aligned_bff_subtracted.csv)
+        output_file: Output file with negatives zeroed (09_aligned_final.csv)
+    """
+    print(f"Reading file: {input_file}")
+    df, delimiter = read_table_auto(input_file, 'utf-8')
+
+    print(f"[INFO] File loaded: {len(df)} rows, {len(df.columns)} columns")
+
+    # Validate file structure
+    validate_dataframe(df, min_columns=2, script_name="Script 09")
+
+    df = zero_negatives_df(df)
+
     # Get decimal places from config
     decimal_places = get_decimal_places(OUTPUT_DIR)
 
     # Save to output file
     print(f"\n[INFO] Saving final file...")
     float_format = f'%.{decimal_places}f'
-    df.to_csv(output_file, sep=delimiter, encoding='utf-8', index=False, float_format=float_format)
+    save_table(df, output_file, delimiter, float_format)
 
     print(f"\n[OK] Final file created: {output_file}")
     print(f"[OK] Total rows: {len(df)}")
     print(f"[OK] Total columns: {len(df.columns)}")
-    print(f"[OK] Values converted to zero: {values_changed}")
     print(f"[INFO] All negative values have been replaced with 0")
 
 
 if __name__ == "__main__":
     # Input and output files
-    input_file = os.path.join(OUTPUT_DIR, "08_aligned_bff_subtracted.csv")
-    output_file = os.path.join(OUTPUT_DIR, "09_aligned_final.csv")
+    input_file = intermediate_path(os.path.join(OUTPUT_DIR, "08_aligned_bff_subtracted.csv"))
+    output_file = intermediate_path(os.path.join(OUTPUT_DIR, "09_aligned_final.csv"))
 
     print("="*70)
     print("SCRIPT 09: CONVERT NEGATIVE VALUES TO ZERO")
@@ -12,25 +12,21 @@ import pandas as pd
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config import OUTPUT_DIR
-from utils.csv_helper import read_csv_auto, validate_dataframe
+from utils.csv_helper import validate_dataframe
+from utils.table_io import intermediate_path, read_table_auto, save_table
+from utils.precision import sum_rows
 
 
-def add_qc_totals(input_file, output_file):
+def add_qc_totals_df(df):
     """
-    Adds QC_RCP_Total and Samples_Total columns
+    Adds QC_RCP_Total and Samples_Total columns to a DataFrame
 
     Args:
-        input_file: Input file (09_aligned_final.csv)
-        output_file: Output file with totals (10_aligned_with_qc_totals.csv)
-    """
-    print(f"Reading file: {input_file}")
-    df, delimiter = read_csv_auto(input_file, 'utf-8')
-
-    print(f"[INFO] File loaded: {len(df)} rows, {len(df.columns)} columns")
-
-    # Validate file structure
-    validate_dataframe(df, min_columns=2, script_name="Script 10")
+        df: DataFrame with negatives zeroed (step 09 result)
 
+    Returns:
+        The same DataFrame with both total columns added
+    """
     # Identify QC/RCP columns
     print(f"\n[INFO] Searching for QC and RCP columns...")
 
@@ -67,9 +63,9 @@ def add_qc_totals(input_file, output_file):
     print(f"\n[INFO] Calculating QC_RCP_Total (sum of QC/RCP columns)...")
 
     if len(qc_rcp_cols) > 0:
-        # Convert columns to numeric and sum
+        # Convert columns to numeric and sum (float32 intensities are summed in float64)
         qc_rcp_data = df[qc_rcp_cols].apply(pd.to_numeric, errors='coerce')
-        df['QC_RCP_Total'] = qc_rcp_data.sum(axis=1)
+        df['QC_RCP_Total'] = sum_rows(qc_rcp_data)
     else:
         # No QC/RCP columns - set to 0
         df['QC_RCP_Total'] = 0
@@ -78,9 +74,9 @@ def add_qc_totals(input_file, output_file):
     print(f"[INFO] Calculating Samples_Total (sum of sample columns)...")
 
     if len(sample_cols) > 0:
-        # Convert columns to numeric and sum
+        # Convert columns to numeric and sum (float32 intensities are summed in float64)
         sample_data = df[sample_cols].apply(pd.to_numeric, errors='coerce')
-        df['Samples_Total'] = sample_data.sum(axis=1)
+        df['Samples_Total'] = sum_rows(sample_data)
     else:
         print("[WARNING] No sample columns found!")
         df['Samples_Total'] = 0
@@ -96,21 +92,43 @@ def add_qc_totals(input_file, output_file):
     print(f"  - Rows where BOTH = 0: {both_zero_count} ({both_zero_count/len(df)*100:.1f}%)")
     print(f"  - Rows to be removed in next step: {qc_zero_count + samples_zero_count - both_zero_count}")
 
+    print(f"[OK] QC_RCP_Total range: {df['QC_RCP_Total'].min():.2f} to {df['QC_RCP_Total'].max():.2f}")
+    print(f"[OK] Samples_Total range: {df['Samples_Total'].min():.2f} to {df['Samples_Total'].max():.2f}")
+
+    return df
+
+
+def add_qc_totals(input_file, output_file):
+    """
+    Adds QC_RCP_Total and Samples_Total columns
+
+    Args:
+        input_file: Input file (09_aligned_final.csv)
+        output_file: Output file with totals (10_aligned_with_qc_totals.csv)
+    """
+    print(f"Reading file: {input_file}")
+    df, delimiter = read_table_auto(input_file, 'utf-8')
+
+    print(f"[INFO] File loaded: {len(df)} rows, {len(df.columns)} columns")
+
+    # Validate file structure
+    validate_dataframe(df, min_columns=2, script_name="Script 10")
+
+    df = add_qc_totals_df(df)
+
     # Save to output file
     print(f"\n[INFO] Saving file with QC totals...")
-    df.to_csv(output_file, sep=delimiter, encoding='utf-8', index=False)
+    save_table(df, output_file, delimiter)
 
     print(f"\n[OK] File with QC totals created: {output_file}")
     print(f"[OK] Total rows: {len(df)}")
     print(f"[OK] Total columns: {len(df.columns)}")
-    print(f"[OK] QC_RCP_Total range: {df['QC_RCP_Total'].min():.2f} to {df['QC_RCP_Total'].max():.2f}")
-    print(f"[OK] Samples_Total range: {df['Samples_Total'].min():.2f} to {df['Samples_Total'].max():.2f}")
 
 
 if __name__ == "__main__":
     # Input and output files
-    input_file = os.path.join(OUTPUT_DIR, "09_aligned_final.csv")
-    output_file = os.path.join(OUTPUT_DIR, "10_aligned_with_qc_totals.csv")
+    input_file = intermediate_path(os.path.join(OUTPUT_DIR, "09_aligned_final.csv"))
+    output_file = intermediate_path(os.path.join(OUTPUT_DIR, "10_aligned_with_qc_totals.csv"))
 
     print("="*70)
     print("SCRIPT 10: ADD QC/RCP AND SAMPLE TOTALS")
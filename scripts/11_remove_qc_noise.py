@@ -14,29 +14,24 @@ import pandas as pd
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config import OUTPUT_DIR
-from utils.csv_helper import read_csv_auto, validate_dataframe
+from utils.csv_helper import validate_dataframe
+from utils.table_io import intermediate_path, output_csv_path, read_table_auto
 
 
-def remove_qc_noise(input_file, output_file):
+def remove_qc_noise_df(df):
     """
-    Removes rows based on QC/RCP filtering logic
+    Removes rows based on QC/RCP filtering logic, then drops the total columns
 
     Deletion criteria:
     - QC_RCP_Total = 0 (not in controls = noise/contamination)
     - OR Samples_Total = 0 (not in samples = irrelevant)
 
     Args:
-        input_file: Input file with totals (10_aligned_with_qc_totals.csv)
-        output_file: Output filtered file (11_aligned_qc_filtered.csv)
-    """
-    print(f"Reading file with QC totals: {input_file}")
-    df, delimiter = read_csv_auto(input_file, 'utf-8')
-
-    print(f"[INFO] File loaded: {len(df)} rows, {len(df.columns)} columns")
-
-    # Validate file structure
-    validate_dataframe(df, min_columns=2, script_name="Script 11")
+        df: DataFrame with totals (step 10 result)
 
+    Returns:
+        Filtered DataFrame (new object, index reset)
+    """
     # Check if required columns exist
     if 'QC_RCP_Total' not in df.columns:
         print(f"[ERROR] 'QC_RCP_Total' column not found")
@@ -70,7 +65,7 @@ def remove_qc_noise(input_file, output_file):
     print(f"\n[INFO] Applying QC/RCP filter...")
     print(f"[INFO] Keeping rows where: QC_RCP_Total > 0 AND Samples_Total > 0")
 
-    df_filtered = df[(df['QC_RCP_Total'] > 0) & (df['Samples_Total'] > 0)].copy()
+    df_filtered = df[(df['QC_RCP_Total'] > 0) & (df['Samples_Total'] > 0)].reset_index(drop=True)
 
     # Count rows after filtering
     rows_after = len(df_filtered)
@@ -79,13 +74,39 @@ def remove_qc_noise(input_file, output_file):
     print(f"\n[INFO] Filtering results:")
     print(f"  - Rows BEFORE: {rows_before}")
     print(f"  - Rows AFTER: {rows_after}")
-    print(f"  - Rows REMOVED: {rows_removed} ({rows_removed/rows_before*100:.1f}%)")
-    print(f"  - Rows KEPT: {rows_after} ({rows_after/rows_before*100:.1f}%)")
+    if rows_before > 0:
+        print(f"  - Rows REMOVED: {rows_removed} ({rows_removed/rows_before*100:.1f}%)")
+        print(f"  - Rows KEPT: {rows_after} ({rows_after/rows_before*100:.1f}%)")
 
     # Remove the total columns from final output (optional - comment out if you want to keep them)
     print(f"\n[INFO] Removing QC_RCP_Total and Samples_Total columns from final output...")
     df_filtered = df_filtered.drop(columns=['QC_RCP_Total', 'Samples_Total'])
 
+    return df_filtered
+
+
+def remove_qc_noise(input_file, output_file):
+    """
+    Removes rows based on QC/RCP filtering logic
+
+    Deletion criteria:
+    - QC_RCP_Total = 0 (not in controls = noise/contamination)
+    - OR Samples_Total = 0 (not in samples = irrelevant)
+
+    Args:
+        input_file: Input file with totals (10_aligned_with_qc_totals.csv)
+        output_file: Output filtered file (11_aligned_qc_filtered.csv)
+    """
+    print(f"Reading file with QC totals: {input_file}")
+    df, delimiter = read_table_auto(input_file, 'utf-8')
+
+    print(f"[INFO] File loaded: {len(df)} rows, {len(df.columns)} columns")
+
+    # Validate file structure
+    validate_dataframe(df, min_columns=2, script_name="Script 11")
+
+    df_filtered = remove_qc_noise_df(df)
+
     # Save to output file
     print(f"[INFO] Saving filtered file...")
     df_filtered.to_csv(output_file, sep=delimiter, encoding='utf-8', index=False)
@@ -97,8 +118,8 @@ def remove_qc_noise(input_file, output_file):
 
 if __name__ == "__main__":
     # Input and output files
-    input_file = os.path.join(OUTPUT_DIR, "10_aligned_with_qc_totals.csv")
-    output_file = os.path.join(OUTPUT_DIR, "11_aligned_qc_filtered.csv")
+    input_file = intermediate_path(os.path.join(OUTPUT_DIR, "10_aligned_with_qc_totals.csv"))
+    output_file = output_csv_path(os.path.join(OUTPUT_DIR, "11_aligned_qc_filtered.csv"))
 
     print("="*70)
     print("SCRIPT 11: REMOVE QC/RCP NOISE")
@@ -14,26 +14,22 @@ import numpy as np
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config import OUTPUT_DIR
-from utils.csv_helper import read_csv_auto, validate_dataframe
+from utils.csv_helper import validate_dataframe
+from utils.table_io import intermediate_path, read_table_auto, save_table
 
 
-def apply_noise_threshold(input_file, noise_level):
+def apply_noise_threshold_df(df, noise_level):
     """
-    Applies noise threshold to all sample columns (except first column with labels)
+    Applies noise threshold to all sample columns of a DataFrame (except first column with labels)
     Values <= noise_level are set to 0
 
     Args:
-        input_file: Input file (04_aligned_filled.csv)
+        df: Aligned DataFrame (step 04 result)
         noise_level: Threshold value (float or int)
-    """
-    print(f"Reading file: {input_file}")
-    df, delimiter = read_csv_auto(input_file, 'utf-8')
-
-    print(f"[INFO] File loaded: {len(df)} rows, {len(df.columns)} columns")
-
-    # Validate file structure
-    validate_dataframe(df, min_columns=2, script_name="Noise Threshold Script")
 
+    Returns:
+        The same DataFrame with the threshold applied
+    """
     # First column is 'Aligned' (mass labels) - don't process it
     first_column = df.columns[0]
     columns_to_process = df.columns[1:].tolist()
@@ -80,21 +76,79 @@ def apply_noise_threshold(input_file, noise_level):
             print(f"[INFO] Processed {columns_to_process.index(col) + 1}/{len(columns_to_process)} columns...")
 
     print(f"[OK] Processed all {len(columns_to_process)} columns")
+    print(f"[OK] Values changed to 0: {values_changed}")
+
+    return df
+
+
+def apply_noise_threshold(input_file, noise_level):
+    """
+    Applies noise threshold to all sample columns (except first column with labels)
+    Values <= noise_level are set to 0
+
+    Args:
+        input_file: Input file (04_aligned_filled.csv)
+        noise_level: Threshold value (float or int)
+    """
+    print(f"Reading file: {input_file}")
+    df, delimiter = read_table_auto(input_file, 'utf-8')
+
+    print(f"[INFO] File loaded: {len(df)} rows, {len(df.columns)} columns")
+
+    # Validate file structure
+    validate_dataframe(df, min_columns=2, script_name="Noise Threshold Script")
+
+    df = apply_noise_threshold_df(df, noise_level)
 
     # Save back to the same file (OVERWRITE)
     print(f"\n[INFO] Saving file (OVERWRITING original)...")
-    df.to_csv(input_file, sep=delimiter, encoding='utf-8', index=False)
+    save_table(df, input_file, delimiter)
 
     print(f"\n[OK] File updated: {input_file}")
     print(f"[OK] Total rows: {len(df)}")
     print(f"[OK] Total columns: {len(df.columns)}")
-    print(f"[OK] Values changed to 0: {values_changed}")
     print(f"[INFO] Noise threshold applied successfully!")
 
 
+def get_noise_level():
+    """
+    Ask user for the noise threshold level
+    Returns the noise level as a float
+    """
+    print("Enter the noise threshold level:")
+    print("(All values <= this threshold will be set to 0)")
+
+    while True:
+        try:
+            noise_input = input("\nNoise level: ").strip()
+            noise_level = float(noise_input)
+
+            if noise_level < 0:
+                print("[ERROR] Noise level must be >= 0. Please try again.")
+                continue
+
+            return noise_level
+        except ValueError:
+            print("[ERROR] Invalid input. Please enter a number (e.g., 100, 500.5, 1000)")
+
+
+def ask_noise_level():
+    """
+    Ask user whether to apply the optional noise threshold (used by the pipeline runners)
+    Returns the noise level as a float, or None to skip it
+    """
+    while True:
+        answer = input("\nApply the optional noise threshold after Step 04? (y/n): ").strip().lower()
+        if answer == 'y':
+            return get_noise_level()
+        if answer == 'n':
+            return None
+        print("[ERROR] Please answer 'y' or 'n'.")
+
+
 if __name__ == "__main__":
     # Target file
-    target_file = os.path.join(OUTPUT_DIR, "04_aligned_filled.csv")
+    target_file = intermediate_path(os.path.join(OUTPUT_DIR, "04_aligned_filled.csv"))
 
     print("="*70)
     print("OPTIONAL SCRIPT: APPLY NOISE THRESHOLD")
@@ -112,21 +166,7 @@ if __name__ == "__main__":
             sys.exit(1)
 
         # Ask for noise level
-        print("Enter the noise threshold level:")
-        print("(All values <= this threshold will be set to 0)")
-
-        while True:
-            try:
-                noise_input = input("\nNoise level: ").strip()
-                noise_level = float(noise_input)
-
-                if noise_level < 0:
-                    print("[ERROR] Noise level must be >= 0. Please try again.")
-                    continue
-
-                break
-            except ValueError:
-                print("[ERROR] Invalid input. Please enter a number (e.g., 100, 500.5, 1000)")
+        noise_level = get_noise_level()
 
         print(f"\n[OK] Noise level set to: {noise_level}")
         print("\n" + "="*70 + "\n")
@@ -0,0 +1,89 @@
+"""
+Script: Batch Processing (Steps 01-11 for Many Raw Exports)
+Runs the full pipeline for every raw export in config.BATCH_INPUT (folder or glob pattern),
+several files at the same time, each one in its own folder inside config.BATCH_OUTPUT_DIR
+The input files are never modified and input/data.csv is not used
+"""
+import os
+import sys
+
+# Add root directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import (BATCH_INPUT, BATCH_OUTPUT_DIR, BATCH_WORKERS, PIPELINE_SAVE_STEPS, ALIGNED_BACKEND,
+                    DELIMITER)
+from utils.pipeline import load_step
+from utils.batch import find_input_files, run_batch, SUMMARY_FILE
+from utils.compression import check_input_compression
+from utils.table_io import check_output_settings
+
+
+if __name__ == "__main__":
+    print("="*70)
+    print("BATCH PROCESSING (STEPS 01-11 FOR EACH FILE)")
+    print("="*70)
+    print(f"Input: {BATCH_INPUT}")
+    print(f"Output directory: {BATCH_OUTPUT_DIR}")
+    print(f"Saved step outputs: {', '.join(PIPELINE_SAVE_STEPS)}")
+    print(f"Worker processes: {BATCH_WORKERS or os.cpu_count()}")
+    print("\nOperation: Run all steps for each file in its own output folder (input files are not modified)")
+    print("="*70)
+
+    input_files = find_input_files(BATCH_INPUT)
+    if not input_files:
+        print(f"\n[ERROR] No input files found: {BATCH_INPUT}")
+        print("[INFO] Place your raw exports (.csv/.txt) in the input/batch/ folder")
+        sys.exit(1)
+
+    try:
+        check_output_settings()
+        check_input_compression(input_files)
+    except (ValueError, ImportError) as e:
+        print(f"\n[ERROR] {str(e)}")
+        sys.exit(1)
+
+    print(f"\n[INFO] {len(input_files)} input files found:")
+    for input_file in input_files:
+        print(f"  - {os.path.basename(input_file)}")
+
+    try:
+        # Ask for all parameters up front - the same values are used for every file
+        decimal_places = load_step('02_round_mass').get_decimal_places()
+        noise_level = load_step('noise_threshold').ask_noise_level()
+        threshold = load_step('07_calculate_bff').get_threshold()
+
+        print("\n" + "="*70)
+        print("PROCESSING...")
+        print("="*70)
+
+        df_summary = run_batch(input_files, BATCH_OUTPUT_DIR, decimal_places, threshold,
+                               noise_level=noise_level, save_steps=PIPELINE_SAVE_STEPS,
+                               backend=ALIGNED_BACKEND, max_workers=BATCH_WORKERS, delimiter=DELIMITER)
+
+        failed = df_summary[df_summary['status'] != 'ok']
+
+        print("\n" + "="*70)
+        print("BATCH SUMMARY")
+        print("="*70)
+        print(df_summary[['input_file', 'status', 'final_rows', 'seconds']].assign(
+            input_file=df_summary['input_file'].map(os.path.basename)).to_string(index=False))
+
+        print("\n" + "="*70)
+        if len(failed) == 0:
+            print("[OK] PROCESSING COMPLETED SUCCESSFULLY!")
+        else:
+            print(f"[ERROR] {len(failed)} of {len(df_summary)} files failed (see pipeline.log in their folders)")
+        print(f"[INFO] Results and {SUMMARY_FILE} saved in {BATCH_OUTPUT_DIR}")
+        print("="*70)
+
+        if len(failed) > 0:
+            sys.exit(1)
+
+    except KeyboardInterrupt:
+        print("\n\n[INFO] Operation cancelled by user")
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n[ERROR] {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
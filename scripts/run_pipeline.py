@@ -0,0 +1,70 @@
+"""
+Script: Run Full Pipeline (Steps 01-11)
+Runs all steps in a single process, keeping the data in memory between steps
+Only the step outputs listed in config.PIPELINE_SAVE_STEPS are written to OUTPUT
+"""
+import os
+import sys
+
+# Add root directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import (INPUT_FILE, OUTPUT_DIR, PIPELINE_SAVE_STEPS, ALIGNED_BACKEND, STAGE_CACHE,
+                    INPUT_CACHE, ROW_WORKERS, INTENSITY_DTYPE, PRECISION_REPORT)
+from utils.pipeline import load_step, run_pipeline
+from utils.compression import check_input_compression
+from utils.table_io import check_output_settings
+
+
+if __name__ == "__main__":
+    print("="*70)
+    print("RUN FULL PIPELINE (STEPS 01-11)")
+    print("="*70)
+    print(f"Input: {INPUT_FILE}")
+    print(f"Output directory: {OUTPUT_DIR}")
+    print(f"Saved step outputs: {', '.join(PIPELINE_SAVE_STEPS)}")
+    print(f"Aligned table backend: {ALIGNED_BACKEND}")
+    print(f"Stage cache: {'on' if STAGE_CACHE else 'off'}")
+    print("\nOperation: Run all steps in memory (input file is not modified)")
+    print("="*70)
+
+    if not os.path.exists(INPUT_FILE):
+        print(f"\n[ERROR] Input file not found: {INPUT_FILE}")
+        print("[INFO] Place your raw export in the input/ folder as data.csv")
+        sys.exit(1)
+
+    try:
+        check_output_settings()
+        check_input_compression([INPUT_FILE])
+    except (ValueError, ImportError) as e:
+        print(f"\n[ERROR] {str(e)}")
+        sys.exit(1)
+
+    try:
+        # Ask for all parameters up front so the run is not interrupted
+        decimal_places = load_step('02_round_mass').get_decimal_places()
+        noise_level = load_step('noise_threshold').ask_noise_level()
+        threshold = load_step('07_calculate_bff').get_threshold()
+
+        print("\n" + "="*70)
+        print("PROCESSING...")
+        print("="*70)
+
+        run_pipeline(INPUT_FILE, OUTPUT_DIR, decimal_places, threshold,
+                     noise_level=noise_level, save_steps=PIPELINE_SAVE_STEPS, backend=ALIGNED_BACKEND,
+                     cache=STAGE_CACHE, use_input_cache=INPUT_CACHE, workers=ROW_WORKERS,
+                     intensity_dtype=INTENSITY_DTYPE, precision_report=PRECISION_REPORT)
+
+        print("\n" + "="*70)
+        print("[OK] PROCESSING COMPLETED SUCCESSFULLY!")
+        print("[INFO] Final file: 11_aligned_qc_filtered.csv")
+        print("="*70)
+
+    except KeyboardInterrupt:
+        print("\n\n[INFO] Operation cancelled by user")
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n[ERROR] {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
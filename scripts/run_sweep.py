@@ -0,0 +1,94 @@
+"""
+Script: Parameter Sweep (Decimal Places x BFF Threshold)
+Runs Steps 01-11 for every combination of the given decimal places and BFF thresholds,
+sharing the common work (parsing once, aligning once per precision, Blank statistics once)
+Results are written to OUTPUT/sweep, with a summary of the rows kept after Steps 06 and 11
+"""
+import os
+import sys
+
+# Add root directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import INPUT_FILE, OUTPUT_DIR, INPUT_CACHE
+from utils.pipeline import load_step
+from utils.sweep import run_sweep, SWEEP_DIR_NAME, SUMMARY_FILE
+from utils.compression import check_input_compression
+from utils.table_io import check_output_settings
+
+
+def ask_number_list(prompt, cast, minimum):
+    """
+    Ask user for a comma separated list of numbers
+    Returns the list of values (duplicates removed, order kept)
+    """
+    while True:
+        answer = input(prompt).strip()
+        try:
+            values = []
+            for item in answer.replace(';', ',').split(','):
+                if item.strip():
+                    value = cast(item.strip())
+                    if value < minimum:
+                        raise ValueError(item)
+                    if value not in values:
+                        values.append(value)
+
+            if values:
+                return values
+            print("[ERROR] Please enter at least one value.")
+        except ValueError:
+            print(f"[ERROR] Invalid list. Please enter numbers >= {minimum} separated by commas (e.g. 2, 3, 4).")
+
+
+if __name__ == "__main__":
+    print("="*70)
+    print("PARAMETER SWEEP (DECIMAL PLACES x BFF THRESHOLD)")
+    print("="*70)
+    print(f"Input: {INPUT_FILE}")
+    print(f"Output directory: {os.path.join(OUTPUT_DIR, SWEEP_DIR_NAME)}")
+    print("\nOperation: Run Steps 01-11 for every combination (input file is not modified)")
+    print("="*70)
+
+    if not os.path.exists(INPUT_FILE):
+        print(f"\n[ERROR] Input file not found: {INPUT_FILE}")
+        print("[INFO] Place your raw export in the input/ folder as data.csv")
+        sys.exit(1)
+
+    try:
+        check_output_settings()
+        check_input_compression([INPUT_FILE])
+    except (ValueError, ImportError) as e:
+        print(f"\n[ERROR] {str(e)}")
+        sys.exit(1)
+
+    try:
+        decimal_places_list = ask_number_list("\nDecimal places to try (e.g. 2, 3, 4): ", int, 0)
+        noise_level = load_step('noise_threshold').ask_noise_level()
+        thresholds = ask_number_list("\nBFF thresholds to try (e.g. 3, 5, 10): ", float, 0)
+
+        print("\n" + "="*70)
+        print(f"PROCESSING {len(decimal_places_list) * len(thresholds)} COMBINATIONS...")
+        print("="*70)
+
+        df_summary = run_sweep(INPUT_FILE, OUTPUT_DIR, decimal_places_list, thresholds, noise_level=noise_level,
+                               use_input_cache=INPUT_CACHE)
+
+        print("\n" + "="*70)
+        print("SWEEP SUMMARY")
+        print("="*70)
+        print(df_summary.drop(columns=['output_file']).to_string(index=False))
+
+        print("\n" + "="*70)
+        print("[OK] PROCESSING COMPLETED SUCCESSFULLY!")
+        print(f"[INFO] Final tables and {SUMMARY_FILE} saved in {os.path.join(OUTPUT_DIR, SWEEP_DIR_NAME)}")
+        print("="*70)
+
+    except KeyboardInterrupt:
+        print("\n\n[INFO] Operation cancelled by user")
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n[ERROR] {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
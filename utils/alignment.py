@@ -0,0 +1,366 @@
+"""
+Alignment helpers for steps 03-04
+Masses are handled as fixed-point integer keys (mass x 10^decimal_places), so unique,
+sort and join run on int64 arrays; the intensities of each sample are placed into the
+aligned mass table by index lookup. Samples do not depend on each other, so their column
+pairs can be handled by several threads (the NumPy and pandas kernels release the GIL)
+"""
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+# Add root directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.csv_helper import to_numeric_column
+
+
+def mass_keys(masses, decimal_places):
+    """
+    Converts masses to fixed-point integer keys: round(mass x 10^decimal_places)
+
+    Two masses get the same key when they are equal after rounding to decimal_places
+    (same rounding as pandas/numpy round), whatever their float representation
+
+    Args:
+        masses: 1D array of masses (without NaN)
+        decimal_places: Number of decimal places (from .decimal_config)
+
+    Returns:
+        int64 array of keys
+    """
+    scaled = np.asarray(masses, dtype=np.float64) * (10.0 ** decimal_places)
+
+    # Keys must stay exact integers in float64 before the conversion
+    if len(scaled) > 0 and np.max(np.abs(scaled)) >= 2 ** 53:
+        raise ValueError(f"Masses are too large for {decimal_places} decimal places "
+                         f"(fixed-point keys would lose precision)")
+
+    return np.rint(scaled).astype(np.int64)
+
+
+def keys_to_masses(keys, decimal_places):
+    """
+    Converts fixed-point integer keys back to float masses (used when writing output)
+
+    Args:
+        keys: int64 array of keys (see mass_keys)
+        decimal_places: Number of decimal places used for the keys
+
+    Returns:
+        float64 array of masses, identical to rounding the original masses
+    """
+    return np.asarray(keys, dtype=np.float64) / (10.0 ** decimal_places)
+
+
+def aligned_sorter(aligned):
+    """
+    Returns the argsort needed to binary search the aligned masses,
+    or None when they are already sorted ascending (the normal step 03 output)
+
+    Args:
+        aligned: 1D array of aligned masses or mass keys
+
+    Returns:
+        None or int array usable as the sorter argument of np.searchsorted
+    """
+    aligned = np.asarray(aligned)
+    if len(aligned) < 2 or np.all(aligned[1:] >= aligned[:-1]):
+        return None
+    return np.argsort(aligned, kind='stable')
+
+
+def locate_masses(aligned, masses, sorter=None):
+    """
+    Finds the aligned row of each mass by binary search (exact match)
+
+    Args:
+        aligned: 1D array of aligned mass keys (or masses)
+        masses: 1D array of mass keys (or masses) to look up, same type as aligned
+        sorter: Optional argsort of aligned (see aligned_sorter)
+
+    Returns:
+        int64 array with the aligned row of each mass, -1 where the mass is not in the list
+    """
+    aligned = np.asarray(aligned)
+    masses = np.asarray(masses)
+
+    if len(aligned) == 0:
+        return np.full(len(masses), -1, dtype=np.int64)
+
+    positions = np.searchsorted(aligned, masses, sorter=sorter)
+    positions = np.minimum(positions, len(aligned) - 1)
+    rows = positions if sorter is None else sorter[positions]
+
+    return np.where(aligned[rows] == masses, rows, -1).astype(np.int64)
+
+
+def scatter_column(matrix, column, rows, values):
+    """
+    Writes the values of one sample into its column of the aligned matrix
+
+    Args:
+        matrix: 2D float array (masses x samples), modified in place
+        column: Column index of the sample
+        rows: Aligned row of each value (see locate_masses, -1 = not in the list)
+        values: Intensity values
+
+    Returns:
+        Number of values placed
+    """
+    found = rows >= 0
+    matrix[rows[found], column] = np.asarray(values, dtype=np.float64)[found]
+    return int(found.sum())
+
+
+def map_samples(function, items, workers=1):
+    """
+    Calls function on each item on a thread pool and yields the results in item order
+    (an exception is raised when the result of its item is reached, as in a plain loop)
+
+    Args:
+        function: Function of one item (must only write to data owned by its item)
+        items: List of items, e.g. one per sample
+        workers: Number of threads (None = number of CPU cores, 1 = run in this thread)
+
+    Yields:
+        Result of each item
+    """
+    workers = min(workers or os.cpu_count() or 1, len(items))
+    if workers <= 1:
+        for item in items:
+            yield function(item)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(function, items)
+
+
+def collect_sample_triplets(df_data, decimal_places, workers=1):
+    """
+    Parses each Mass/Intensity column pair once and collects the aligned mass list
+    plus one (mass_index, sample_index, intensity) triplet per valid pair
+
+    Args:
+        df_data: DataFrame with rounded Mass/Intensity column pairs (step 02 result)
+        decimal_places: Number of decimal places (from .decimal_config)
+        workers: Number of threads parsing the column pairs (see map_samples)
+
+    Returns:
+        Tuple (sorted_keys, sample_headers, mass_index, sample_index, values),
+        or None if no numeric mass values were found
+    """
+    print(f"[INFO] Reading Mass/Intensity column pairs (single pass)...")
+
+    def parse_pair(item):
+        col_idx, sample_index, mass_column, intensity_column = item
+
+        # Skip empty columns
+        if mass_column.isna().all():
+            return None, None, None
+
+        masses = to_numeric_column(mass_column)
+        valid_masses = ~np.isnan(masses)
+        unique_keys = np.unique(mass_keys(masses[valid_masses], decimal_places))
+
+        if intensity_column is None:
+            return unique_keys, None, (f"[SKIP] Column {col_idx + 1} ({mass_column.name}) "
+                                       f"- no corresponding intensity column")
+
+        # Only pairs with both a valid mass and a valid intensity are summed
+        intensities = to_numeric_column(intensity_column)
+        valid = valid_masses & ~np.isnan(intensities)
+        triplets = (mass_keys(masses[valid], decimal_places), np.full(valid.sum(), sample_index, dtype=np.int64),
+                    intensities[valid])
+
+        return unique_keys, triplets, f"[OK] Sample {sample_index + 1} ({mass_column.name}) - {valid.sum()} values"
+
+    # Columns are taken from the DataFrame here, the threads only read their own pair
+    sample_headers = []
+    pairs = []
+    for col_idx in range(0, len(df_data.columns), 2):
+        mass_col_name = df_data.columns[col_idx]
+        intensity_column = df_data[df_data.columns[col_idx + 1]] if col_idx + 1 < len(df_data.columns) else None
+        pairs.append((col_idx, len(sample_headers), df_data[mass_col_name], intensity_column))
+        sample_headers.append(mass_col_name)
+
+    column_keys = []  # Unique mass keys of each sample (aligned mass list, step 03)
+    sample_keys = []  # Triplets of each sample: keys, sample index, intensities (step 04)
+    sample_indexes = []
+    sample_values = []
+
+    for unique_keys, triplets, message in map_samples(parse_pair, pairs, workers):
+        if unique_keys is not None:
+            column_keys.append(unique_keys)
+        if triplets is not None:
+            sample_keys.append(triplets[0])
+            sample_indexes.append(triplets[1])
+            sample_values.append(triplets[2])
+        if message is not None:
+            print(message)
+
+    # Sorted unique mass keys of all samples
+    sorted_keys = np.unique(np.concatenate(column_keys)) if column_keys else np.array([], dtype=np.int64)
+
+    print(f"\n[INFO] Total unique mass values collected: {len(sorted_keys)}")
+    print(f"[INFO] Total sample headers collected: {len(sample_headers)}")
+
+    if len(sorted_keys) == 0:
+        print("[ERROR] No numeric mass values found!")
+        return None
+
+    # Every key is in the aligned list, so searchsorted finds it exactly
+    if sample_keys:
+        mass_index = np.searchsorted(sorted_keys, np.concatenate(sample_keys))
+        sample_index = np.concatenate(sample_indexes)
+        values = np.concatenate(sample_values)
+    else:
+        mass_index = sample_index = np.array([], dtype=np.int64)
+        values = np.array([], dtype=np.float64)
+
+    return sorted_keys, sample_headers, mass_index, sample_index, values
+
+
+def sum_duplicates(index, values):
+    """
+    Sums the values that share an index (scatter-add with np.bincount), with the same
+    result as pandas groupby(index).sum(): NaN values are dropped, and the values of an
+    index are added in input order with the same compensated (Kahan) summation
+
+    np.bincount adds the values of a bin in input order starting from 0.0, which gives the
+    compensated result for bins with one or two values; bins with more values are summed
+    again with the compensation, one value rank at a time for all of them
+
+    Args:
+        index: 1D int array (e.g. aligned mass rows, or flat cells, see sum_at)
+        values: 1D float array, same length
+
+    Returns:
+        Tuple (indexes, sums): sorted unique indexes and the sum of each one
+        (indexes whose values are all NaN are left out)
+    """
+    index = np.asarray(index, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    if not valid.all():
+        index, values = index[valid], values[valid]
+
+    # Stable sort (skipped when the index is already sorted, e.g. the masses of one sample):
+    # the values of an index stay in input order
+    if len(index) > 1 and np.any(index[1:] < index[:-1]):
+        order = np.argsort(index, kind='stable')
+        index, values = index[order], values[order]
+
+    first = np.empty(len(index), dtype=bool)
+    first[:1] = True
+    np.not_equal(index[1:], index[:-1], out=first[1:])
+    starts = np.flatnonzero(first)
+    indexes = index[starts]
+    counts = np.diff(np.append(starts, len(index)))
+    sums = np.bincount(np.cumsum(first) - 1, weights=values, minlength=len(starts))
+
+    many = np.flatnonzero(counts > 2)
+    if len(many):
+        # Rank k of the values of index i is at starts[i] + k
+        total = np.zeros(len(many))
+        compensation = np.zeros(len(many))
+        with np.errstate(invalid='ignore'):
+            for k in range(int(counts[many].max())):
+                active = np.flatnonzero(counts[many] > k)
+                y = values[starts[many[active]] + k] - compensation[active]
+                t = total[active] + y
+                step = (t - total[active]) - y
+                # A +/-inf value gives a NaN compensation, which would turn the sum into NaN
+                step[np.isnan(step)] = 0.0
+                compensation[active] = step
+                total[active] = t
+        sums[many] = total
+
+    return indexes, sums
+
+
+def sum_at(index, values, shape):
+    """
+    Dense version of sum_duplicates: sums the values into an array of the given shape
+
+    Args:
+        index: 1D positions, or tuple of index arrays (one per dimension, e.g.
+               (mass_index, sample_index) to fill all the samples at once)
+        values: Float values
+        shape: Length or shape of the result
+
+    Returns:
+        float64 array (0 where no value fell)
+    """
+    shape = (shape,) if np.ndim(shape) == 0 else tuple(shape)
+    if isinstance(index, tuple):
+        index = np.ravel_multi_index(index, shape)
+
+    result = np.zeros(shape, dtype=np.float64)
+    cells, sums = sum_duplicates(index, values)
+    result.reshape(-1)[cells] = sums
+    return result
+
+
+def sum_triplets(mass_index, sample_index, values, n_samples):
+    """
+    Sums the intensities of triplets that fall in the same (mass, sample) cell
+
+    Duplicates are summed like the per-sample groupby('Mass').sum() of step 04
+    (see sum_duplicates), so the values are identical
+
+    Args:
+        mass_index: Aligned row of each value
+        sample_index: Sample column of each value
+        values: Intensity values
+        n_samples: Number of sample columns
+
+    Returns:
+        Tuple (cells, sums): flat cell index (row * n_samples + column) and sum of each cell
+    """
+    mass_index = np.asarray(mass_index, dtype=np.int64)
+    n_rows = int(mass_index.max()) + 1 if len(mass_index) else 1
+
+    # Sample-major cells are already sorted when the triplets come sample by sample
+    # with ascending masses (the usual export), so sum_duplicates does not sort them
+    cells, sums = sum_duplicates(np.asarray(sample_index, dtype=np.int64) * n_rows + mass_index, values)
+    return (cells % n_rows) * n_samples + cells // n_rows, sums
+
+
+def align_samples(df_data, decimal_places, workers=1):
+    """
+    Single-pass alignment: builds the filled aligned table (step 04 result) directly
+    from the Mass/Intensity column pairs, without the empty 03_aligned table
+
+    Each column pair is parsed once and turned into (mass_index, sample_index, intensity)
+    triplets, which are summed into the (masses x samples) matrix. Duplicate masses of a
+    sample are summed, like the groupby('Mass').sum() of step 04
+
+    Args:
+        df_data: DataFrame with rounded Mass/Intensity column pairs (step 02 result)
+        decimal_places: Number of decimal places (from .decimal_config)
+        workers: Number of threads parsing the column pairs (see map_samples)
+
+    Returns:
+        Filled aligned DataFrame ('Aligned' + one column per sample, empty cells = 0),
+        or None if no numeric mass values were found
+    """
+    collected = collect_sample_triplets(df_data, decimal_places, workers)
+    if collected is None:
+        return None
+    sorted_keys, sample_headers, mass_index, sample_index, values = collected
+
+    print(f"[INFO] Building aligned matrix...")
+    matrix = np.zeros((len(sorted_keys), len(sample_headers)), dtype=np.float64)
+    cells, sums = sum_triplets(mass_index, sample_index, values, len(sample_headers))
+    matrix.flat[cells] = sums
+
+    df_aligned = pd.DataFrame(matrix, columns=sample_headers)
+    df_aligned.insert(0, 'Aligned', keys_to_masses(sorted_keys, decimal_places))
+
+    print(f"[OK] Total distinct masses: {len(df_aligned)}")
+    print(f"[OK] Total sample columns: {len(sample_headers)}")
+
+    return df_aligned
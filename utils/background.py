@@ -0,0 +1,124 @@
+"""
+Fused background correction (optional noise threshold + steps 05-09)
+Runs the row-wise operations of the noise threshold script and steps 05 to 09
+in a single pass over a preallocated float buffer, one block of rows at a time
+"""
+import os
+import sys
+import numpy as np
+
+# Add root directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import CHUNK_SIZE
+from utils.csv_helper import round_as_written
+from utils.bff import find_blank_columns, find_subtract_columns, compute_bff
+
+
+def apply_noise(values, noise_level):
+    """
+    Sets values <= noise_level to 0 in place (same rule as noise_threshold.py,
+    where non-numeric/NaN cells also become 0)
+
+    Args:
+        values: Float array (modified in place)
+        noise_level: Threshold value
+    """
+    values[~(values > noise_level)] = 0
+
+
+def correct_background(values, columns, threshold=None, bff=None, noise_level=None,
+                       decimal_places=None, keep_subtracted=False, chunk_size=CHUNK_SIZE, dtype=np.float64):
+    """
+    Fused background correction of the filled aligned table (step 04 result)
+
+    For each block of rows, in a preallocated float buffer:
+    noise threshold -> Total > 0 filter (05/06) -> BFF (07) -> subtract BFF (08) -> negatives to zero (09)
+
+    Args:
+        values: 2D array (rows x sample columns), the aligned table without the 'Aligned' column
+        columns: Sample column names (used to find the Blank and subtract columns)
+        threshold: BFF threshold multiplier (required when bff is not given)
+        bff: Optional precomputed BFF for each input row. It must come from the
+             noise-thresholded Blank values, as step 07 does in the file-based chain
+        noise_level: Optional noise threshold (None = skip)
+        decimal_places: Round values between steps like the scripts' float_format (None = no rounding)
+        keep_subtracted: Also return the step 08 values (before negatives are zeroed), for auditing
+        chunk_size: Number of rows processed per block
+        dtype: Storage type of the result (float64 or float32, see utils.precision).
+               Each block is always computed in float64
+
+    Returns:
+        Tuple (result, bff, keep, subtracted):
+        - result: step 09 values for the kept rows (array of the storage type)
+        - bff: BFF of the kept rows
+        - keep: Boolean mask of the input rows kept by the Total > 0 filter (step 06)
+        - subtracted: step 08 values for the kept rows, or None
+    """
+    columns = list(columns)
+    blank_idx = [columns.index(col) for col in find_blank_columns(columns)]
+    subtract_mask = np.isin(np.arange(len(columns)), [columns.index(col) for col in find_subtract_columns(columns)])
+
+    if bff is None:
+        if threshold is None:
+            raise ValueError("Either threshold or a precomputed bff vector is required")
+        if len(blank_idx) == 0:
+            raise ValueError("No columns with 'Blank' found (excluding 'BlankExt')")
+    else:
+        bff = np.asarray(bff, dtype=np.float64)
+
+    n_rows = len(values)
+
+    # Preallocated output buffers (trimmed to the kept rows at the end)
+    result = np.empty((n_rows, len(columns)), dtype=dtype)
+    bff_out = np.empty(n_rows, dtype=np.float64)
+    subtracted = np.empty((n_rows, len(columns)), dtype=dtype) if keep_subtracted else None
+    keep = np.zeros(n_rows, dtype=bool)
+    rows_kept = 0
+
+    for start in range(0, n_rows, chunk_size):
+        stop = min(start + chunk_size, n_rows)
+        block = np.array(values[start:stop], dtype=np.float64)
+
+        # Optional noise threshold
+        if noise_level is not None:
+            apply_noise(block, noise_level)
+
+        # Steps 05/06: keep rows with Total > 0
+        total = block.sum(axis=1)
+        if decimal_places is not None:
+            total = round_as_written(total, decimal_places)
+        block_keep = total > 0
+        keep[start:stop] = block_keep
+        block = block[block_keep]
+
+        # Step 07: BFF from the Blank columns
+        if bff is None:
+            block_bff = compute_bff(block[:, blank_idx], threshold)
+        else:
+            block_bff = bff[start:stop][block_keep]
+        if decimal_places is not None:
+            block_bff = round_as_written(block_bff, decimal_places)
+
+        # Step 08: subtract BFF from the sample columns (rows with NaN BFF untouched)
+        valid_rows = ~np.isnan(block_bff)
+        np.subtract(block, block_bff[:, np.newaxis], out=block,
+                    where=valid_rows[:, np.newaxis] & subtract_mask)
+        if decimal_places is not None:
+            block = round_as_written(block, decimal_places)
+
+        end = rows_kept + len(block)
+        if subtracted is not None:
+            subtracted[rows_kept:end] = block
+
+        # Step 09: negatives to zero
+        block[block < 0] = 0
+
+        result[rows_kept:end] = block
+        bff_out[rows_kept:end] = block_bff
+        rows_kept = end
+
+    if subtracted is not None:
+        subtracted = subtracted[:rows_kept]
+
+    return result[:rows_kept], bff_out[:rows_kept], keep, subtracted
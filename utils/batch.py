@@ -0,0 +1,171 @@
+"""
+Batch processing of many raw exports
+Each input file runs the full in-memory pipeline in its own output folder (the input
+files are never modified), in parallel worker processes. Each worker writes its
+messages to a log file in its folder, and a summary lists the result of every file
+"""
+import contextlib
+import glob
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+
+# Add root directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.compression import strip_compression
+from utils.pipeline import run_pipeline
+
+INPUT_EXTENSIONS = ('.csv', '.txt', '.csv.gz', '.txt.gz', '.csv.xz', '.txt.xz', '.csv.zst', '.txt.zst')
+LOG_FILE = "pipeline.log"
+SUMMARY_FILE = "batch_summary.csv"
+
+
+def find_input_files(source):
+    """
+    Lists the raw exports to process
+
+    Args:
+        source: Directory (all .csv/.txt files inside, also compressed: .csv.gz, .csv.xz, .csv.zst),
+                glob pattern (e.g. 'exports/*.csv') or single file
+
+    Returns:
+        Sorted list of file paths
+    """
+    if os.path.isdir(source):
+        files = [os.path.join(source, name) for name in os.listdir(source)
+                 if name.lower().endswith(INPUT_EXTENSIONS)]
+    else:
+        files = glob.glob(source)
+
+    return sorted(path for path in files if os.path.isfile(path))
+
+
+def output_folders(input_files, output_dir):
+    """
+    Assigns one output folder per input file, named after the file
+    (a number is added when two files have the same name)
+
+    Args:
+        input_files: List of input file paths
+        output_dir: Parent output directory
+
+    Returns:
+        List of folder paths, in the same order as input_files
+    """
+    folders = []
+    used = set()
+    for path in input_files:
+        name = os.path.splitext(strip_compression(os.path.basename(path)))[0]
+        candidate, n = name, 2
+        while candidate.lower() in used:
+            candidate = f"{name}_{n}"
+            n += 1
+        used.add(candidate.lower())
+        folders.append(os.path.join(output_dir, candidate))
+
+    return folders
+
+
+def process_input_file(input_file, output_dir, decimal_places, threshold, noise_level=None,
+                       save_steps=('11',), backend='dense'):
+    """
+    Runs the pipeline for one input file (executed in a worker process)
+
+    All messages of the run go to output_dir/pipeline.log
+
+    Args:
+        input_file: Raw input file
+        output_dir: Output folder of this file
+        decimal_places: Number of decimal places (step 02)
+        threshold: BFF threshold multiplier (step 07)
+        noise_level: Optional noise threshold (None = skip)
+        save_steps: Step ids to save
+        backend: Aligned table backend (see utils.pipeline.run_pipeline)
+
+    Returns:
+        Dictionary with input_file, output_dir, status ('ok' or 'failed'), final_rows, seconds and error
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    result = {'input_file': input_file, 'output_dir': output_dir, 'status': 'ok',
+              'final_rows': None, 'seconds': None, 'error': ''}
+
+    start = time.perf_counter()
+    with open(os.path.join(output_dir, LOG_FILE), 'w', encoding='utf-8') as log:
+        with contextlib.redirect_stdout(log):
+            try:
+                print(f"Input: {input_file}")
+                df = run_pipeline(input_file, output_dir, decimal_places, threshold,
+                                  noise_level=noise_level, save_steps=save_steps, backend=backend)
+                if df is not None:
+                    result['final_rows'] = len(df)
+            except Exception as e:
+                result['status'] = 'failed'
+                result['error'] = f"{type(e).__name__}: {e}"
+                traceback.print_exc(file=log)
+
+    result['seconds'] = round(time.perf_counter() - start, 2)
+    return result
+
+
+def run_batch(input_files, output_dir, decimal_places, threshold, noise_level=None, save_steps=('11',),
+              backend='dense', max_workers=None, delimiter=';'):
+    """
+    Runs the pipeline for every input file on a pool of worker processes
+
+    Args:
+        input_files: List of raw input files (see find_input_files)
+        output_dir: Parent output directory (one folder per input file is created inside)
+        decimal_places: Number of decimal places (step 02)
+        threshold: BFF threshold multiplier (step 07)
+        noise_level: Optional noise threshold (None = skip)
+        save_steps: Step ids to save for each file
+        backend: Aligned table backend (see utils.pipeline.run_pipeline)
+        max_workers: Number of worker processes (None = number of CPU cores)
+        delimiter: Delimiter of the summary CSV
+
+    Returns:
+        Summary DataFrame with one row per input file (same order as input_files)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    folders = output_folders(input_files, output_dir)
+    max_workers = max_workers or os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(input_files)))
+
+    print(f"[INFO] Processing {len(input_files)} files with {max_workers} worker process(es)")
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(process_input_file, input_file, folder, decimal_places, threshold,
+                            noise_level, tuple(save_steps), backend): input_file
+            for input_file, folder in zip(input_files, folders)
+        }
+        for future in as_completed(futures):
+            input_file = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # The worker process itself failed (e.g. out of memory)
+                result = {'input_file': input_file, 'output_dir': folders[input_files.index(input_file)],
+                          'status': 'failed', 'final_rows': None, 'seconds': None,
+                          'error': f"{type(e).__name__}: {e}"}
+            results[input_file] = result
+
+            if result['status'] == 'ok':
+                rows = f"{result['final_rows']} rows, " if result['final_rows'] is not None else ""
+                print(f"[OK] {os.path.basename(input_file)} ({rows}{result['seconds']} s)")
+            else:
+                print(f"[ERROR] {os.path.basename(input_file)} - {result['error']}")
+                print(f"        See {os.path.join(result['output_dir'], LOG_FILE)}")
+
+    df_summary = pd.DataFrame([results[input_file] for input_file in input_files])
+    df_summary['final_rows'] = df_summary['final_rows'].astype('Int64')
+    summary_file = os.path.join(output_dir, SUMMARY_FILE)
+    df_summary.to_csv(summary_file, sep=delimiter, encoding='utf-8', index=False)
+    print(f"\n[OK] Batch summary saved: {summary_file}")
+
+    return df_summary
@@ -0,0 +1,203 @@
+"""
+Vectorized BFF (Background Filter Factor) functions
+Work on the whole Blank column block at once instead of row by row
+"""
+import numpy as np
+import pandas as pd
+
+
+def find_blank_columns(columns):
+    """
+    Finds the columns used for BFF: containing "Blank" but not "BlankExt" (case insensitive)
+
+    Args:
+        columns: Column names (e.g. df.columns)
+
+    Returns:
+        List of Blank column names, in their original order
+    """
+    blank_cols = []
+    for col in columns:
+        col_str = str(col).lower()
+        if 'blank' in col_str and 'blankext' not in col_str:
+            blank_cols.append(col)
+
+    return blank_cols
+
+
+def find_subtract_columns(columns):
+    """
+    Finds the sample columns BFF is subtracted from:
+    all columns except 'Aligned', 'BFF' and any "Blank" column (including "BlankExt")
+
+    Args:
+        columns: Column names (e.g. df.columns)
+
+    Returns:
+        List of column names, in their original order
+    """
+    subtract_cols = []
+    for col in columns:
+        col_str = str(col).lower()
+        if col not in ['Aligned', 'BFF'] and 'blank' not in col_str:
+            subtract_cols.append(col)
+
+    return subtract_cols
+
+
+def find_qc_columns(columns):
+    """
+    Splits the columns like step 10: columns containing "QC" or "RCP" (case insensitive)
+    and all other sample columns ('Aligned' and 'BFF' are skipped)
+
+    Args:
+        columns: Column names (e.g. df.columns)
+
+    Returns:
+        Tuple (qc_rcp_cols, sample_cols) of column name lists, in their original order
+    """
+    qc_rcp_cols = []
+    sample_cols = []
+    for col in columns:
+        if col in ['Aligned', 'BFF']:
+            continue
+        col_str = str(col).upper()
+        if 'QC' in col_str or 'RCP' in col_str:
+            qc_rcp_cols.append(col)
+        else:
+            sample_cols.append(col)
+
+    return qc_rcp_cols, sample_cols
+
+
+def numeric_values(series):
+    """
+    Converts a column to a float64 array
+
+    Non-numeric cells (e.g. text left in an object column) become NaN,
+    the same values the row-by-row calculations used to ignore
+
+    Args:
+        series: DataFrame column
+
+    Returns:
+        1D float64 numpy array
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        return series.to_numpy(dtype=np.float64, na_value=np.nan)
+
+    return np.array([float(val) if isinstance(val, (int, float)) else np.nan for val in series],
+                    dtype=np.float64)
+
+
+def blank_matrix(df, blank_cols):
+    """
+    Extracts the Blank columns as a (rows x blanks) float array
+
+    Args:
+        df: Aligned DataFrame
+        blank_cols: Blank column names (see find_blank_columns)
+
+    Returns:
+        2D float64 numpy array (non-numeric cells are NaN)
+    """
+    values = np.empty((len(df), len(blank_cols)), dtype=np.float64)
+
+    for i, col in enumerate(blank_cols):
+        values[:, i] = numeric_values(df[col])
+
+    return values
+
+
+def blank_statistics(values):
+    """
+    Calculates the NaN-aware mean and sample standard deviation (ddof=1) of each row
+
+    Rows with a single valid value get std = 0, rows without valid values get NaN
+
+    Args:
+        values: 2D array (rows x blanks), see blank_matrix
+
+    Returns:
+        Tuple (mean, std) of 1D float64 arrays
+    """
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    counts = valid.sum(axis=1)
+
+    mean = np.full(len(values), np.nan)
+    std = np.full(len(values), np.nan)
+
+    # Move the valid values of each row to the front (keeping their order), then
+    # reduce rows with the same number of values together. Summing exactly the
+    # valid values, in order, gives the same numbers as np.mean/np.std per row.
+    order = np.argsort(~valid, axis=1, kind='stable')
+    compact = np.take_along_axis(values, order, axis=1)
+
+    for n in np.unique(counts[counts > 0]):
+        rows = counts == n
+        block = compact[rows, :n]
+        block_mean = block.sum(axis=1) / n
+        mean[rows] = block_mean
+
+        if n > 1:
+            deviations = block - block_mean[:, np.newaxis]
+            std[rows] = np.sqrt((deviations * deviations).sum(axis=1) / (n - 1))  # Sample standard deviation
+        else:
+            std[rows] = 0  # A single value has no spread
+
+    return mean, std
+
+
+def compute_bff(values, threshold):
+    """
+    Calculates BFF = mean + (threshold * std_dev) for each row of the Blank block
+
+    Args:
+        values: 2D array (rows x blanks), see blank_matrix
+        threshold: Multiplier for standard deviation (e.g., 3 or 10)
+
+    Returns:
+        1D float64 array with the BFF of each row (NaN where no Blank value exists)
+    """
+    mean, std = blank_statistics(values)
+    return mean + (threshold * std)
+
+
+def subtract_bff_block(df, columns, bff):
+    """
+    Subtracts the BFF vector from a block of sample columns in one broadcast operation
+
+    Rows where BFF is NaN and non-numeric cells are left untouched
+
+    Args:
+        df: Aligned DataFrame (modified in place)
+        columns: Columns to subtract from (see find_subtract_columns)
+        bff: 1D array with the BFF of each row
+
+    Returns:
+        Number of rows with a valid BFF (rows that were processed)
+    """
+    bff = np.asarray(bff, dtype=np.float64)
+    valid_rows = ~np.isnan(bff)
+
+    numeric_cols = [col for col in columns if pd.api.types.is_numeric_dtype(df[col])]
+    other_cols = [col for col in columns if col not in numeric_cols]
+
+    # Numeric columns: one (rows x columns) subtraction, BFF broadcast along each row
+    if numeric_cols:
+        # float32 tables (see utils.precision) are subtracted in float64 and stored back as float32
+        storage = np.float32 if all(df[col].dtype == np.float32 for col in numeric_cols) else np.float64
+        block = df[numeric_cols].to_numpy(dtype=storage, na_value=np.nan, copy=True)
+        np.subtract(block, bff[:, np.newaxis], out=block, where=valid_rows[:, np.newaxis], casting='same_kind')
+        df[numeric_cols] = block
+
+    # Columns with text cells: only subtract from the numeric cells
+    for col in other_cols:
+        values = numeric_values(df[col])
+        mask = valid_rows & ~np.isnan(values)
+        column = df[col].astype(object)
+        column[mask] = values[mask] - bff[mask]
+        df[col] = column
+
+    return int(valid_rows.sum())
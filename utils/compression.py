@@ -0,0 +1,168 @@
+"""
+Compressed files (.gz, .xz, .zst)
+Raw exports and step outputs can be stored compressed: the file extension gives the
+compression, and the files are decompressed while they are read (never to a temporary
+file). gzip and xz are part of Python; zstd needs the optional zstandard package
+"""
+import gzip
+import lzma
+import os
+import shutil
+import sys
+
+# Add root directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Compression name (as used by pandas) -> file extension
+COMPRESSIONS = {'gzip': '.gz', 'xz': '.xz', 'zstd': '.zst'}
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def compression_of(file_path):
+    """
+    Returns the compression of a file from its extension ('gzip', 'xz', 'zstd' or None)
+    """
+    extension = os.path.splitext(str(file_path))[1].lower()
+    for compression, compression_extension in COMPRESSIONS.items():
+        if extension == compression_extension:
+            return compression
+    return None
+
+
+def strip_compression(file_path):
+    """
+    Returns the path without the compression extension (e.g. data.csv.gz -> data.csv)
+    """
+    if compression_of(file_path) is None:
+        return file_path
+    return os.path.splitext(file_path)[0]
+
+
+def compressed_path(file_path, compression):
+    """
+    Returns the path with the extension of the compression (None = path unchanged)
+
+    Args:
+        file_path: Path of the uncompressed file (e.g. OUTPUT/11_aligned_qc_filtered.csv)
+        compression: 'gzip', 'xz', 'zstd' or None
+
+    Returns:
+        Path with the compression extension added
+    """
+    if compression is None:
+        return file_path
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression: {compression} (use one of: {', '.join(COMPRESSIONS)} or None)")
+    return strip_compression(file_path) + COMPRESSIONS[compression]
+
+
+def _zstandard():
+    """
+    Imports the optional zstandard package
+    """
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("Reading or writing .zst files needs the zstandard package "
+                          "(pip install zstandard)") from None
+    return zstandard
+
+
+def check_compression(compression, used_by):
+    """
+    Checks that a compression is known and that its optional package is installed
+    (zstd needs zstandard), so a run stops before Step 01 instead of at the first file
+
+    Args:
+        compression: 'gzip', 'xz', 'zstd' or None
+        used_by: Setting or file shown in the error (e.g. "OUTPUT_COMPRESSION = 'zstd'")
+
+    Raises:
+        ValueError: Unknown compression
+        ImportError: zstandard is not installed
+    """
+    if compression is None:
+        return
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression: {compression} (use one of: {', '.join(COMPRESSIONS)} or None)")
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError(f"{used_by} needs the zstandard package (pip install zstandard)") from None
+
+
+def check_input_compression(file_paths):
+    """
+    Checks that the compressed input files can be read (see check_compression)
+
+    Args:
+        file_paths: Raw input files (.csv, .csv.gz, .csv.xz, .csv.zst, ...)
+    """
+    for file_path in file_paths:
+        check_compression(compression_of(file_path), f"Reading {os.path.basename(file_path)}")
+
+
+def open_binary(file_path, mode='rb'):
+    """
+    Opens a file in binary mode, compressing or decompressing on the fly
+
+    Compressed files can only be read from start to end: seek() moves forward by
+    decompressing (backward seeks start again from the beginning)
+
+    Args:
+        file_path: Path to the file (.gz, .xz, .zst or uncompressed)
+        mode: 'rb', 'wb' or 'ab'
+
+    Returns:
+        File object
+    """
+    compression = compression_of(file_path)
+    if compression == 'gzip':
+        return gzip.open(file_path, mode)
+    if compression == 'xz':
+        return lzma.open(file_path, mode)
+    if compression == 'zstd':
+        return _zstandard().open(file_path, mode)
+    return open(file_path, mode)
+
+
+def open_text(file_path, mode='r', encoding='utf-8', newline=None):
+    """
+    Opens a file in text mode, compressing or decompressing on the fly
+
+    Args:
+        file_path: Path to the file (.gz, .xz, .zst or uncompressed)
+        mode: 'r', 'w' or 'a'
+        encoding: Text encoding
+        newline: Newline handling, as for open()
+
+    Returns:
+        Text file object
+    """
+    compression = compression_of(file_path)
+    if compression == 'gzip':
+        return gzip.open(file_path, mode + 't', encoding=encoding, newline=newline)
+    if compression == 'xz':
+        return lzma.open(file_path, mode + 't', encoding=encoding, newline=newline)
+    if compression == 'zstd':
+        return _zstandard().open(file_path, mode, encoding=encoding, newline=newline)
+    return open(file_path, mode, encoding=encoding, newline=newline)
+
+
+def copy_file(source, target):
+    """
+    Copies a file, converting between the compressions given by the two extensions
+    (streamed, the data is never held in memory as a whole)
+
+    Args:
+        source: Path of the file to copy
+        target: Path of the copy
+    """
+    if compression_of(source) == compression_of(target):
+        shutil.copy2(source, target)
+        return
+
+    with open_binary(source, 'rb') as f_in:
+        with open_binary(target, 'wb') as f_out:
+            shutil.copyfileobj(f_in, f_out, COPY_BUFFER_SIZE)
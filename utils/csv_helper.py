@@ -1,16 +1,30 @@
 """
 CSV Helper functions for detecting delimiters and validating files
 """
+import io
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
 
+# Add root directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-def detect_delimiter(file_path, encoding='utf-8-sig'):
+from utils.compression import compression_of, open_binary, open_text
+from utils.parallel_csv import data_offset, split_byte_ranges
+
+DECIMAL_SAMPLE_ROWS = 1000  # Data lines used to detect the decimal separator of each column
+
+
+def detect_delimiter(file_path, encoding='utf-8-sig', line_index=0):
     """
     Automatically detects the CSV delimiter by reading the first few lines
 
     Args:
-        file_path: Path to the CSV file
+        file_path: Path to the CSV file (.gz, .xz and .zst files are decompressed while reading)
         encoding: File encoding
+        line_index: Index of the line used for detection (0 = first line)
 
     Returns:
         The detected delimiter (';', ',', '\t', etc.)
@@ -18,8 +32,10 @@ def detect_delimiter(file_path, encoding='utf-8-sig'):
     # Try common delimiters
     delimiters = [';', ',', '\t', '|']
 
-    # Read first line to check
-    with open(file_path, 'r', encoding=encoding) as f:
+    # Read the requested line to check (skipping any header lines before it)
+    with open_text(file_path, 'r', encoding=encoding) as f:
+        for _ in range(line_index):
+            f.readline()
         first_line = f.readline()
 
     # Count occurrences of each delimiter
@@ -75,7 +91,7 @@ def read_csv_auto(file_path, encoding='utf-8-sig'):
     Reads CSV with automatic delimiter detection
 
     Args:
-        file_path: Path to the CSV file
+        file_path: Path to the CSV file (.gz, .xz and .zst files are decompressed while reading)
         encoding: File encoding
 
     Returns:
@@ -89,3 +105,208 @@ def read_csv_auto(file_path, encoding='utf-8-sig'):
     df = pd.read_csv(file_path, delimiter=delimiter, encoding=encoding, low_memory=False)
 
     return df, delimiter
+
+
+def to_numeric_column(series):
+    """
+    Converts a Mass/Intensity column to floats (handles comma decimal separator if present)
+    Non-numeric values become NaN
+
+    Args:
+        series: DataFrame column
+
+    Returns:
+        1D float64 numpy array
+    """
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        # Already parsed (see read_numeric_csv): no text conversion needed
+        return series.to_numpy(dtype=np.float64)
+
+    return pd.to_numeric(series.astype(str).str.replace(',', '.'), errors='coerce').to_numpy(dtype=np.float64)
+
+
+def detect_decimal_separators(df_text, delimiter):
+    """
+    Detects the decimal separator of each column from a sample of its values
+
+    Args:
+        df_text: DataFrame with the sample values as text
+        delimiter: CSV delimiter (a comma delimiter means '.' decimals)
+
+    Returns:
+        Dictionary column name -> '.' or ','
+    """
+    separators = {}
+    for col in df_text.columns:
+        values = df_text[col].dropna().astype(str)
+        commas = values.str.contains(',', regex=False).sum()
+        dots = values.str.contains('.', regex=False).sum()
+        separators[col] = ',' if delimiter != ',' and commas > dots else '.'
+
+    return separators
+
+
+def parse_numeric_range(file_path, start, stop, delimiter, encoding, columns, separators):
+    """
+    Parses the lines in file_path[start:stop] straight to float64 columns,
+    with the C parser's decimal= option (one pass per decimal separator in use)
+
+    Values that are not numbers become NaN, like to_numeric_column
+
+    Args:
+        file_path: Path to the CSV file
+        start: Byte offset of the first line
+        stop: Byte offset after the last line (None = end of the file)
+        delimiter: CSV delimiter
+        encoding: File encoding
+        columns: Column names
+        separators: Decimal separator of each column (see detect_decimal_separators)
+
+    Returns:
+        Tuple (DataFrame with float64 columns, dictionary column -> number of values set to NaN)
+    """
+    if stop is not None and stop <= start:
+        return pd.DataFrame({col: np.array([], dtype=np.float64) for col in columns}), {}
+
+    # Compressed files are decompressed while reading (offsets are positions in the decompressed data)
+    with open_binary(file_path) as f:
+        f.seek(start)
+        data = f.read() if stop is None else f.read(stop - start)
+    if not data:
+        return pd.DataFrame({col: np.array([], dtype=np.float64) for col in columns}), {}
+
+    parsed = {}
+    coerced = {}
+    for decimal in sorted(set(separators.values())):
+        group = [col for col in columns if separators[col] == decimal]
+        df_group = pd.read_csv(io.BytesIO(data), delimiter=delimiter, encoding=encoding, header=None,
+                               names=columns, usecols=group, index_col=False, decimal=decimal,
+                               low_memory=False)
+
+        for col in group:
+            series = df_group[col]
+            if pd.api.types.is_numeric_dtype(series.dtype):
+                parsed[col] = series.to_numpy(dtype=np.float64)
+            else:
+                # Some values are not numbers with this separator: convert them one by one
+                parsed[col] = to_numeric_column(series)
+                count = int((series.notna().to_numpy() & np.isnan(parsed[col])).sum())
+                if count:
+                    coerced[col] = count
+
+    return pd.DataFrame({col: parsed[col] for col in columns}), coerced
+
+
+def read_numeric_csv(file_path, delimiter, encoding='utf-8-sig', names_line=0, data_line=1, workers=1,
+                     min_parallel_size=0):
+    """
+    Reads a CSV file with numeric data straight to float64 columns (no text values in memory)
+
+    The decimal separator ('.' or ',') of each column is detected once from the first data
+    lines, then the C parser converts the values directly. Large files are parsed in byte
+    ranges by several worker processes (see utils.parallel_csv). Compressed files (.gz, .xz,
+    .zst) are decompressed while reading, in this process
+
+    Args:
+        file_path: Path to the CSV file
+        delimiter: CSV delimiter (see detect_delimiter)
+        encoding: File encoding
+        names_line: Index of the line with the column names
+        data_line: Index of the first data line (the lines in between are skipped)
+        workers: Number of worker processes (1 = parse in this process)
+        min_parallel_size: Files smaller than this (bytes) are parsed in this process
+
+    Returns:
+        Tuple (DataFrame with float64 columns, dictionary column -> number of values set to NaN)
+    """
+    columns = list(pd.read_csv(file_path, delimiter=delimiter, encoding=encoding, skiprows=names_line,
+                               nrows=0).columns)
+    start = data_offset(file_path, data_line)
+    compressed = compression_of(file_path) is not None
+
+    df_sample = pd.DataFrame(columns=columns)
+    with open_binary(file_path) as f:
+        f.seek(start)
+        if f.read(1):
+            f.seek(start)
+            df_sample = pd.read_csv(f, delimiter=delimiter, encoding=encoding, header=None, names=columns,
+                                    index_col=False, nrows=DECIMAL_SAMPLE_ROWS, dtype=str)
+    separators = detect_decimal_separators(df_sample, delimiter)
+    comma_columns = sum(1 for sep in separators.values() if sep == ',')
+    print(f"[INFO] Decimal separator: ',' in {comma_columns} columns, '.' in {len(columns) - comma_columns} columns")
+
+    if compressed:
+        # Compressed files are decompressed as one stream (no random access to byte ranges)
+        ranges = [(start, None)]
+    elif workers > 1 and os.path.getsize(file_path) >= min_parallel_size:
+        ranges = split_byte_ranges(file_path, start, workers) or [(start, os.path.getsize(file_path))]
+    else:
+        ranges = [(start, os.path.getsize(file_path))]
+
+    if len(ranges) > 1:
+        print(f"[INFO] Parsing {len(ranges)} byte ranges with {min(workers, len(ranges))} worker process(es)")
+        with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as executor:
+            futures = [executor.submit(parse_numeric_range, file_path, a, b, delimiter, encoding, columns,
+                                       separators) for a, b in ranges]
+            results = [future.result() for future in futures]
+    else:
+        results = [parse_numeric_range(file_path, ranges[0][0], ranges[0][1], delimiter, encoding, columns,
+                                       separators)]
+
+    df = pd.concat([part for part, _ in results], ignore_index=True) if len(results) > 1 else results[0][0]
+    coerced = {}
+    for _, part_coerced in results:
+        for col, count in part_coerced.items():
+            coerced[col] = coerced.get(col, 0) + count
+
+    return df, {col: coerced[col] for col in columns if col in coerced}
+
+
+def report_coerced(coerced, max_columns=10):
+    """
+    Prints the columns whose values could not be read as numbers
+
+    Args:
+        coerced: Dictionary column -> number of values set to NaN (see read_numeric_csv)
+        max_columns: Maximum number of columns listed
+    """
+    if not coerced:
+        print("[OK] All values read as numbers")
+        return
+
+    print(f"[WARNING] {sum(coerced.values())} values in {len(coerced)} columns are not numbers (set to empty):")
+    for col, count in list(coerced.items())[:max_columns]:
+        print(f"          {col}: {count} values")
+    if len(coerced) > max_columns:
+        print(f"          ... and {len(coerced) - max_columns} more columns")
+
+
+def round_as_written(values, decimal_places):
+    """
+    Rounds floats to the values read back from a CSV saved with float_format='%.Nf'
+
+    np.round scales by 10^N first and can land on the other side of a tie
+    (e.g. 1.15 -> 1.2, while '%.1f' writes 1.1), so values close to a tie
+    are formatted like to_csv does
+
+    Args:
+        values: Float array
+        decimal_places: Number of decimal places (N)
+
+    Returns:
+        float64 array with the same shape
+    """
+    values = np.asarray(values, dtype=np.float64)
+    rounded = np.round(values, decimal_places)
+
+    with np.errstate(invalid='ignore'):
+        scaled = values * (10.0 ** decimal_places)
+        distance = np.abs(scaled - np.floor(scaled) - 0.5)
+        ties = np.flatnonzero(distance <= 1e-9 + np.abs(scaled) * 1e-12)
+
+    flat = rounded.reshape(-1)
+    source = values.reshape(-1)
+    for i in ties:
+        flat[i] = float(f'%.{decimal_places}f' % source[i])
+
+    return flat.reshape(values.shape)
@@ -0,0 +1,144 @@
+"""
+Parsed input cache
+The first numeric read of a raw export (step 01, see utils.csv_helper.read_numeric_csv)
+is stored in OUTPUT_DIR/.stage_cache as a float64 .npy matrix (one column per Mass or
+Intensity column) plus a record with the sample column names and the identity of the
+raw file (size, modification time, SHA-256). Later runs load the matrix instead of
+parsing the text again, e.g. when only the number of decimal places changes
+"""
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# Add root directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.stage_cache import file_fingerprint, code_version
+
+ENTRY_PREFIX = "input-"
+
+
+def cache_paths(cache_dir, input_file):
+    """
+    Returns the matrix and the record of the cache entry of one raw file
+
+    Args:
+        cache_dir: Cache directory
+        input_file: Raw input file
+
+    Returns:
+        Tuple (matrix_path, record_path)
+    """
+    name = hashlib.sha256(os.path.abspath(input_file).encode()).hexdigest()[:16]
+    base = os.path.join(cache_dir, ENTRY_PREFIX + name)
+    return base + ".npy", base + ".json"
+
+
+def load_parsed_input(cache_dir, input_file, hash_content=True):
+    """
+    Loads the parsed input if the raw file did not change since it was stored
+
+    The file is unchanged when its size matches and its SHA-256 matches. Without hash_content,
+    an unchanged size and modification time are enough (the hash is only checked when the
+    modification time changed, e.g. after copying the same file again)
+
+    Args:
+        cache_dir: Cache directory
+        input_file: Raw input file
+        hash_content: Always check the SHA-256 of the file
+
+    Returns:
+        Tuple (DataFrame with float64 columns, delimiter), or None when there is no valid entry
+    """
+    matrix_path, record_path = cache_paths(cache_dir, input_file)
+    if not (os.path.exists(matrix_path) and os.path.exists(record_path)):
+        return None
+
+    try:
+        with open(record_path, 'r', encoding='utf-8') as f:
+            record = json.load(f)
+    except (ValueError, IOError):
+        return None
+
+    stat = os.stat(input_file)
+    if record.get('size') != stat.st_size or record.get('code') != code_version():
+        return None
+
+    if hash_content or record.get('mtime_ns') != stat.st_mtime_ns:
+        if record.get('sha256') != file_fingerprint(input_file, True):
+            return None
+        record['mtime_ns'] = stat.st_mtime_ns
+
+    matrix = np.load(matrix_path, allow_pickle=False)
+    df = pd.DataFrame(matrix, columns=record['columns'])
+
+    # Mark as recently used
+    with open(record_path, 'w', encoding='utf-8') as f:
+        json.dump(record, f, indent=2)
+
+    print(f"[CACHE] Parsed input unchanged - reusing {matrix_path} ({len(df)} rows, {len(df.columns)} columns)")
+    return df, record['delimiter']
+
+
+def store_parsed_input(cache_dir, input_file, df, delimiter, keep=3):
+    """
+    Stores the parsed input with the identity of the raw file
+
+    Args:
+        cache_dir: Cache directory
+        input_file: Raw input file
+        df: DataFrame with float64 columns (see utils.csv_helper.read_numeric_csv)
+        delimiter: CSV delimiter of the raw file
+        keep: Number of parsed inputs kept in the cache (other raw files, least recently used first)
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    matrix_path, record_path = cache_paths(cache_dir, input_file)
+
+    stat = os.stat(input_file)
+    record = {
+        'input': os.path.abspath(input_file),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': file_fingerprint(input_file, True),
+        'code': code_version(),
+        'delimiter': delimiter,
+        'columns': [str(col) for col in df.columns],
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+
+    np.save(matrix_path, df.to_numpy(dtype=np.float64))
+    with open(record_path, 'w', encoding='utf-8') as f:
+        json.dump(record, f, indent=2)
+
+    print(f"[CACHE] Parsed input stored: {matrix_path}")
+    evict_parsed_inputs(cache_dir, keep)
+
+
+def evict_parsed_inputs(cache_dir, keep):
+    """
+    Deletes all but the `keep` most recently used parsed inputs
+
+    Args:
+        cache_dir: Cache directory
+        keep: Number of entries to keep
+
+    Returns:
+        Number of deleted entries
+    """
+    records = glob.glob(os.path.join(cache_dir, ENTRY_PREFIX + "*.json"))
+    records.sort(key=os.path.getmtime, reverse=True)
+
+    for record in records[keep:]:
+        for path in (record[:-len(".json")] + ".npy", record):
+            if os.path.exists(path):
+                os.remove(path)
+
+    removed = max(len(records) - keep, 0)
+    if removed:
+        print(f"[CACHE] Removed {removed} old parsed input{'' if removed == 1 else 's'}")
+    return removed
@@ -0,0 +1,198 @@
+"""
+Memory-mapped aligned table for tables larger than RAM
+The filled aligned table (step 04) is stored as a .npy matrix opened with np.memmap,
+plus a small index file (aligned masses + sample column names). Steps 05-11 are
+row-wise, so they run one block of rows at a time and append the kept rows to the
+final CSV: memory use is bounded by the block size, not by the table size
+"""
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# Add root directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import CHUNK_SIZE, SAMPLE_WORKERS
+from utils.alignment import collect_sample_triplets, sum_triplets, keys_to_masses
+from utils.background import apply_noise, correct_background
+from utils.bff import find_qc_columns
+from utils.compression import open_text
+from utils.csv_helper import round_as_written
+
+
+def table_paths(base_path):
+    """
+    Returns the files of a memory-mapped table
+
+    Args:
+        base_path: Path without extension (e.g. OUTPUT/04_aligned_filled)
+
+    Returns:
+        Tuple (matrix_path, index_path): the .npy matrix and the .index.npz file
+    """
+    return base_path + ".npy", base_path + ".index.npz"
+
+
+def create_memmap_table(base_path, aligned, columns, dtype=np.float64):
+    """
+    Creates a zero-filled memory-mapped matrix (rows x sample columns) and its index file
+
+    Args:
+        base_path: Path without extension
+        aligned: 1D array of aligned masses (one per row)
+        columns: Sample column names
+        dtype: Storage type of the matrix (float64 or float32)
+
+    Returns:
+        Writable np.memmap matrix
+    """
+    matrix_path, index_path = table_paths(base_path)
+    np.savez(index_path, aligned=np.asarray(aligned, dtype=np.float64),
+             columns=np.array([str(col) for col in columns]))
+
+    return np.lib.format.open_memmap(matrix_path, mode='w+', dtype=dtype,
+                                     shape=(len(aligned), len(columns)))
+
+
+def open_memmap_table(base_path, mode='r'):
+    """
+    Opens a memory-mapped table created by create_memmap_table
+
+    Args:
+        base_path: Path without extension
+        mode: 'r' (read only) or 'r+' (modify in place)
+
+    Returns:
+        Tuple (aligned, columns, matrix) with the masses, the column names and the np.memmap matrix
+    """
+    matrix_path, index_path = table_paths(base_path)
+    with np.load(index_path, allow_pickle=False) as index:
+        aligned = index['aligned']
+        columns = index['columns'].tolist()
+
+    return aligned, columns, np.load(matrix_path, mmap_mode=mode)
+
+
+def remove_memmap_table(base_path):
+    """
+    Deletes the files of a memory-mapped table (if they exist)
+
+    Args:
+        base_path: Path without extension
+    """
+    for path in table_paths(base_path):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def align_samples_memmap(df_data, decimal_places, base_path, dtype=np.float64, chunk_size=CHUNK_SIZE):
+    """
+    Single-pass alignment (see utils.alignment.align_samples) into a memory-mapped matrix
+
+    Only the (mass, sample, intensity) triplets are held in memory; the matrix is
+    written on disk and rounded like the step 04 file, one block of rows at a time
+
+    Args:
+        df_data: DataFrame with rounded Mass/Intensity column pairs (step 02 result)
+        decimal_places: Number of decimal places (from .decimal_config)
+        base_path: Path of the table without extension
+        dtype: Storage type of the matrix (float64 or float32)
+        chunk_size: Number of rows rounded per block
+
+    Returns:
+        Tuple (aligned, columns, matrix), or None if no numeric mass values were found
+    """
+    collected = collect_sample_triplets(df_data, decimal_places, SAMPLE_WORKERS)
+    if collected is None:
+        return None
+    sorted_keys, sample_headers, mass_index, sample_index, values = collected
+
+    print(f"[INFO] Building memory-mapped aligned matrix: {base_path}.npy")
+    aligned = keys_to_masses(sorted_keys, decimal_places)
+    matrix = create_memmap_table(base_path, aligned, sample_headers, dtype)
+
+    # Write the cells in file order
+    cells, sums = sum_triplets(mass_index, sample_index, values, len(sample_headers))
+    order = np.argsort(cells, kind='stable')
+    matrix.reshape(-1)[cells[order]] = sums[order]
+    del mass_index, sample_index, values, cells, sums, order
+
+    for start in range(0, len(matrix), chunk_size):
+        stop = min(start + chunk_size, len(matrix))
+        matrix[start:stop] = round_as_written(matrix[start:stop], decimal_places)
+    matrix.flush()
+
+    print(f"[OK] Total distinct masses: {len(aligned)}")
+    print(f"[OK] Total sample columns: {len(sample_headers)}")
+
+    return aligned, sample_headers, matrix
+
+
+def apply_noise_memmap(matrix, noise_level, chunk_size=CHUNK_SIZE):
+    """
+    Applies the noise threshold to a memory-mapped matrix in place, one block of rows at a time
+
+    Args:
+        matrix: Writable np.memmap matrix
+        noise_level: Threshold value
+        chunk_size: Number of rows per block
+    """
+    for start in range(0, len(matrix), chunk_size):
+        stop = min(start + chunk_size, len(matrix))
+        block = np.array(matrix[start:stop])
+        apply_noise(block, noise_level)
+        matrix[start:stop] = block
+    matrix.flush()
+
+
+def process_memmap_table(aligned, columns, matrix, threshold, output_file, delimiter,
+                         decimal_places=None, chunk_size=CHUNK_SIZE):
+    """
+    Runs steps 05-11 on a memory-mapped table, one block of rows at a time,
+    and appends the kept rows to the final CSV (same content as 11_aligned_qc_filtered.csv)
+
+    Args:
+        aligned: 1D array of aligned masses
+        columns: Sample column names
+        matrix: np.memmap matrix (rows x sample columns), step 04 values
+        threshold: BFF threshold multiplier
+        output_file: Final CSV file
+        delimiter: CSV delimiter
+        decimal_places: Round values between steps like the scripts' float_format (None = no rounding)
+        chunk_size: Number of rows per block
+
+    Returns:
+        Dictionary with the row counts: 'rows', 'after_zero_rows' (step 06) and 'final' (step 11)
+    """
+    qc_rcp_cols, sample_cols = find_qc_columns(columns)
+    qc_rcp_idx = [columns.index(col) for col in qc_rcp_cols]
+    sample_idx = [columns.index(col) for col in sample_cols]
+
+    counts = {'rows': len(matrix), 'after_zero_rows': 0, 'final': 0}
+    # One stream for the whole file, so a compressed output (.gz/.xz/.zst) is written in one pass
+    with open_text(output_file, 'w', encoding='utf-8', newline='') as f:
+        # Header first, so the file is valid even if no row is kept
+        pd.DataFrame(columns=['Aligned'] + list(columns) + ['BFF']).to_csv(f, sep=delimiter, index=False)
+
+        for start in range(0, len(matrix), chunk_size):
+            stop = min(start + chunk_size, len(matrix))
+
+            # Steps 05-09 (noise already applied to the table)
+            values, bff, keep, _ = correct_background(matrix[start:stop], columns, threshold=threshold,
+                                                      decimal_places=decimal_places, chunk_size=chunk_size)
+            block_aligned = aligned[start:stop][keep]
+            counts['after_zero_rows'] += len(values)
+
+            # Steps 10/11: QC/RCP and sample totals > 0 (values are >= 0 after step 09)
+            qc_total = values[:, qc_rcp_idx].sum(axis=1) if qc_rcp_idx else np.zeros(len(values))
+            sample_total = values[:, sample_idx].sum(axis=1) if sample_idx else np.zeros(len(values))
+            final = (qc_total > 0) & (sample_total > 0)
+            counts['final'] += int(final.sum())
+
+            df_block = pd.DataFrame(values[final], columns=columns)
+            df_block.insert(0, 'Aligned', block_aligned[final])
+            df_block['BFF'] = bff[final]
+            df_block.to_csv(f, sep=delimiter, index=False, header=False)
+
+    return counts
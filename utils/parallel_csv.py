@@ -0,0 +1,148 @@
+"""
+Parallel CSV ingestion for large raw exports
+The data lines after the header are split into byte ranges (cut at line ends) and
+each range is parsed by a worker process. The result is the same DataFrame as a
+single pd.read_csv of the file: the text header lines make every Mass/Intensity
+column a text column, so the ranges can be parsed as text and joined in order
+
+Lines are cut at b'\\n', so the file encoding must be ASCII-compatible (UTF-8, Latin-1)
+and fields must not contain line breaks (instrument exports do not quote fields).
+Compressed files (.gz, .xz, .zst) have no random access and are read in one pass
+"""
+import io
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+
+# Add root directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.compression import compression_of, open_binary
+
+MIN_RANGE_BYTES = 1024 * 1024  # Smaller ranges are not worth a worker process
+
+
+def data_offset(file_path, header_lines):
+    """
+    Returns the byte position of the first line after the header
+
+    Args:
+        file_path: Path to the file (position in the decompressed data for compressed files)
+        header_lines: Number of header lines
+
+    Returns:
+        Byte offset (file size if the file has no data lines)
+    """
+    with open_binary(file_path) as f:
+        for _ in range(header_lines):
+            f.readline()
+        return f.tell()
+
+
+def split_byte_ranges(file_path, start, parts):
+    """
+    Splits file_path[start:] into about `parts` byte ranges that end at a line end
+
+    Args:
+        file_path: Path to the file
+        start: Byte offset of the first data line
+        parts: Number of ranges wanted
+
+    Returns:
+        List of (start, stop) byte offsets covering the data, in file order
+        (empty for compressed files, which are read in one pass)
+    """
+    if compression_of(file_path) is not None:
+        return []
+
+    size = os.path.getsize(file_path)
+    parts = max(1, min(parts, (size - start) // MIN_RANGE_BYTES))
+    step = (size - start) // parts
+
+    bounds = [start]
+    with open(file_path, 'rb') as f:
+        for i in range(1, parts):
+            position = max(start + i * step, bounds[-1])
+            f.seek(position)
+            f.readline()  # Move to the start of the next line
+            if f.tell() >= size:
+                break
+            bounds.append(f.tell())
+    bounds.append(size)
+
+    return [(a, b) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+def parse_byte_range(file_path, start, stop, delimiter, encoding, columns):
+    """
+    Parses the lines in file_path[start:stop] as text columns (runs in a worker process)
+
+    Args:
+        file_path: Path to the file
+        start: Byte offset of the first line
+        stop: Byte offset after the last line
+        delimiter: CSV delimiter
+        encoding: File encoding
+        columns: Column names
+
+    Returns:
+        DataFrame with one text column per name (missing values are NaN)
+    """
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        data = f.read(stop - start)
+
+    return pd.read_csv(io.BytesIO(data), delimiter=delimiter, encoding=encoding, header=None,
+                       names=columns, index_col=False, dtype=str, low_memory=False)
+
+
+def read_csv_parallel(file_path, delimiter, encoding='utf-8-sig', skiprows=(), header_lines=0, workers=None):
+    """
+    Reads a CSV file like pd.read_csv(file_path, delimiter=delimiter, skiprows=skiprows),
+    parsing the data lines in parallel worker processes
+
+    The first `header_lines` lines are read normally: the first one that is not skipped gives
+    the column names, the other ones that are not skipped are the first rows. Falls back to a
+    single read when a header row is not text in every column (the column types would then
+    depend on the data)
+
+    Args:
+        file_path: Path to the CSV file
+        delimiter: CSV delimiter (see utils.csv_helper.detect_delimiter)
+        encoding: File encoding
+        skiprows: Indexes of the header lines to skip (all < header_lines)
+        header_lines: Number of header lines (e.g. 8 for the raw export)
+        workers: Number of worker processes (None = number of CPU cores)
+
+    Returns:
+        DataFrame (same content as the single read)
+    """
+    skiprows = sorted(skiprows)
+    kept_lines = header_lines - len(skiprows)
+    df_head = pd.read_csv(file_path, delimiter=delimiter, encoding=encoding, skiprows=skiprows,
+                          nrows=max(kept_lines - 1, 0), dtype=str, low_memory=False)
+
+    header_is_text = (
+        kept_lines > 1
+        and not df_head.isna().any().any()
+        and pd.to_numeric(df_head.stack(), errors='coerce').isna().all()
+    )
+    workers = workers or os.cpu_count() or 1
+    start = data_offset(file_path, header_lines)
+    ranges = split_byte_ranges(file_path, start, workers) if header_is_text else []
+
+    if len(ranges) < 2:
+        if not header_is_text:
+            print("[INFO] Header rows are not text in every column - reading the file in one pass")
+        return pd.read_csv(file_path, delimiter=delimiter, encoding=encoding, skiprows=skiprows,
+                           low_memory=False)
+
+    print(f"[INFO] Parsing {len(ranges)} byte ranges with {min(workers, len(ranges))} worker process(es)")
+    columns = list(df_head.columns)
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as executor:
+        futures = [executor.submit(parse_byte_range, file_path, a, b, delimiter, encoding, columns)
+                   for a, b in ranges]
+        parts = [future.result() for future in futures]
+
+    return pd.concat([df_head] + parts, ignore_index=True)
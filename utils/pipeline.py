@@ -0,0 +1,1128 @@
+"""
+In-memory pipeline runner
+Runs steps 01-11 in a single process, passing DataFrames between the step functions
+instead of writing and re-reading a CSV file after every step
+"""
+import contextlib
+import io
+import os
+import sys
+import time
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+import numpy as np
+import pandas as pd
+
+# Add root directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import ENCODING, CHUNK_SIZE, MEMMAP_DTYPE, SAMPLE_WORKERS, STAGE_CACHE_HASH_INPUT, STAGE_CACHE_KEEP
+from utils import get_decimal_places
+from utils.csv_helper import validate_dataframe, round_as_written, read_csv_auto
+from utils.table_io import intermediate_path, output_csv_path, save_table, read_table_auto, read_table_chunks
+from utils.compression import open_text, strip_compression
+from utils.alignment import align_samples
+from utils.background import correct_background
+from utils.bff import find_blank_columns, find_subtract_columns, find_qc_columns, compute_bff, subtract_bff_block
+from utils import sparse_table, memmap_table, shared_table, stage_cache, input_cache, precision
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts")
+
+# Output file written by each step (same names as the standalone scripts)
+STEP_FILES = {
+    '01': "01_header_removed.csv",
+    '02': "02_mass_rounded.csv",
+    '03': "03_aligned.csv",
+    '04': "04_aligned_filled.csv",
+    '05': "05_aligned_with_total.csv",
+    '06': "06_aligned_clean.csv",
+    '07': "07_aligned_with_bff.csv",
+    '08': "08_aligned_bff_subtracted.csv",
+    '09': "09_aligned_final.csv",
+    '10': "10_aligned_with_qc_totals.csv",
+    '11': "11_aligned_qc_filtered.csv",
+}
+
+# Steps whose outputs are intermediate files read by the next script (see utils.table_io)
+INTERMEDIATE_STEPS = {'03', '04', '05', '06', '07', '08', '09', '10'}
+
+# Steps whose scripts save with float_format (values are rounded to N decimals on disk)
+ROUNDED_STEPS = {'02', '03', '04', '05', '06', '07', '08', '09'}
+
+_loaded_steps = {}
+
+
+def load_step(module_name):
+    """
+    Imports a step script from the scripts/ folder
+    (file names start with a digit, so a regular import does not work)
+
+    Args:
+        module_name: Script name without extension (e.g. '07_calculate_bff')
+
+    Returns:
+        The imported module
+    """
+    if module_name not in _loaded_steps:
+        module_path = os.path.join(SCRIPTS_DIR, f"{module_name}.py")
+        spec = importlib.util.spec_from_file_location(f"step_{module_name}", module_path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _loaded_steps[module_name] = module
+
+    return _loaded_steps[module_name]
+
+
+@contextmanager
+def stage_timer(timings, stage):
+    """
+    Measures the run time of a block and adds it to timings[stage]
+
+    Args:
+        timings: Dictionary of stage -> seconds (None = do not measure)
+        stage: Stage name (e.g. '05' or '05-09')
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + (time.perf_counter() - start)
+
+
+def round_like_csv(df, decimal_places, columns=None):
+    """
+    Rounds numeric columns the same way the step scripts do when they save
+    with float_format, so in-memory results match the file-based chain
+
+    Args:
+        df: DataFrame to round
+        decimal_places: Number of decimal places
+        columns: Columns to round (None = all float columns)
+
+    Returns:
+        Rounded DataFrame (non-float columns are left untouched, float32 columns stay float32)
+    """
+    df = df.copy()
+    float_cols = df[columns if columns is not None else df.columns].select_dtypes(include='float').columns
+    float32_cols = [col for col in float_cols if df[col].dtype == np.float32]
+    if float32_cols:
+        # Rounded in float64 one block of rows at a time, stored back as float32 (see utils.precision)
+        values = df[float32_cols].to_numpy(copy=True)
+        for start in range(0, len(values), CHUNK_SIZE):
+            values[start:start + CHUNK_SIZE] = round_as_written(values[start:start + CHUNK_SIZE], decimal_places)
+        df[float32_cols] = values
+        float_cols = float_cols.difference(float32_cols, sort=False)
+    if len(float_cols) > 0:
+        df[float_cols] = round_as_written(df[float_cols].to_numpy(dtype=np.float64), decimal_places)
+    return df
+
+
+def read_raw_input(input_file, numeric=True, cache_dir=None):
+    """
+    Step 01 without the intermediate file: reads the raw export, skipping the header lines
+    (see utils.raw_header)
+
+    Args:
+        input_file: Raw input file (with the 8 header lines)
+        numeric: True = float64 Mass/Intensity columns (utils.csv_helper.read_numeric_csv),
+                 False = text columns, same content as 01_header_removed.csv
+                 (needed to write the step 01/02 files exactly like the scripts)
+        cache_dir: Reuse / store the numeric read in this cache directory (see utils.input_cache)
+
+    Returns:
+        Tuple (DataFrame, delimiter)
+    """
+    step01 = load_step('01_remove_header_lines')
+    if not numeric:
+        return step01.read_without_header(input_file, ENCODING)
+
+    if cache_dir is not None:
+        cached = input_cache.load_parsed_input(cache_dir, input_file, STAGE_CACHE_HASH_INPUT)
+        if cached is not None:
+            return cached
+
+    df, delimiter = step01.read_numeric_without_header(input_file, ENCODING)
+    if cache_dir is not None:
+        input_cache.store_parsed_input(cache_dir, input_file, df, delimiter, STAGE_CACHE_KEEP)
+    return df, delimiter
+
+
+def round_mass(df, decimal_places):
+    """
+    Step 02 in memory: rounds the Mass columns to the values of the step 02 file
+
+    Intensities are written unchanged by step 02 (they are text in the file chain),
+    so with the numeric read only the Mass columns are rounded
+
+    Args:
+        df: DataFrame with Mass/Intensity column pairs (see read_raw_input)
+        decimal_places: Number of decimal places
+
+    Returns:
+        DataFrame with rounded Mass columns
+    """
+    numeric = all(pd.api.types.is_numeric_dtype(dtype) for dtype in df.dtypes)
+    df = load_step('02_round_mass').round_mass_df(df, decimal_places)
+    return round_like_csv(df, decimal_places, columns=list(df.columns[0::2]) if numeric else None)
+
+
+def step_output_path(step, output_dir):
+    """
+    Returns the path of the saved output of one step: steps 03-10 in config.INTERMEDIATE_FORMAT,
+    the CSV files of steps 01, 02 and 11 with config.OUTPUT_COMPRESSION (see utils.table_io)
+    """
+    output_file = os.path.join(output_dir, STEP_FILES[step])
+    if step in INTERMEDIATE_STEPS:
+        return intermediate_path(output_file)
+    return output_csv_path(output_file)
+
+
+def save_step_output(df, step, output_dir, delimiter, decimal_places=None):
+    """
+    Writes the output of one step using the same format as its script
+    (steps 03-10 in config.INTERMEDIATE_FORMAT, see utils.table_io)
+
+    Args:
+        df: DataFrame to save
+        step: Step id ('01' to '11')
+        output_dir: Output directory
+        delimiter: CSV delimiter
+        decimal_places: Number of decimal places used for float_format (None = full precision)
+    """
+    output_file = step_output_path(step, output_dir)
+    float_format = f'%.{decimal_places}f' if decimal_places is not None else None
+    save_table(df, output_file, delimiter, float_format)
+
+    print(f"[OK] Step {step} output saved: {output_file}")
+
+
+def build_aligned_frame(aligned, columns, values, bff):
+    """
+    Builds an aligned DataFrame ('Aligned', sample columns, 'BFF') from arrays
+
+    Args:
+        aligned: 1D array of aligned masses
+        columns: Sample column names
+        values: 2D array (rows x sample columns)
+        bff: 1D array with the BFF of each row
+
+    Returns:
+        DataFrame with the same layout as the step 07-09 outputs
+    """
+    df = pd.DataFrame(values, columns=columns)
+    df.insert(0, 'Aligned', aligned)
+    df['BFF'] = bff
+    return df
+
+
+def run_background_stage(df, threshold, noise_level, decimal_places, save_steps, output_dir, delimiter,
+                         dtype=np.float64):
+    """
+    Runs the optional noise threshold and steps 05-09 as one fused stage
+    (see utils.background.correct_background); only the 08/09 outputs can be saved
+
+    Args:
+        df: Filled aligned DataFrame (step 04 result)
+        threshold: BFF threshold multiplier
+        noise_level: Optional noise threshold (None = skip)
+        decimal_places: Number of decimal places
+        save_steps: Step ids to save
+        output_dir: Output directory
+        delimiter: CSV delimiter
+        dtype: Storage type of the sample columns (float64 or float32, see utils.precision)
+
+    Returns:
+        DataFrame with the step 09 result
+    """
+    print("\n" + "="*70)
+    print("STEPS 05-09: BACKGROUND CORRECTION (FUSED)")
+    print("="*70)
+    if noise_level is not None:
+        print(f"[INFO] Noise threshold: {noise_level}")
+    print(f"[INFO] BFF formula: mean + ({threshold} × std_dev)")
+
+    columns = list(df.columns[1:])
+    result, bff, keep, subtracted = correct_background(
+        df[columns].to_numpy(dtype=dtype), columns, threshold=threshold,
+        noise_level=noise_level, decimal_places=decimal_places, keep_subtracted='08' in save_steps, dtype=dtype)
+    aligned = df['Aligned'].to_numpy()[keep]
+
+    print(f"[OK] Rows before: {len(df)}")
+    print(f"[OK] Rows removed (Total = 0): {len(df) - len(result)}")
+    print(f"[OK] Rows with valid BFF: {np.count_nonzero(~np.isnan(bff))}")
+
+    if subtracted is not None:
+        save_step_output(build_aligned_frame(aligned, columns, subtracted, bff), '08',
+                         output_dir, delimiter, decimal_places)
+
+    df = build_aligned_frame(aligned, columns, result, bff)
+    if '09' in save_steps:
+        save_step_output(df, '09', output_dir, delimiter, decimal_places)
+
+    return df
+
+
+def run_sparse_stage(df, decimal_places, threshold, noise_level, save_steps, output_dir, delimiter):
+    """
+    Runs steps 03-11 on a sparse aligned table (see utils.sparse_table).
+    The table is only densified for the step outputs that are saved
+
+    Args:
+        df: DataFrame with rounded Mass/Intensity column pairs (step 02 result)
+        decimal_places: Number of decimal places
+        threshold: BFF threshold multiplier
+        noise_level: Optional noise threshold (None = skip)
+        save_steps: Step ids to save
+        output_dir: Output directory
+        delimiter: CSV delimiter
+
+    Returns:
+        DataFrame with the step 11 result
+    """
+    if '03' in save_steps:
+        print("\n" + "="*70)
+        print("STEP 03: CREATE ALIGNED MASS LIST")
+        print("="*70)
+        df_aligned = load_step('03_create_aligned').build_aligned_df(df, decimal_places)
+        if df_aligned is None:
+            raise ValueError("No numeric mass values found in the input file")
+        save_step_output(df_aligned, '03', output_dir, delimiter, decimal_places)
+        del df_aligned
+
+    print("\n" + "="*70)
+    print("STEPS 03-04: ALIGN SAMPLES AND FILL INTENSITIES (SPARSE)")
+    print("="*70)
+    aligned_table = sparse_table.align_samples_sparse(df, decimal_places)
+    if aligned_table is None:
+        raise ValueError("No numeric mass values found in the input file")
+    aligned, columns, matrix = aligned_table
+    matrix = sparse_table.round_stored(matrix, decimal_places)
+
+    if noise_level is not None:
+        print(f"\n[INFO] Noise threshold: {noise_level}")
+        matrix = sparse_table.apply_noise_sparse(matrix, noise_level)
+    if '04' in save_steps:
+        # The noise threshold script saves without float_format
+        save_step_output(sparse_table.to_frame(aligned, columns, matrix), '04', output_dir, delimiter,
+                         decimal_places if noise_level is None else None)
+
+    print("\n" + "="*70)
+    print("STEPS 05-11: BACKGROUND CORRECTION AND QC FILTER (SPARSE)")
+    print("="*70)
+    print(f"[INFO] BFF formula: mean + ({threshold} × std_dev)")
+
+    # Steps 05/06: keep rows with Total > 0
+    if '05' in save_steps:
+        df_total = load_step('05_clean_aligned').add_total_df(sparse_table.to_frame(aligned, columns, matrix))
+        save_step_output(round_like_csv(df_total, decimal_places), '05', output_dir, delimiter, decimal_places)
+        del df_total
+    total = round_as_written(sparse_table.row_totals(matrix), decimal_places)
+    keep = total > 0
+    rows_before = matrix.shape[0]
+    aligned, matrix = aligned[keep], matrix[keep]
+    print(f"[OK] Rows before: {rows_before}")
+    print(f"[OK] Rows removed (Total = 0): {rows_before - matrix.shape[0]}")
+    if '06' in save_steps:
+        save_step_output(sparse_table.to_frame(aligned, columns, matrix), '06', output_dir, delimiter, decimal_places)
+
+    # Step 07: BFF from the (densified) Blank columns only
+    blank_idx = [columns.index(col) for col in find_blank_columns(columns)]
+    if len(blank_idx) == 0:
+        raise ValueError("No columns with 'Blank' found (excluding 'BlankExt')")
+    bff = compute_bff(sparse_table.column_block(matrix, blank_idx), threshold)
+    bff = round_as_written(bff, decimal_places)
+    print(f"[OK] Rows with valid BFF: {np.count_nonzero(~np.isnan(bff))}")
+    if '07' in save_steps or '08' in save_steps:
+        df_bff = sparse_table.to_frame(aligned, columns, matrix, bff)
+        if '07' in save_steps:
+            save_step_output(df_bff, '07', output_dir, delimiter, decimal_places)
+        if '08' in save_steps:
+            subtract_bff_block(df_bff, find_subtract_columns(df_bff.columns), bff)
+            save_step_output(round_like_csv(df_bff, decimal_places), '08', output_dir, delimiter, decimal_places)
+        del df_bff
+
+    # Steps 08/09: subtract BFF, negatives to zero
+    subtract_mask = np.isin(columns, find_subtract_columns(columns))
+    matrix = sparse_table.subtract_and_clip(matrix, bff, subtract_mask, decimal_places)
+    if '09' in save_steps:
+        save_step_output(sparse_table.to_frame(aligned, columns, matrix, bff), '09', output_dir, delimiter,
+                         decimal_places)
+
+    # Steps 10/11: keep rows present in both the QC/RCP and the sample columns
+    if '10' in save_steps:
+        df_totals = load_step('10_add_qc_totals').add_qc_totals_df(sparse_table.to_frame(aligned, columns, matrix, bff))
+        save_step_output(df_totals, '10', output_dir, delimiter)
+        del df_totals
+    qc_rcp_cols, sample_cols = find_qc_columns(columns)
+    qc_rcp_idx = [columns.index(col) for col in qc_rcp_cols]
+    sample_idx = [columns.index(col) for col in sample_cols]
+    keep = (sparse_table.row_totals(matrix, qc_rcp_idx) > 0) & (sparse_table.row_totals(matrix, sample_idx) > 0)
+    print(f"[OK] Rows removed (QC/RCP or sample total = 0): {len(keep) - np.count_nonzero(keep)}")
+    print(f"[OK] Stored (non-zero) cells: {matrix[keep].nnz}")
+
+    df = sparse_table.to_frame(aligned[keep], columns, matrix[keep], bff[keep])
+    if '11' in save_steps:
+        save_step_output(df, '11', output_dir, delimiter)
+
+    return df
+
+
+def run_memmap_stage(df, decimal_places, threshold, noise_level, save_steps, output_dir, delimiter,
+                     dtype=np.float64, chunk_size=CHUNK_SIZE):
+    """
+    Runs steps 03-11 with the aligned table in a memory-mapped .npy file
+    (see utils.memmap_table); steps 05-11 read it one block of rows at a time
+    and append the kept rows to 11_aligned_qc_filtered.csv
+
+    Args:
+        df: DataFrame with rounded Mass/Intensity column pairs (step 02 result)
+        decimal_places: Number of decimal places
+        threshold: BFF threshold multiplier
+        noise_level: Optional noise threshold (None = skip)
+        save_steps: Step ids to save: '04' keeps 04_aligned_filled.npy (+ .index.npz),
+                    the final CSV is always written
+        output_dir: Output directory
+        delimiter: CSV delimiter
+        dtype: Storage type of the matrix (float64 or float32)
+        chunk_size: Number of rows per block
+
+    Returns:
+        Dictionary with the row counts (see utils.memmap_table.process_memmap_table)
+    """
+    unsupported = sorted(save_steps - {'01', '02', '04', '11'})
+    if unsupported:
+        raise ValueError(f"The memmap backend only saves steps 01, 02, 04 and 11 (requested: {', '.join(unsupported)})")
+
+    base_path = os.path.join(output_dir, os.path.splitext(STEP_FILES['04'])[0])
+
+    print("\n" + "="*70)
+    print("STEPS 03-04: ALIGN SAMPLES AND FILL INTENSITIES (MEMORY-MAPPED)")
+    print("="*70)
+    aligned_table = memmap_table.align_samples_memmap(df, decimal_places, base_path, dtype, chunk_size)
+    if aligned_table is None:
+        raise ValueError("No numeric mass values found in the input file")
+    aligned, columns, matrix = aligned_table
+    del df
+
+    try:
+        if noise_level is not None:
+            print(f"\n[INFO] Noise threshold: {noise_level} (applied in place)")
+            memmap_table.apply_noise_memmap(matrix, noise_level, chunk_size)
+
+        print("\n" + "="*70)
+        print("STEPS 05-11: BACKGROUND CORRECTION AND QC FILTER (BLOCKS OF ROWS)")
+        print("="*70)
+        print(f"[INFO] BFF formula: mean + ({threshold} × std_dev)")
+        print(f"[INFO] Rows per block: {chunk_size}")
+
+        output_file = step_output_path('11', output_dir)
+        counts = memmap_table.process_memmap_table(aligned, columns, matrix, threshold, output_file, delimiter,
+                                                   decimal_places, chunk_size)
+    finally:
+        del matrix
+        if '04' not in save_steps:
+            memmap_table.remove_memmap_table(base_path)
+
+    print(f"[OK] Rows before: {counts['rows']}")
+    print(f"[OK] Rows removed (Total = 0): {counts['rows'] - counts['after_zero_rows']}")
+    print(f"[OK] Rows removed (QC/RCP or sample total = 0): {counts['after_zero_rows'] - counts['final']}")
+    print(f"[OK] Step 11 output saved: {output_file}")
+
+    return counts
+
+
+def call_step(module_name, function_name, df, **kwargs):
+    """
+    Calls the DataFrame function of a step script
+    (unlike a lambda, a partial of this function can be sent to worker processes)
+    """
+    return getattr(load_step(module_name), function_name)(df, **kwargs)
+
+
+def row_step_functions(threshold):
+    """
+    Returns the row-wise steps 05-11 of the aligned table, in order
+
+    Args:
+        threshold: BFF threshold multiplier (step 07)
+
+    Returns:
+        List of (step id, title, function DataFrame -> DataFrame)
+    """
+    return [
+        ('05', "ADD TOTAL SUM COLUMN", partial(call_step, '05_clean_aligned', 'add_total_df')),
+        ('06', "REMOVE ZERO ROWS", partial(call_step, '06_remove_zero_rows', 'remove_zero_rows_df')),
+        ('07', "CALCULATE BFF", partial(call_step, '07_calculate_bff', 'calculate_bff_df', threshold=threshold)),
+        ('08', "SUBTRACT BFF", partial(call_step, '08_subtract_bff', 'subtract_bff_df')),
+        ('09', "CONVERT NEGATIVE VALUES TO ZERO", partial(call_step, '09_zero_negatives', 'zero_negatives_df')),
+        ('10', "ADD QC/RCP AND SAMPLE TOTALS", partial(call_step, '10_add_qc_totals', 'add_qc_totals_df')),
+        ('11', "REMOVE QC/RCP NOISE", partial(call_step, '11_remove_qc_noise', 'remove_qc_noise_df')),
+    ]
+
+
+def iter_block_steps(df, row_steps, decimal_places, noise_level=None):
+    """
+    Runs row-wise steps on one block of rows, rounding like the scripts,
+    and yields the block after each step. The next step may change the block
+    in place, so an output must be written or copied before the loop continues
+
+    Args:
+        df: Block of rows
+        row_steps: Steps to run (see row_step_functions)
+        decimal_places: Number of decimal places
+        noise_level: Optional noise threshold applied to the block first (None = skip)
+
+    Yields:
+        Tuple (step id, DataFrame)
+    """
+    if noise_level is not None:
+        df = load_step('noise_threshold').apply_noise_threshold_df(df, noise_level)
+
+    for step, _, step_function in row_steps:
+        df = step_function(df)
+        if step in ROUNDED_STEPS:
+            df = round_like_csv(df, decimal_places)
+        yield step, df
+
+
+def print_step_counts(row_steps, counts, save_steps, output_dir):
+    """
+    Prints the number of output rows of each step run by blocks of rows
+    """
+    for step, title, _ in row_steps:
+        saved = f" - saved: {step_output_path(step, output_dir)}" if step in save_steps else ""
+        print(f"[OK] Step {step} ({title.lower()}): {counts[step]} rows{saved}")
+
+
+def run_row_steps(df, row_steps, decimal_places, save_steps, output_dir, delimiter, timings=None, workers=1):
+    """
+    Runs row-wise steps one by one, rounding and saving their outputs like the scripts
+
+    Args:
+        df: Input DataFrame
+        row_steps: Steps to run (see row_step_functions)
+        decimal_places: Number of decimal places
+        save_steps: Step ids to save
+        output_dir: Output directory
+        delimiter: CSV delimiter
+        timings: Optional dictionary filled with the run time of each step (see stage_timer)
+        workers: Number of worker processes (None = number of CPU cores, 1 = run in this process).
+                 Large numeric tables are then split into blocks of rows (see run_row_steps_parallel)
+
+    Returns:
+        DataFrame with the result of the last step
+    """
+    workers = workers or os.cpu_count() or 1
+    parallel = row_steps and workers > 1 and len(shared_table.split_rows(len(df), workers)) > 1
+    if parallel and shared_table.can_share(df):
+        stage = row_steps[0][0] if len(row_steps) == 1 else f"{row_steps[0][0]}-{row_steps[-1][0]}"
+        with stage_timer(timings, stage):
+            return run_row_steps_parallel(df, row_steps, decimal_places, save_steps, output_dir, delimiter, workers)
+
+    for step, title, step_function in row_steps:
+        print("\n" + "="*70)
+        print(f"STEP {step}: {title}")
+        print("="*70)
+        with stage_timer(timings, step):
+            df = step_function(df)
+
+            if step in ROUNDED_STEPS:
+                df = round_like_csv(df, decimal_places)
+                if step in save_steps:
+                    save_step_output(df, step, output_dir, delimiter, decimal_places)
+            elif step in save_steps:
+                save_step_output(df, step, output_dir, delimiter)
+
+    return df
+
+
+def run_row_steps_chunked(chunks, row_steps, decimal_places, save_steps, output_dir, delimiter, noise_level=None):
+    """
+    Runs row-wise steps on blocks of rows: each block goes through all the steps, and the
+    block outputs of the saved steps are appended to their files, so memory use depends
+    on the block size and not on the table size
+
+    Steps 05-11 only look at one row at a time, so the files are the same as with
+    run_row_steps. CSV outputs are written block by block; binary intermediate files
+    (npz/feather/parquet) cannot be appended to, their blocks are kept and saved at the end.
+    The messages of the step functions are only shown when a block fails
+
+    Args:
+        chunks: Iterator of DataFrames with the input rows (see utils.table_io.read_table_chunks)
+        row_steps: Steps to run (see row_step_functions)
+        decimal_places: Number of decimal places
+        save_steps: Step ids to save
+        output_dir: Output directory
+        delimiter: CSV delimiter
+        noise_level: Optional noise threshold applied to each block first (None = skip)
+
+    Returns:
+        Dictionary step id -> number of output rows
+    """
+    counts = {step: 0 for step, _, _ in row_steps}
+    writers = {}
+    kept_blocks = {}
+    blocks = 0
+
+    try:
+        for df in chunks:
+            blocks += 1
+            messages = io.StringIO()
+            try:
+                # Empty blocks give 0/0 in the step statistics
+                with contextlib.redirect_stdout(messages), np.errstate(divide='ignore', invalid='ignore'):
+                    for step, df in iter_block_steps(df, row_steps, decimal_places, noise_level):
+                        counts[step] += len(df)
+
+                        if step not in save_steps:
+                            continue
+                        # Written now: the next step may change the block in place
+                        output_file = step_output_path(step, output_dir)
+                        if os.path.splitext(strip_compression(output_file))[1].lower() == '.csv':
+                            if step not in writers:
+                                writers[step] = open_text(output_file, 'w', encoding='utf-8', newline='')
+                            df.to_csv(writers[step], sep=delimiter, index=False, header=blocks == 1,
+                                      float_format=f'%.{decimal_places}f' if step in ROUNDED_STEPS else None)
+                        else:
+                            kept_blocks.setdefault(step, []).append(df.copy())
+            except BaseException:
+                print(messages.getvalue(), end='')
+                print(f"[ERROR] Block {blocks} failed")
+                raise
+    finally:
+        for f in writers.values():
+            f.close()
+
+    for step, step_blocks in kept_blocks.items():
+        save_table(pd.concat(step_blocks, ignore_index=True), step_output_path(step, output_dir), delimiter,
+                   f'%.{decimal_places}f' if step in ROUNDED_STEPS else None)
+
+    print(f"[INFO] {blocks} block(s) processed")
+    print_step_counts(row_steps, counts, save_steps, output_dir)
+
+    return counts
+
+
+def run_row_block(table, start, stop, row_steps, decimal_places, save_steps):
+    """
+    Runs row-wise steps on rows start..stop-1 of a shared table (runs in a worker process)
+
+    Args:
+        table: Shared table description (see utils.shared_table.share_frame)
+        start: First row
+        stop: Row after the last row
+        row_steps: Steps to run (see row_step_functions)
+        decimal_places: Number of decimal places
+        save_steps: Step ids whose block outputs are returned (the last step is always returned)
+
+    Returns:
+        Tuple (dictionary step id -> DataFrame, dictionary step id -> number of output rows)
+    """
+    df = shared_table.read_shared_rows(table, start, stop)
+    outputs = {}
+    counts = {}
+    messages = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(messages), np.errstate(divide='ignore', invalid='ignore'):
+            for step, df in iter_block_steps(df, row_steps, decimal_places):
+                counts[step] = len(df)
+                if step in save_steps:
+                    outputs[step] = df.copy()
+    except BaseException:
+        print(messages.getvalue(), end='')
+        print(f"[ERROR] Rows {start}-{stop - 1} failed")
+        raise
+
+    outputs[row_steps[-1][0]] = df
+    return outputs, counts
+
+
+def run_row_steps_parallel(df, row_steps, decimal_places, save_steps, output_dir, delimiter, workers):
+    """
+    Runs row-wise steps on blocks of rows in worker processes. The table is put in shared
+    memory once (see utils.shared_table), each worker reads its own rows from it, and the
+    block results are joined in row order, so the files are the same as with run_row_steps.
+    The messages of the step functions are only shown when a block fails
+
+    Args:
+        df: Input DataFrame with numeric columns
+        row_steps: Steps to run (see row_step_functions)
+        decimal_places: Number of decimal places
+        save_steps: Step ids to save
+        output_dir: Output directory
+        delimiter: CSV delimiter
+        workers: Number of worker processes
+
+    Returns:
+        DataFrame with the result of the last step
+    """
+    ranges = shared_table.split_rows(len(df), workers)
+
+    print("\n" + "="*70)
+    print(f"STEPS {row_steps[0][0]}-{row_steps[-1][0]}: {len(ranges)} BLOCKS OF ROWS IN PARALLEL")
+    print("="*70)
+    print(f"[INFO] {len(df)} rows, {min(workers, len(ranges))} worker process(es)")
+
+    shm, table = shared_table.share_frame(df)
+    try:
+        with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as executor:
+            futures = [executor.submit(run_row_block, table, start, stop, row_steps, decimal_places, save_steps)
+                       for start, stop in ranges]
+            results = [future.result() for future in futures]
+    finally:
+        shared_table.release_shared(shm)
+
+    counts = {step: sum(block_counts[step] for _, block_counts in results) for step, _, _ in row_steps}
+    outputs = {step: pd.concat([block_outputs[step] for block_outputs, _ in results], ignore_index=True)
+               for step in results[0][0]}
+    del results
+
+    for step, _, _ in row_steps:
+        if step in save_steps:
+            save_step_output(outputs[step], step, output_dir, delimiter,
+                             decimal_places if step in ROUNDED_STEPS else None)
+
+    print_step_counts(row_steps, counts, save_steps, output_dir)
+    return outputs[row_steps[-1][0]]
+
+
+def run_float64_reference(df, threshold, noise_level, decimal_places, fused, workers=1):
+    """
+    Runs steps 05-11 on the float64 table without saving anything, to get the reference result
+    of the precision report (see utils.precision). The messages of the steps are only shown
+    when a step fails
+
+    Args:
+        df: Filled aligned DataFrame in float64 (step 04 result, changed in place)
+        threshold: BFF threshold multiplier
+        noise_level: Noise threshold applied by the fused stage (None = skip or already applied)
+        decimal_places: Number of decimal places
+        fused: Run steps 05-09 as one fused stage, like the checked run
+        workers: Worker processes for steps 05-11 (see run_row_steps)
+
+    Returns:
+        DataFrame with the float64 step 11 result
+    """
+    row_steps = row_step_functions(threshold)
+    messages = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(messages):
+            if fused:
+                df = run_background_stage(df, threshold, noise_level, decimal_places, set(), None, None)
+            else:
+                df = run_row_steps(df, row_steps[:5], decimal_places, set(), None, None, workers=workers)
+            return run_row_steps(df, row_steps[5:], decimal_places, set(), None, None, workers=workers)
+    except BaseException:
+        print(messages.getvalue(), end='')
+        print("[ERROR] Float64 reference run failed")
+        raise
+
+
+def run_pipeline(input_file, output_dir, decimal_places, threshold, noise_level=None, save_steps=('11',),
+                 fused_background=True, backend='dense', cache=False, use_input_cache=False, workers=1, timings=None,
+                 intensity_dtype='float64', precision_report=False):
+    """
+    Runs steps 01-11 in memory, only writing the step outputs that are asked for
+
+    Args:
+        input_file: Raw input file (with the 8 header lines)
+        output_dir: Directory for the saved step outputs
+        decimal_places: Number of decimal places for mass rounding (step 02)
+        threshold: BFF threshold multiplier (step 07)
+        noise_level: Optional noise threshold applied after step 04 (None = skip)
+        save_steps: Step ids whose outputs are written to output_dir (e.g. ['04', '11'])
+        fused_background: Run noise threshold + steps 05-09 as one fused stage.
+                          Steps 05-07 are run one by one when their outputs are requested
+        backend: 'dense' (DataFrame), 'sparse' (scipy.sparse table for steps 03-11) or
+                 'memmap' (memory-mapped .npy table, steps 05-11 by blocks of rows)
+        cache: Reuse the results of unchanged stages (steps 01-04 + noise threshold, steps 05-09)
+               stored in output_dir/.stage_cache (dense backend only, see utils.stage_cache)
+        use_input_cache: Reuse the parsed raw input stored in output_dir/.stage_cache (see utils.input_cache)
+        workers: Worker processes for steps 05-11 (dense backend, None = number of CPU cores, 1 = off).
+                 Steps 05-09 then run one by one on blocks of rows instead of the fused stage
+                 (see run_row_steps_parallel)
+        timings: Optional dictionary filled with the run time of each stage, in run order
+                 (e.g. '01', '02', '03-04', 'noise', '05-09', '10', '11', see stage_timer)
+        intensity_dtype: Storage of the sample columns in steps 04-11 (dense backend): 'float64' or
+                         'float32' (half the memory, totals and BFF still computed in float64,
+                         see utils.precision). The memmap backend uses config.MEMMAP_DTYPE
+        precision_report: With float32 storage, also run steps 05-11 in float64 and write the
+                          deviation of the result to output_dir/precision_report.json
+
+    Returns:
+        Final DataFrame (same content as 11_aligned_qc_filtered.csv),
+        or None with the memmap backend (the result is only written to the file)
+    """
+    save_steps = {str(step).zfill(2) for step in save_steps}
+    if backend not in ('dense', 'sparse', 'memmap'):
+        raise ValueError(f"Unknown aligned table backend: {backend} (use 'dense', 'sparse' or 'memmap')")
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Save decimal places configuration so the standalone scripts can continue from any saved step
+    config_file = os.path.join(output_dir, ".decimal_config")
+    with open(config_file, 'w') as f:
+        f.write(str(decimal_places))
+
+    if cache and backend != 'dense':
+        print(f"[INFO] Stage cache is only used with the dense backend (backend: {backend})")
+        cache = False
+
+    dtype = precision.storage_dtype(intensity_dtype)
+    if dtype != np.float64 and backend != 'dense':
+        print(f"[INFO] Intensity storage {dtype} is only used with the dense backend (backend: {backend})")
+        dtype = np.dtype(np.float64)
+
+    # The fused stage only keeps the 08/09 intermediate results
+    workers = workers or os.cpu_count() or 1
+    fused = fused_background and not (save_steps & {'05', '06', '07'}) and workers == 1
+
+    # Optional noise threshold (overwrites the step 04 output in the file-based chain)
+    # The fused stage applies it itself, unless the thresholded step 04 table must be saved
+    # or the thresholded table is cached with steps 01-04
+    noise_after_04 = noise_level is not None and (not fused or '04' in save_steps or cache)
+
+    if cache:
+        cache_dir = os.path.join(output_dir, stage_cache.CACHE_DIR_NAME)
+        code = stage_cache.code_version()
+        aligned_parts = {
+            'input': stage_cache.file_fingerprint(input_file, STAGE_CACHE_HASH_INPUT),
+            'decimal_places': decimal_places,
+            'noise_level': noise_level,
+            'code': code,
+        }
+        aligned_fingerprint = stage_cache.stage_fingerprint(stage='aligned', **aligned_parts)
+        background_parts = {'aligned': aligned_fingerprint, 'threshold': threshold, 'intensity_dtype': str(dtype),
+                            'code': code}
+        background_fingerprint = stage_cache.stage_fingerprint(stage='background', **background_parts)
+
+    # Steps 01-04 (+ noise threshold) - from the cache unless steps 01-03 must be saved
+    cached = None
+    if cache and not (save_steps & {'01', '02', '03'}):
+        with stage_timer(timings, 'cache'):
+            cached = stage_cache.load_stage(cache_dir, 'aligned', aligned_fingerprint)
+
+    if cached is not None:
+        df, delimiter = cached
+    else:
+        # Step 01: skip header lines while parsing (no rewrite of the input file)
+        print("\n" + "="*70)
+        print("STEP 01: REMOVE HEADER LINES")
+        print("="*70)
+        with stage_timer(timings, '01'):
+            if '01' in save_steps:
+                load_step('01_remove_header_lines').remove_header_lines(
+                    input_file, step_output_path('01', output_dir))
+            # Text columns only when the step 02 file must be written like the script
+            df, delimiter = read_raw_input(input_file, numeric=not (save_steps & {'01', '02'}),
+                                           cache_dir=os.path.join(output_dir, stage_cache.CACHE_DIR_NAME)
+                                           if use_input_cache else None)
+            print(f"[INFO] File loaded: {len(df)} rows, {len(df.columns)} columns")
+            validate_dataframe(df, min_columns=2, script_name="Pipeline - Step 01")
+
+        # Step 02: round mass columns
+        print("\n" + "="*70)
+        print("STEP 02: ROUND MASS COLUMNS")
+        print("="*70)
+        with stage_timer(timings, '02'):
+            df = round_mass(df, decimal_places)
+            if '02' in save_steps:
+                save_step_output(df, '02', output_dir, delimiter, decimal_places)
+
+        if backend == 'memmap':
+            with stage_timer(timings, '03-11'):
+                counts = run_memmap_stage(df, decimal_places, threshold, noise_level, save_steps | {'11'},
+                                          output_dir, delimiter, dtype=np.dtype(MEMMAP_DTYPE))
+            print(f"\n[OK] Pipeline finished: {counts['final']} rows")
+            return None
+
+        if backend == 'sparse':
+            with stage_timer(timings, '03-11'):
+                df = run_sparse_stage(df, decimal_places, threshold, noise_level, save_steps, output_dir,
+                                      delimiter)
+            print(f"\n[OK] Pipeline finished: {len(df)} rows, {len(df.columns)} columns")
+            return df
+
+        if '03' in save_steps:
+            # Step 03: sorted unique masses + empty sample columns
+            print("\n" + "="*70)
+            print("STEP 03: CREATE ALIGNED MASS LIST")
+            print("="*70)
+            with stage_timer(timings, '03'):
+                df_aligned = load_step('03_create_aligned').build_aligned_df(df, decimal_places)
+                if df_aligned is None:
+                    raise ValueError("No numeric mass values found in the input file")
+                save_step_output(df_aligned, '03', output_dir, delimiter, decimal_places)
+
+            # Step 04: fill aligned table with intensity sums
+            print("\n" + "="*70)
+            print("STEP 04: FILL ALIGNED WITH INTENSITY SUMS")
+            print("="*70)
+            with stage_timer(timings, '04'):
+                df = load_step('04_fill_aligned_intensities').fill_aligned_df(df, df_aligned, decimal_places,
+                                                                                  SAMPLE_WORKERS)
+                df = round_like_csv(df, decimal_places)
+            del df_aligned
+        else:
+            # Steps 03-04 in a single pass (no empty aligned table)
+            print("\n" + "="*70)
+            print("STEPS 03-04: ALIGN SAMPLES AND FILL INTENSITIES")
+            print("="*70)
+            with stage_timer(timings, '03-04'):
+                df = align_samples(df, decimal_places, SAMPLE_WORKERS)
+                if df is None:
+                    raise ValueError("No numeric mass values found in the input file")
+                df = round_like_csv(df, decimal_places)
+
+        if noise_after_04:
+            print("\n" + "="*70)
+            print("OPTIONAL: APPLY NOISE THRESHOLD")
+            print("="*70)
+            with stage_timer(timings, 'noise'):
+                df = load_step('noise_threshold').apply_noise_threshold_df(df, noise_level)
+
+        if cache:
+            with stage_timer(timings, 'cache'):
+                stage_cache.store_stage(cache_dir, 'aligned', aligned_fingerprint, df, delimiter, aligned_parts)
+                stage_cache.evict_stale(cache_dir, 'aligned', STAGE_CACHE_KEEP, code)
+
+    reference_input = None
+    if dtype != np.float64:
+        # Steps 04-11 keep the sample columns as float32 (the cached step 04 table stays float64)
+        print(f"\n[INFO] Intensity storage: {dtype} (totals and BFF computed in float64)")
+        if precision_report:
+            # The float64 table is only kept for the reference run after Step 11
+            reference_input = df
+        df = precision.store_intensities(df, dtype)
+
+    if '04' in save_steps:
+        # The noise threshold script saves without float_format
+        with stage_timer(timings, 'save-04'):
+            save_step_output(df, '04', output_dir, delimiter, decimal_places if noise_level is None else None)
+
+    # Steps 05-09 - from the cache unless steps 05-08 must be saved
+    row_steps = row_step_functions(threshold)
+    cached = None
+    if cache and not (save_steps & {'05', '06', '07', '08'}):
+        with stage_timer(timings, 'cache'):
+            cached = stage_cache.load_stage(cache_dir, 'background', background_fingerprint)
+
+    if cached is not None:
+        df = cached[0]
+        if '09' in save_steps:
+            with stage_timer(timings, 'save-09'):
+                save_step_output(df, '09', output_dir, delimiter, decimal_places)
+    else:
+        if fused:
+            with stage_timer(timings, '05-09'):
+                df = run_background_stage(df, threshold, None if noise_after_04 else noise_level, decimal_places,
+                                          save_steps, output_dir, delimiter, dtype)
+        else:
+            df = run_row_steps(df, row_steps[:5], decimal_places, save_steps, output_dir, delimiter, timings,
+                               workers)
+
+        if cache:
+            with stage_timer(timings, 'cache'):
+                stage_cache.store_stage(cache_dir, 'background', background_fingerprint, df, delimiter,
+                                        background_parts)
+                stage_cache.evict_stale(cache_dir, 'background', STAGE_CACHE_KEEP, code)
+
+    # Steps 10-11
+    df = run_row_steps(df, row_steps[5:], decimal_places, save_steps, output_dir, delimiter, timings, workers)
+
+    if reference_input is not None:
+        # Run after the checked run, so its intermediate tables are freed before the float64 ones are built
+        print("\n" + "="*70)
+        print(f"PRECISION REPORT: {str(dtype).upper()} VS FLOAT64")
+        print("="*70)
+        print("[INFO] Running Steps 05-11 in float64 for the precision report...")
+        with stage_timer(timings, 'reference'):
+            reference = run_float64_reference(reference_input, threshold, None if noise_after_04 else noise_level,
+                                              decimal_places, fused, workers)
+        del reference_input
+        report = precision.compare_results(reference, df, dtype)
+        precision.print_report(report)
+        print(f"[OK] Report saved: {precision.save_report(report, output_dir)}")
+
+    print(f"\n[OK] Pipeline finished: {len(df)} rows, {len(df.columns)} columns")
+    return df
+
+
+def load_step_input(step, output_dir, input_file=None, numeric=True, use_input_cache=False):
+    """
+    Reads the input of a step the same way its script does:
+    the raw file for steps 01 and 02, otherwise the saved output of the previous step
+
+    Args:
+        step: Step id ('01' to '11')
+        output_dir: Directory with the saved step outputs
+        input_file: Raw input file (steps 01 and 02, step 02 reads the saved step 01 output without it)
+        numeric: Read the raw file as float64 columns (step 01 only, see read_raw_input)
+        use_input_cache: Reuse the parsed raw input stored in output_dir/.stage_cache (step 01 only)
+
+    Returns:
+        Tuple (DataFrame, delimiter). For step 04, the DataFrame is a tuple
+        (step 02 data, step 03 aligned table), like the two inputs of script 04
+    """
+    if step == '01' or (step == '02' and input_file is not None):
+        cache_dir = os.path.join(output_dir, stage_cache.CACHE_DIR_NAME) if use_input_cache else None
+        return read_raw_input(input_file, numeric, cache_dir)
+
+    def previous_output(previous):
+        path = step_output_path(previous, output_dir)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Step {previous} output not found: {path} (run step {previous} first)")
+        print(f"[INFO] Reading step {previous} output: {path}")
+        if previous in INTERMEDIATE_STEPS:
+            return read_table_auto(path, 'utf-8')
+        return read_csv_auto(path, ENCODING)
+
+    if step == '04':
+        df_data, delimiter = previous_output('02')
+        df_aligned, _ = previous_output('03')
+        return (df_data, df_aligned), delimiter
+
+    return previous_output(f"{int(step) - 1:02d}")
+
+
+def run_step_range(output_dir, first_step, last_step, decimal_places=None, threshold=None, noise_level=None,
+                   input_file=None, save_steps=(), use_input_cache=False, chunk_size=None, workers=1, timings=None):
+    """
+    Runs the steps first_step..last_step one by one, starting from the saved output
+    of the step before first_step (like running the scripts in order, without prompts).
+    The output of last_step is always saved, so the next range can continue from it
+
+    Args:
+        output_dir: Directory with the saved step outputs
+        first_step: First step id ('01' to '11')
+        last_step: Last step id ('01' to '11')
+        decimal_places: Number of decimal places (None = read from output_dir/.decimal_config
+                        when the range starts after step 02)
+        threshold: BFF threshold multiplier (needed when step 07 is in the range)
+        noise_level: Optional noise threshold applied after step 04 (None = skip).
+                     Also applied to the saved step 04 table when the range starts at step 05
+        input_file: Raw input file (needed when the range starts at step 01, also read when it starts at step 02)
+        save_steps: Other step ids to save
+        use_input_cache: Reuse the parsed raw input stored in output_dir/.stage_cache (see utils.input_cache)
+        chunk_size: Read the saved table in blocks of this many rows and stream them through
+                    the steps (ranges starting at step 05 or later, see run_row_steps_chunked).
+                    None = whole table
+        workers: Worker processes for the steps 05-11 in the range (None = number of CPU cores, 1 = off,
+                 see run_row_steps_parallel)
+        timings: Optional dictionary filled with the run time of each step (see stage_timer)
+
+    Returns:
+        DataFrame with the result of last_step, or None with chunk_size (the result is only written to the file)
+    """
+    first, last = int(first_step), int(last_step)
+    if not 1 <= first <= last <= 11:
+        raise ValueError(f"Invalid step range: {first_step}-{last_step} (use steps 01 to 11 in order)")
+    steps = [f"{step:02d}" for step in range(first, last + 1)]
+    save_steps = {str(step).zfill(2) for step in save_steps} | {steps[-1]}
+
+    if first <= 2 and decimal_places is None:
+        raise ValueError("The number of decimal places is needed to run step 02")
+    if '07' in steps and threshold is None:
+        raise ValueError("The BFF threshold is needed to run step 07")
+    if first == 1 and input_file is None:
+        raise ValueError("The raw input file is needed to run step 01")
+    if first > 5 and noise_level is not None:
+        raise ValueError(f"The noise threshold is applied after step 04 (range starts at step {steps[0]})")
+    if chunk_size is not None and first < 5:
+        raise ValueError(f"Blocks of rows are only used for steps 05-11 (range starts at step {steps[0]})")
+
+    os.makedirs(output_dir, exist_ok=True)
+    if decimal_places is None:
+        decimal_places = get_decimal_places(output_dir)
+    else:
+        # Same file as script 02, read by the later steps
+        with open(os.path.join(output_dir, ".decimal_config"), 'w') as f:
+            f.write(str(decimal_places))
+
+    if chunk_size is not None:
+        previous = f"{first - 1:02d}"
+        input_path = step_output_path(previous, output_dir)
+        if not os.path.exists(input_path):
+            raise FileNotFoundError(f"Step {previous} output not found: {input_path} (run step {previous} first)")
+
+        print("\n" + "="*70)
+        print(f"STEPS {steps[0]}-{steps[-1]}: BLOCKS OF {chunk_size} ROWS")
+        print("="*70)
+        print(f"[INFO] Reading step {previous} output: {input_path}")
+        if noise_level is not None:
+            print(f"[INFO] Noise threshold: {noise_level} (applied to each block)")
+        with stage_timer(timings, f"{steps[0]}-{steps[-1]}"):
+            chunks, delimiter = read_table_chunks(input_path, chunk_size, 'utf-8')
+            row_steps = [row_step for row_step in row_step_functions(threshold) if row_step[0] in steps]
+            counts = run_row_steps_chunked(chunks, row_steps, decimal_places, save_steps, output_dir, delimiter,
+                                           noise_level)
+
+        print(f"\n[OK] Steps {steps[0]}-{steps[-1]} finished: {counts[steps[-1]]} rows")
+        return None
+
+    with stage_timer(timings, '01' if first == 1 else 'read'):
+        df, delimiter = load_step_input(steps[0], output_dir, input_file, numeric=not (save_steps & {'01', '02'}),
+                                        use_input_cache=use_input_cache)
+
+    if steps[0] == '05' and noise_level is not None:
+        # Thresholded step 04 table, like running noise_threshold.py before step 05
+        print("\n" + "="*70)
+        print("OPTIONAL: APPLY NOISE THRESHOLD")
+        print("="*70)
+        with stage_timer(timings, 'noise'):
+            df = load_step('noise_threshold').apply_noise_threshold_df(df, noise_level)
+
+    titles = {'01': "REMOVE HEADER LINES", '02': "ROUND MASS COLUMNS",
+              '03': "CREATE ALIGNED MASS LIST", '04': "FILL ALIGNED WITH INTENSITY SUMS"}
+    for step in [step for step in steps if step in titles]:
+        print("\n" + "="*70)
+        print(f"STEP {step}: {titles[step]}")
+        print("="*70)
+        with stage_timer(timings, step):
+            if step == '01':
+                print(f"[INFO] File loaded: {len(df)} rows, {len(df.columns)} columns")
+                validate_dataframe(df, min_columns=2, script_name="Pipeline - Step 01")
+                if '01' in save_steps:
+                    load_step('01_remove_header_lines').remove_header_lines(
+                        input_file, step_output_path('01', output_dir))
+            elif step == '02':
+                df = round_mass(df, decimal_places)
+                if '02' in save_steps:
+                    save_step_output(df, '02', output_dir, delimiter, decimal_places)
+            elif step == '03':
+                df_aligned = load_step('03_create_aligned').build_aligned_df(df, decimal_places)
+                if df_aligned is None:
+                    raise ValueError("No numeric mass values found in the input file")
+                # Step 04 needs both the step 02 data and the aligned table
+                df = (df, df_aligned)
+                if '03' in save_steps:
+                    save_step_output(df_aligned, '03', output_dir, delimiter, decimal_places)
+            else:
+                df = load_step('04_fill_aligned_intensities').fill_aligned_df(df[0], df[1], decimal_places,
+                                                                              SAMPLE_WORKERS)
+                df = round_like_csv(df, decimal_places)
+
+        if step == '04':
+            if noise_level is not None:
+                print("\n" + "="*70)
+                print("OPTIONAL: APPLY NOISE THRESHOLD")
+                print("="*70)
+                with stage_timer(timings, 'noise'):
+                    df = load_step('noise_threshold').apply_noise_threshold_df(df, noise_level)
+            if '04' in save_steps:
+                # The noise threshold script saves without float_format
+                with stage_timer(timings, '04'):
+                    save_step_output(df, '04', output_dir, delimiter,
+                                     decimal_places if noise_level is None else None)
+
+    row_steps = [row_step for row_step in row_step_functions(threshold) if row_step[0] in steps]
+    df = run_row_steps(df, row_steps, decimal_places, save_steps, output_dir, delimiter, timings, workers)
+
+    if isinstance(df, tuple):
+        # The range ended with step 03
+        df = df[1]
+
+    print(f"\n[OK] Steps {steps[0]}-{steps[-1]} finished: {len(df)} rows, {len(df.columns)} columns")
+    return df
@@ -0,0 +1,152 @@
+"""
+Float32 storage of the aligned table (dense backend, steps 04-11)
+The sample columns are kept as float32, half the memory of float64. Row totals, BFF
+statistics and the BFF subtraction are still computed in float64, only the stored values
+are rounded to float32. The precision report compares the final table with the float64
+result of the same data, to check per dataset whether float32 storage changes the result
+"""
+import json
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# Add root directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+STORAGE_DTYPES = ('float64', 'float32')
+REPORT_FILE = "precision_report.json"
+
+
+def storage_dtype(name):
+    """
+    Returns the numpy type of an intensity storage name ('float64' or 'float32')
+    """
+    if str(name) not in STORAGE_DTYPES:
+        raise ValueError(f"Unknown intensity storage type: {name} (use 'float64' or 'float32')")
+    return np.dtype(str(name))
+
+
+def store_intensities(df, dtype):
+    """
+    Converts the float sample columns of an aligned DataFrame to the storage type
+    ('Aligned' masses stay float64, the keys of the rows must stay exact)
+
+    Args:
+        df: Aligned DataFrame ('Aligned' + sample columns)
+        dtype: Storage type (see storage_dtype)
+
+    Returns:
+        DataFrame with the converted columns (the same object when nothing changes)
+    """
+    columns = [col for col in df.columns if col != 'Aligned' and df[col].dtype.kind == 'f' and df[col].dtype != dtype]
+    if not columns:
+        return df
+    return df.astype({col: dtype for col in columns})
+
+
+def sum_rows(df):
+    """
+    Sums each row like df.sum(axis=1) (NaN skipped), accumulating float32 columns in float64
+
+    pandas sums float32 columns in float32, so totals of wide float32 tables would lose
+    digits; tables without float32 columns are summed by pandas as before
+
+    Args:
+        df: DataFrame with the columns to sum
+
+    Returns:
+        Series with the sum of each row
+    """
+    if len(df.columns) == 0 or not all(dtype.kind == 'f' for dtype in df.dtypes) \
+            or not any(dtype == np.float32 for dtype in df.dtypes):
+        return df.sum(axis=1)
+    return pd.Series(np.nansum(df.to_numpy(), axis=1, dtype=np.float64), index=df.index)
+
+
+def compare_results(reference, result, dtype):
+    """
+    Measures the deviation of a result from the float64 reference result
+
+    Rows are matched by their 'Aligned' mass and the numeric columns present in both tables are
+    compared. Rows kept by only one of the two runs (a filter of step 06 or 11 that flipped) are
+    counted, not compared. The relative deviation is measured where the reference value is not 0
+
+    Args:
+        reference: Final DataFrame of the float64 run
+        result: Final DataFrame of the run to check
+        dtype: Storage type of the checked run (shown in the report)
+
+    Returns:
+        Dictionary with the row and value counts, the maximum absolute and relative deviation
+        and where they occur (mass and column)
+    """
+    reference = reference.set_index('Aligned')
+    result = result.set_index('Aligned')
+    rows = reference.index.intersection(result.index)
+    columns = [col for col in reference.columns if col in result.columns
+               and pd.api.types.is_numeric_dtype(reference[col]) and pd.api.types.is_numeric_dtype(result[col])]
+
+    expected = reference.loc[rows, columns].to_numpy(dtype=np.float64)
+    actual = result.loc[rows, columns].to_numpy(dtype=np.float64)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        same = (expected == actual) | (np.isnan(expected) & np.isnan(actual))
+        deviation = np.where(same, 0.0, np.abs(actual - expected))
+        relative = np.where(same | (expected == 0), 0.0, deviation / np.abs(expected))
+    # A NaN on one side only counts as an infinite deviation
+    deviation[np.isnan(deviation)] = np.inf
+    relative[np.isnan(relative)] = np.inf
+
+    report = {
+        'dtype': str(dtype),
+        'rows_reference': len(reference),
+        'rows_result': len(result),
+        'rows_compared': len(rows),
+        'rows_only_reference': len(reference) - len(rows),
+        'rows_only_result': len(result) - len(rows),
+        'values_compared': int(deviation.size),
+        'values_different': int(np.count_nonzero(~same)),
+        'nonzero_where_reference_zero': int(np.count_nonzero((expected == 0) & ~same)),
+    }
+    for name, values in (('abs', deviation), ('rel', relative)):
+        report[f'max_{name}_deviation'] = 0.0
+        report[f'max_{name}_deviation_at'] = None
+        if values.size and values.max() > 0:
+            row, col = np.unravel_index(np.argmax(values), values.shape)
+            report[f'max_{name}_deviation'] = float(values[row, col])
+            report[f'max_{name}_deviation_at'] = {'aligned': float(rows[row]), 'column': str(columns[col])}
+
+    return report
+
+
+def print_report(report):
+    """
+    Prints the precision report returned by compare_results
+    """
+    print(f"[INFO] Rows compared: {report['rows_compared']} "
+          f"(float64: {report['rows_reference']}, {report['dtype']}: {report['rows_result']})")
+    print(f"[INFO] Values different from float64: {report['values_different']}/{report['values_compared']}")
+    for name, title in (('abs', "absolute"), ('rel', "relative")):
+        where = report[f'max_{name}_deviation_at']
+        at = f" (mass {where['aligned']}, column '{where['column']}')" if where else ""
+        print(f"[INFO] Max {title} deviation: {report[f'max_{name}_deviation']:.6g}{at}")
+
+    if report['rows_only_reference'] or report['rows_only_result']:
+        print(f"[WARNING] The filters kept other rows: {report['rows_only_reference']} rows only in the "
+              f"float64 result, {report['rows_only_result']} rows only in the {report['dtype']} result")
+    if report['nonzero_where_reference_zero']:
+        print(f"[WARNING] {report['nonzero_where_reference_zero']} values are not 0 where the float64 result is 0")
+
+
+def save_report(report, output_dir):
+    """
+    Writes the precision report as JSON to output_dir/precision_report.json
+
+    Returns:
+        Path of the report file
+    """
+    output_file = os.path.join(output_dir, REPORT_FILE)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    return output_file
@@ -0,0 +1,122 @@
+"""
+Instrument header layout of the raw export
+The raw file starts with 8 header lines: line 2 holds the sample names, line 8 the
+'Mass'/'Intensity' column headers, and the data starts at line 9. The layout is read
+once from the first lines (byte offsets included), so the data lines can be parsed
+straight from the raw file without writing a copy without the header
+"""
+import json
+import os
+import sys
+import pandas as pd
+
+# Add root directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.compression import compression_of, open_binary
+from utils.csv_helper import detect_delimiter
+from utils.parallel_csv import read_csv_parallel
+
+# Line indexes (start at 0, so line 2 = index 1, line 8 = index 7)
+HEADER_LINES = 8
+NAMES_LINE = 1  # line 2: sample names
+LABELS_LINE = 7  # line 8: Mass/Intensity column headers
+COLUMN_LABELS = {'mass', 'intensity'}
+
+
+def is_label_line(line, delimiter):
+    """
+    Returns True if every non-empty field of the line is a Mass/Intensity column header
+    """
+    fields = [field.strip().strip('"').lower() for field in line.split(delimiter)]
+    fields = [field for field in fields if field]
+    return bool(fields) and all(field in COLUMN_LABELS for field in fields)
+
+
+def read_header_layout(file_path, encoding='utf-8-sig'):
+    """
+    Reads the header layout of a raw export (only the first lines are read, also from
+    .gz, .xz and .zst files; the byte offsets are positions in the decompressed data)
+
+    A file whose second line already holds the column headers (the header lines were
+    removed before, e.g. by an older version of step 01) is read with its sample names
+    on line 1 and its data from line 3
+
+    Args:
+        file_path: Path to the raw export
+        encoding: File encoding
+
+    Returns:
+        Dictionary with the delimiter, the sample names (column names as pandas reads them,
+        duplicates get a '.1' suffix), the column headers, the line indexes and byte offsets
+        of the names, headers and first data line, and the file size
+    """
+    delimiter = detect_delimiter(file_path, encoding, line_index=NAMES_LINE)
+
+    lines = []
+    offsets = []
+    with open_binary(file_path) as f:
+        for _ in range(HEADER_LINES + 1):
+            offsets.append(f.tell())
+            lines.append(f.readline().decode(encoding, errors='replace').rstrip('\r\n'))
+
+    if is_label_line(lines[1], delimiter):
+        names_line, labels_line = 0, 1
+    else:
+        names_line, labels_line = NAMES_LINE, LABELS_LINE
+
+    sample_names = list(pd.read_csv(file_path, delimiter=delimiter, encoding=encoding, skiprows=names_line,
+                                    nrows=0).columns)
+
+    return {
+        'input': os.path.abspath(file_path),
+        'size': os.path.getsize(file_path),
+        'delimiter': delimiter,
+        'sample_names': [str(name) for name in sample_names],
+        'column_headers': lines[labels_line].split(delimiter),
+        'names_line': names_line,
+        'labels_line': labels_line,
+        'data_line': labels_line + 1,
+        'labels_offset': offsets[labels_line],
+        'data_offset': offsets[labels_line + 1],
+    }
+
+
+def save_header_layout(layout, output_file):
+    """
+    Saves the header layout as JSON
+
+    Args:
+        layout: Dictionary returned by read_header_layout
+        output_file: Path of the .json file
+    """
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(layout, f, indent=2, ensure_ascii=False)
+
+
+def read_text_columns(file_path, layout, encoding='utf-8-sig', workers=1, min_parallel_size=0):
+    """
+    Reads the column headers and data lines as text columns, named after the samples,
+    starting at the byte offset of the column header line (the lines before are not parsed)
+
+    Args:
+        file_path: Path to the raw export
+        layout: Dictionary returned by read_header_layout
+        encoding: File encoding
+        workers: Number of worker processes for large files (see utils.parallel_csv)
+        min_parallel_size: Files smaller than this (bytes) are parsed in this process
+
+    Returns:
+        DataFrame (same content as pd.read_csv of the file without the other header lines)
+    """
+    if workers > 1 and layout['size'] >= min_parallel_size and compression_of(file_path) is None:
+        skip_lines = [i for i in range(layout['data_line'])
+                      if i not in (layout['names_line'], layout['labels_line'])]
+        return read_csv_parallel(file_path, layout['delimiter'], encoding, skiprows=skip_lines,
+                                 header_lines=layout['data_line'], workers=workers)
+
+    # Compressed files are decompressed while reading (the seek skips the header lines)
+    with open_binary(file_path) as f:
+        f.seek(layout['labels_offset'])
+        return pd.read_csv(f, delimiter=layout['delimiter'], encoding=encoding, header=None,
+                           names=layout['sample_names'], index_col=False, low_memory=False)
@@ -0,0 +1,107 @@
+"""
+Shared-memory tables for worker processes
+The numeric columns of a DataFrame are copied once into a multiprocessing.shared_memory
+block (one contiguous float64 row per column). Worker processes attach to the block by
+name and copy out only their own rows, so the table is never pickled to the workers
+"""
+import os
+import sys
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+
+# Add root directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MIN_BLOCK_ROWS = 1000  # Smaller blocks are not worth a worker process
+
+
+def can_share(df):
+    """
+    Returns True if every column of the DataFrame can be stored as float64 and restored exactly
+    (float and integer columns; text, boolean and date columns cannot)
+    """
+    return all(pd.api.types.is_float_dtype(dtype)
+               or (pd.api.types.is_integer_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype))
+               for dtype in df.dtypes)
+
+
+def share_frame(df):
+    """
+    Copies the columns of a DataFrame into a new shared memory block
+
+    Args:
+        df: DataFrame with numeric columns (see can_share)
+
+    Returns:
+        Tuple (SharedMemory, table description passed to the workers: block name, shape,
+        column names and types). The caller must call release_shared when done
+    """
+    shape = (len(df.columns), len(df))
+    shm = shared_memory.SharedMemory(create=True, size=max(shape[0] * shape[1] * 8, 1))
+    try:
+        matrix = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        for i, col in enumerate(df.columns):
+            matrix[i] = df[col].to_numpy(dtype=np.float64)
+        del matrix
+    except BaseException:
+        release_shared(shm)
+        raise
+
+    table = {
+        'name': shm.name,
+        'shape': shape,
+        'columns': list(df.columns),
+        'dtypes': [str(dtype) for dtype in df.dtypes],
+    }
+    return shm, table
+
+
+def read_shared_rows(table, start, stop):
+    """
+    Copies rows start..stop-1 of a shared table into a DataFrame (runs in a worker process)
+
+    Args:
+        table: Table description returned by share_frame
+        start: First row
+        stop: Row after the last row
+
+    Returns:
+        DataFrame with the original column names and types
+    """
+    shm = shared_memory.SharedMemory(name=table['name'])
+    try:
+        matrix = np.ndarray(table['shape'], dtype=np.float64, buffer=shm.buf)
+        df = pd.DataFrame({col: matrix[i, start:stop].astype(dtype)
+                           for i, (col, dtype) in enumerate(zip(table['columns'], table['dtypes']))})
+        # The block can only be closed once no array points into it
+        del matrix
+    finally:
+        shm.close()
+
+    return df
+
+
+def release_shared(shm):
+    """
+    Closes and removes a shared memory block created by share_frame
+    """
+    shm.close()
+    shm.unlink()
+
+
+def split_rows(rows, parts, min_rows=MIN_BLOCK_ROWS):
+    """
+    Splits rows 0..rows-1 into about `parts` blocks of consecutive rows
+
+    Args:
+        rows: Number of rows
+        parts: Number of blocks wanted
+        min_rows: Minimum number of rows per block
+
+    Returns:
+        List of (start, stop) row ranges covering the rows, in order
+    """
+    parts = max(1, min(parts, rows // max(min_rows, 1)))
+    bounds = np.linspace(0, rows, parts + 1).round().astype(int)
+    return [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
@@ -0,0 +1,256 @@
+"""
+Sparse backend for the aligned intensity table
+After step 04 most cells are 0 (each sample only has signal at a small part of the
+aligned masses), so the (masses x samples) table is kept as a scipy.sparse CSR matrix
+through the optional noise threshold and steps 05-11. Only saved outputs are densified
+"""
+import os
+import sys
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Add root directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import SAMPLE_WORKERS
+from utils.alignment import collect_sample_triplets, sum_triplets, keys_to_masses
+from utils.csv_helper import round_as_written
+
+
+def stored_mask(values):
+    """
+    Finds the cells a sparse matrix has to store: everything except +0.0
+    (-0.0 is kept because the CSV writes it as '-0.00')
+
+    Args:
+        values: Float array
+
+    Returns:
+        Boolean array with the same shape
+    """
+    values = np.asarray(values, dtype=np.float64)
+    return (values != 0) | np.signbit(values)
+
+
+def to_sparse(values):
+    """
+    Converts a dense (rows x sample columns) array to a CSR matrix
+
+    Args:
+        values: 2D float array
+
+    Returns:
+        scipy.sparse CSR matrix (float64)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    rows, cols = np.nonzero(stored_mask(values))
+    return sparse.csr_matrix((values[rows, cols], (rows, cols)), shape=values.shape)
+
+
+def to_dense(matrix):
+    """
+    Converts a CSR matrix to a dense array
+    (toarray() adds the stored values to a zero buffer, which turns -0.0 into 0.0)
+
+    Args:
+        matrix: scipy.sparse CSR matrix without duplicate entries
+
+    Returns:
+        2D float64 array
+    """
+    values = np.zeros(matrix.shape, dtype=np.float64)
+    rows = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+    values[rows, matrix.indices] = matrix.data
+    return values
+
+
+def drop_zeros(matrix):
+    """
+    Removes the stored +0.0 entries of a CSR matrix
+    (unlike eliminate_zeros, -0.0 entries are kept)
+
+    Args:
+        matrix: scipy.sparse CSR matrix
+
+    Returns:
+        CSR matrix without stored +0.0 entries
+    """
+    keep = stored_mask(matrix.data)
+    if keep.all():
+        return matrix
+
+    rows = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+    indptr = np.concatenate([[0], np.cumsum(np.bincount(rows[keep], minlength=matrix.shape[0]))])
+    return sparse.csr_matrix((matrix.data[keep], matrix.indices[keep], indptr), shape=matrix.shape)
+
+
+def align_samples_sparse(df_data, decimal_places):
+    """
+    Single-pass alignment (see utils.alignment.align_samples) into a sparse matrix,
+    without ever building the dense (masses x samples) table
+
+    Args:
+        df_data: DataFrame with rounded Mass/Intensity column pairs (step 02 result)
+        decimal_places: Number of decimal places (from .decimal_config)
+
+    Returns:
+        Tuple (aligned, sample_headers, matrix) with the aligned masses and a CSR matrix
+        of the filled intensities, or None if no numeric mass values were found
+    """
+    collected = collect_sample_triplets(df_data, decimal_places, SAMPLE_WORKERS)
+    if collected is None:
+        return None
+    sorted_keys, sample_headers, mass_index, sample_index, values = collected
+
+    print(f"[INFO] Building sparse aligned matrix...")
+    n_samples = len(sample_headers)
+    cells, sums = sum_triplets(mass_index, sample_index, values, n_samples)
+    matrix = sparse.csr_matrix((sums, (cells // n_samples, cells % n_samples)),
+                               shape=(len(sorted_keys), n_samples))
+    matrix = drop_zeros(matrix)
+
+    print(f"[OK] Total distinct masses: {matrix.shape[0]}")
+    print(f"[OK] Total sample columns: {n_samples}")
+    print(f"[OK] Stored (non-zero) cells: {matrix.nnz} of {matrix.shape[0] * n_samples}")
+
+    return keys_to_masses(sorted_keys, decimal_places), sample_headers, matrix
+
+
+def round_stored(matrix, decimal_places):
+    """
+    Rounds the stored values like the scripts' float_format (implicit zeros stay 0)
+
+    Args:
+        matrix: scipy.sparse CSR matrix (modified in place)
+        decimal_places: Number of decimal places
+
+    Returns:
+        The same matrix
+    """
+    matrix.data = round_as_written(matrix.data, decimal_places)
+    return matrix
+
+
+def apply_noise_sparse(matrix, noise_level):
+    """
+    Sets values <= noise_level to 0 (same rule as noise_threshold.py)
+
+    Args:
+        matrix: scipy.sparse CSR matrix
+        noise_level: Threshold value
+
+    Returns:
+        CSR matrix without the removed values
+    """
+    matrix = matrix.copy()
+    matrix.data[~(matrix.data > noise_level)] = 0
+    return drop_zeros(matrix)
+
+
+def row_totals(matrix, column_indexes=None):
+    """
+    Sums each row over all columns or a subset of columns (steps 05 and 10)
+
+    Args:
+        matrix: scipy.sparse CSR matrix
+        column_indexes: Optional list of column indexes to sum (None = all columns)
+
+    Returns:
+        1D float64 array with the total of each row
+    """
+    if column_indexes is not None:
+        if len(column_indexes) == 0:
+            return np.zeros(matrix.shape[0], dtype=np.float64)
+        matrix = matrix[:, column_indexes]
+    return np.asarray(matrix.sum(axis=1), dtype=np.float64).ravel()
+
+
+def column_block(matrix, column_indexes):
+    """
+    Densifies a few columns (e.g. the Blank columns used for BFF in step 07)
+
+    Args:
+        matrix: scipy.sparse CSR matrix
+        column_indexes: List of column indexes
+
+    Returns:
+        2D float64 array (rows x selected columns)
+    """
+    return to_dense(matrix[:, column_indexes])
+
+
+def subtract_and_clip(matrix, bff, subtract_mask, decimal_places=None):
+    """
+    Subtracts the BFF of each row from the subtract columns (step 08), then sets
+    negative values to zero (step 09)
+
+    An implicit zero becomes max(0 - BFF, 0), which is 0 unless BFF < 0: only those
+    rows get new stored entries. Rows where BFF is NaN are left untouched
+
+    Args:
+        matrix: scipy.sparse CSR matrix (rows x sample columns)
+        bff: 1D array with the BFF of each row
+        subtract_mask: Boolean array, True for the columns BFF is subtracted from
+        decimal_places: Round subtracted values like the scripts' float_format (None = no rounding)
+
+    Returns:
+        CSR matrix with the step 09 values
+    """
+    bff = np.asarray(bff, dtype=np.float64)
+    subtract_mask = np.asarray(subtract_mask, dtype=bool)
+    matrix = matrix.tocsr(copy=True)
+    matrix.sort_indices()
+    valid_rows = ~np.isnan(bff)
+
+    # Stored entries
+    rows = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+    subtract = valid_rows[rows] & subtract_mask[matrix.indices]
+    subtracted = matrix.data[subtract] - bff[rows[subtract]]
+    if decimal_places is not None:
+        subtracted = round_as_written(subtracted, decimal_places)
+    matrix.data[subtract] = subtracted
+
+    # Implicit zeros of rows with a negative BFF become positive values
+    negative_rows = np.flatnonzero(valid_rows & (bff < 0))
+    if len(negative_rows) > 0:
+        pattern = matrix[negative_rows]
+        pattern.data = np.ones_like(pattern.data)
+        missing = (pattern.toarray() == 0) & subtract_mask
+        extra_rows, extra_cols = np.nonzero(missing)
+        extra_values = 0 - bff[negative_rows[extra_rows]]
+        if decimal_places is not None:
+            extra_values = round_as_written(extra_values, decimal_places)
+
+        coo = matrix.tocoo()
+        matrix = sparse.csr_matrix(
+            (np.concatenate([coo.data, extra_values]),
+             (np.concatenate([coo.row, negative_rows[extra_rows]]), np.concatenate([coo.col, extra_cols]))),
+            shape=matrix.shape)
+        matrix.sort_indices()
+
+    # Negatives to zero (-0.0 is not < 0 and stays, like in step 09)
+    matrix.data[matrix.data < 0] = 0
+
+    return drop_zeros(matrix)
+
+
+def to_frame(aligned, columns, matrix, bff=None):
+    """
+    Densifies the sparse table into the aligned DataFrame layout (for saving)
+
+    Args:
+        aligned: 1D array of aligned masses
+        columns: Sample column names
+        matrix: scipy.sparse matrix (rows x sample columns)
+        bff: Optional 1D array with the BFF of each row (adds the 'BFF' column)
+
+    Returns:
+        DataFrame ('Aligned', sample columns[, 'BFF'])
+    """
+    df = pd.DataFrame(to_dense(matrix.tocsr()), columns=columns)
+    df.insert(0, 'Aligned', aligned)
+    if bff is not None:
+        df['BFF'] = bff
+    return df
+
@@ -0,0 +1,180 @@
+"""
+Stage cache for the pipeline runner
+Each cached stage result is stored in OUTPUT_DIR/.stage_cache with a fingerprint of
+everything it depends on (input file, parameters, code version). When a stage is run
+again with the same fingerprint, its stored result is loaded instead of recomputed
+"""
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+
+# Add root directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.table_io import read_table_auto, save_table, header_path
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR_NAME = ".stage_cache"
+CODE_DIRS = ["scripts", "utils"]
+
+# SHA-256 of the files hashed in this process, by (path, size, modification time)
+_content_hashes = {}
+
+
+def file_fingerprint(file_path, hash_content=True):
+    """
+    Fingerprint of an input file
+
+    Args:
+        file_path: Path to the file
+        hash_content: True = SHA-256 of the content, False = size and modification time only (faster)
+
+    Returns:
+        Fingerprint string
+    """
+    stat = os.stat(file_path)
+    if not hash_content:
+        return f"size={stat.st_size};mtime={stat.st_mtime_ns}"
+
+    # The same unchanged file is only hashed once (stage cache + parsed input cache)
+    key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    if key not in _content_hashes:
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        _content_hashes[key] = f"sha256={digest.hexdigest()}"
+
+    return _content_hashes[key]
+
+
+def code_version():
+    """
+    Fingerprint of the processing code (all .py files in scripts/ and utils/),
+    so cached results are not reused after the code changes
+
+    Returns:
+        SHA-256 hex string
+    """
+    digest = hashlib.sha256()
+    for code_dir in CODE_DIRS:
+        for path in sorted(glob.glob(os.path.join(BASE_DIR, code_dir, "*.py"))):
+            digest.update(os.path.relpath(path, BASE_DIR).replace(os.sep, '/').encode())
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+
+    return digest.hexdigest()
+
+
+def stage_fingerprint(**parts):
+    """
+    Combines everything a stage depends on into one fingerprint
+
+    Args:
+        **parts: JSON-serializable values (file fingerprints, parameters, code version, ...)
+
+    Returns:
+        SHA-256 hex string
+    """
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+
+def _entry_paths(cache_dir, stage, fingerprint):
+    """
+    Returns the artifact and the fingerprint record of one cache entry
+    """
+    base = os.path.join(cache_dir, f"{stage}-{fingerprint[:16]}")
+    return base + ".npz", base + ".fingerprint.json"
+
+
+def load_stage(cache_dir, stage, fingerprint):
+    """
+    Loads the cached result of a stage if its fingerprint matches
+
+    Args:
+        cache_dir: Cache directory
+        stage: Stage name (e.g. 'aligned')
+        fingerprint: Current fingerprint of the stage (see stage_fingerprint)
+
+    Returns:
+        Tuple (DataFrame, delimiter), or None when there is no matching entry
+    """
+    artifact, record = _entry_paths(cache_dir, stage, fingerprint)
+    if not (os.path.exists(artifact) and os.path.exists(record)):
+        return None
+
+    with open(record, 'r', encoding='utf-8') as f:
+        if json.load(f).get('fingerprint') != fingerprint:
+            return None
+
+    # Mark as recently used (eviction removes the least recently used entries)
+    os.utime(record)
+
+    print(f"[CACHE] Stage '{stage}' unchanged - reusing {artifact}")
+    return read_table_auto(artifact)
+
+
+def store_stage(cache_dir, stage, fingerprint, df, delimiter, parts=None):
+    """
+    Stores the result of a stage with its fingerprint record
+
+    Args:
+        cache_dir: Cache directory
+        stage: Stage name (e.g. 'aligned')
+        fingerprint: Fingerprint of the stage (see stage_fingerprint)
+        df: Stage result
+        delimiter: CSV delimiter of the data
+        parts: Optional dictionary with the fingerprint inputs (written to the record for reference)
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    artifact, record = _entry_paths(cache_dir, stage, fingerprint)
+
+    # Full precision, so the reused result is identical to the computed one
+    save_table(df, artifact, delimiter)
+    with open(record, 'w', encoding='utf-8') as f:
+        json.dump({'stage': stage, 'fingerprint': fingerprint, 'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+                   'inputs': parts or {}}, f, indent=2)
+
+    print(f"[CACHE] Stage '{stage}' stored: {artifact}")
+
+
+def evict_stale(cache_dir, stage, keep, code=None):
+    """
+    Deletes old entries of a stage: entries made with another code version
+    and all but the `keep` most recently used ones
+
+    Args:
+        cache_dir: Cache directory
+        stage: Stage name
+        keep: Number of entries to keep
+        code: Current code version (entries with another version are always deleted)
+
+    Returns:
+        Number of deleted entries
+    """
+    records = glob.glob(os.path.join(cache_dir, f"{stage}-*.fingerprint.json"))
+    records.sort(key=os.path.getmtime, reverse=True)
+
+    removed = 0
+    for i, record in enumerate(records):
+        try:
+            with open(record, 'r', encoding='utf-8') as f:
+                entry_code = json.load(f).get('inputs', {}).get('code')
+        except (ValueError, IOError):
+            entry_code = None
+
+        if i < keep and (code is None or entry_code == code):
+            continue
+
+        artifact = record[:-len(".fingerprint.json")] + ".npz"
+        for path in (artifact, header_path(artifact), record):
+            if os.path.exists(path):
+                os.remove(path)
+        removed += 1
+
+    if removed:
+        print(f"[CACHE] Removed {removed} stale '{stage}' entr{'y' if removed == 1 else 'ies'}")
+    return removed
@@ -0,0 +1,132 @@
+"""
+Parameter sweep over decimal places (step 02) and BFF thresholds (step 07)
+Shares the common work between combinations: the input is parsed once, the samples
+are aligned once per number of decimal places, and the Blank mean / standard deviation
+are calculated once per number of decimal places and reused by every threshold
+"""
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# Add root directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import SAMPLE_WORKERS
+from utils.csv_helper import validate_dataframe, round_as_written
+from utils.alignment import align_samples
+from utils.background import correct_background
+from utils.bff import find_blank_columns, blank_statistics
+from utils.pipeline import (load_step, read_raw_input, round_mass, round_like_csv, build_aligned_frame,
+                            row_step_functions, run_row_steps)
+from utils.table_io import output_csv_path, save_table
+from utils.stage_cache import CACHE_DIR_NAME
+
+SWEEP_DIR_NAME = "sweep"
+SUMMARY_FILE = "sweep_summary.csv"
+
+
+def sweep_file_name(decimal_places, threshold):
+    """
+    Returns the name of the final table of one combination
+
+    Args:
+        decimal_places: Number of decimal places
+        threshold: BFF threshold multiplier
+
+    Returns:
+        File name (e.g. '11_aligned_qc_filtered_dp3_thr10.csv')
+    """
+    return f"11_aligned_qc_filtered_dp{decimal_places}_thr{threshold:g}.csv"
+
+
+def run_sweep(input_file, output_dir, decimal_places_list, thresholds, noise_level=None, use_input_cache=False):
+    """
+    Runs steps 01-11 for every combination of decimal places and BFF threshold
+
+    Args:
+        input_file: Raw input file (with the 8 header lines)
+        output_dir: Directory for the results (a 'sweep' folder is created inside)
+        decimal_places_list: Numbers of decimal places to try (step 02)
+        thresholds: BFF threshold multipliers to try (step 07)
+        noise_level: Optional noise threshold applied after step 04 (None = skip)
+        use_input_cache: Reuse the parsed raw input stored in output_dir/.stage_cache (see utils.input_cache)
+
+    Returns:
+        Summary DataFrame with one row per combination
+        (decimal_places, threshold, aligned_rows, rows_after_step_06, rows_after_step_11, output_file)
+    """
+    sweep_dir = os.path.join(output_dir, SWEEP_DIR_NAME)
+    os.makedirs(sweep_dir, exist_ok=True)
+
+    # Step 01: parse once
+    print("\n" + "="*70)
+    print("STEP 01: READ INPUT (ONCE FOR ALL COMBINATIONS)")
+    print("="*70)
+    df_input, delimiter = read_raw_input(input_file, cache_dir=os.path.join(output_dir, CACHE_DIR_NAME)
+                                         if use_input_cache else None)
+    print(f"[INFO] File loaded: {len(df_input)} rows, {len(df_input.columns)} columns")
+    validate_dataframe(df_input, min_columns=2, script_name="Sweep - Step 01")
+
+    summary = []
+    for decimal_places in decimal_places_list:
+        # Steps 02-04 (+ noise threshold): once per number of decimal places
+        print("\n" + "="*70)
+        print(f"STEPS 02-04: ROUND AND ALIGN ({decimal_places} DECIMAL PLACES)")
+        print("="*70)
+        df = round_mass(df_input.copy(), decimal_places)
+        df = align_samples(df, decimal_places, SAMPLE_WORKERS)
+        if df is None:
+            raise ValueError("No numeric mass values found in the input file")
+        df = round_like_csv(df, decimal_places)
+        if noise_level is not None:
+            df = load_step('noise_threshold').apply_noise_threshold_df(df, noise_level)
+
+        # Steps 05/06: keep rows with Total > 0 (does not depend on the threshold)
+        columns = list(df.columns[1:])
+        values = df[columns].to_numpy(dtype=np.float64)
+        total = round_as_written(values.sum(axis=1), decimal_places)
+        keep = total > 0
+        aligned = df['Aligned'].to_numpy()[keep]
+        values = values[keep]
+        print(f"[OK] Rows after step 06: {len(values)} of {len(keep)}")
+
+        # Step 07: Blank statistics, shared by all thresholds
+        blank_idx = [columns.index(col) for col in find_blank_columns(columns)]
+        if len(blank_idx) == 0:
+            raise ValueError("No columns with 'Blank' found (excluding 'BlankExt')")
+        mean, std = blank_statistics(values[:, blank_idx])
+
+        for threshold in thresholds:
+            print("\n" + "="*70)
+            print(f"STEPS 07-11: {decimal_places} DECIMAL PLACES, THRESHOLD {threshold:g}")
+            print("="*70)
+
+            # Steps 07-09 with BFF = mean + (threshold × std_dev)
+            result, bff, _, _ = correct_background(values, columns, bff=mean + (threshold * std),
+                                                   decimal_places=decimal_places)
+            df_final = build_aligned_frame(aligned, columns, result, bff)
+
+            # Steps 10-11
+            df_final = run_row_steps(df_final, row_step_functions(threshold)[5:], decimal_places,
+                                     set(), sweep_dir, delimiter)
+
+            output_file = output_csv_path(os.path.join(sweep_dir, sweep_file_name(decimal_places, threshold)))
+            save_table(df_final, output_file, delimiter)
+            print(f"[OK] Final table saved: {output_file}")
+
+            summary.append({
+                'decimal_places': decimal_places,
+                'threshold': threshold,
+                'aligned_rows': len(keep),
+                'rows_after_step_06': len(values),
+                'rows_after_step_11': len(df_final),
+                'output_file': os.path.basename(output_file),
+            })
+
+    df_summary = pd.DataFrame(summary)
+    summary_file = os.path.join(sweep_dir, SUMMARY_FILE)
+    save_table(df_summary, summary_file, delimiter)
+    print(f"\n[OK] Sweep summary saved: {summary_file}")
+
+    return df_summary
@@ -0,0 +1,307 @@
+"""
+Reading and writing the intermediate tables between steps (03 to 10)
+The format is set by config.INTERMEDIATE_FORMAT:
+- 'csv': text files, like the final output (readable in Excel)
+- 'npz': numpy binary file + .header.json sidecar (no extra packages needed)
+- 'feather' / 'parquet': columnar binary files (need pyarrow) + .header.json sidecar
+
+Binary files store the values the CSV would give back when read: float columns are
+rounded like float_format, text columns go through the same CSV parsing
+
+With config.OUTPUT_COMPRESSION, CSV files are written compressed (.csv.gz, .csv.xz,
+.csv.zst) and .npz files with np.savez_compressed
+"""
+import io
+import json
+import os
+import sys
+import zipfile
+import numpy as np
+import pandas as pd
+
+# Add root directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import INTERMEDIATE_FORMAT, OUTPUT_COMPRESSION
+from utils.compression import compressed_path, strip_compression, check_compression
+from utils.csv_helper import read_csv_auto, round_as_written, detect_delimiter
+
+INTERMEDIATE_FORMATS = {'csv': '.csv', 'npz': '.npz', 'feather': '.feather', 'parquet': '.parquet'}
+
+
+def output_csv_path(csv_path, compression=None):
+    """
+    Returns the path of a CSV step output with the configured compression
+
+    Args:
+        csv_path: Path with the .csv name used by the scripts (e.g. OUTPUT/11_aligned_qc_filtered.csv)
+        compression: 'gzip', 'xz', 'zstd' (default: config.OUTPUT_COMPRESSION)
+
+    Returns:
+        Path with the compression extension (e.g. .csv.gz), or csv_path without compression
+    """
+    return compressed_path(csv_path, compression or OUTPUT_COMPRESSION)
+
+
+def intermediate_path(csv_path, file_format=None):
+    """
+    Returns the path of an intermediate step file in the configured format
+
+    Args:
+        csv_path: Path with the .csv name used by the scripts (e.g. OUTPUT/05_aligned_with_total.csv)
+        file_format: 'csv', 'npz', 'feather' or 'parquet' (default: config.INTERMEDIATE_FORMAT)
+
+    Returns:
+        Path with the extension of the format (CSV files: with the configured compression)
+    """
+    file_format = file_format or INTERMEDIATE_FORMAT
+    if file_format not in INTERMEDIATE_FORMATS:
+        raise ValueError(f"Unknown intermediate format: {file_format} "
+                         f"(use one of: {', '.join(INTERMEDIATE_FORMATS)})")
+
+    path = os.path.splitext(strip_compression(csv_path))[0] + INTERMEDIATE_FORMATS[file_format]
+    return output_csv_path(path) if file_format == 'csv' else path
+
+
+def check_intermediate_format(file_format=None):
+    """
+    Checks that the intermediate format is known and that its optional package is installed
+    ('feather' and 'parquet' need pyarrow), so a wrong setting stops the run before Step 01
+
+    Args:
+        file_format: 'csv', 'npz', 'feather' or 'parquet' (default: config.INTERMEDIATE_FORMAT)
+
+    Raises:
+        ValueError: Unknown format
+        ImportError: pyarrow is not installed
+    """
+    file_format = file_format or INTERMEDIATE_FORMAT
+    if file_format not in INTERMEDIATE_FORMATS:
+        raise ValueError(f"Unknown intermediate format: {file_format} "
+                         f"(use one of: {', '.join(INTERMEDIATE_FORMATS)})")
+    if file_format in ('feather', 'parquet'):
+        try:
+            import pyarrow
+        except ImportError:
+            raise ImportError(f"INTERMEDIATE_FORMAT = '{file_format}' needs the pyarrow package "
+                              "(pip install pyarrow), or use 'npz' / 'csv'") from None
+
+
+def check_output_settings():
+    """
+    Checks the output settings of config.py before a run starts (see check_intermediate_format
+    and utils.compression.check_compression)
+
+    Raises:
+        ValueError / ImportError: with a message naming the setting to change
+    """
+    check_intermediate_format(INTERMEDIATE_FORMAT)
+    check_compression(OUTPUT_COMPRESSION, f"OUTPUT_COMPRESSION = '{OUTPUT_COMPRESSION}'")
+
+
+def header_path(file_path):
+    """
+    Returns the path of the header sidecar of a binary table file
+
+    Args:
+        file_path: Binary table file path
+
+    Returns:
+        Path of the .header.json file
+    """
+    return os.path.splitext(file_path)[0] + ".header.json"
+
+
+def _decimal_places(float_format):
+    """
+    Extracts N from a '%.Nf' float_format (None when there is no float_format)
+    """
+    if float_format is None:
+        return None
+    return int(float_format.strip('%.f'))
+
+
+def _csv_roundtrip(df, float_format):
+    """
+    Returns the columns as read_csv would read them back after to_csv
+    """
+    text = df.to_csv(index=False, float_format=float_format)
+    return pd.read_csv(io.StringIO(text), low_memory=False)
+
+
+def save_table(df, file_path, delimiter, float_format=None):
+    """
+    Saves a step table in the format given by the file extension
+    (.csv, .npz, .feather or .parquet; .csv.gz, .csv.xz and .csv.zst are compressed CSV files)
+
+    Args:
+        df: DataFrame to save
+        file_path: Output file path (see intermediate_path)
+        delimiter: CSV delimiter (kept in the header sidecar of binary files)
+        float_format: Optional float format (e.g. '%.2f'), as used by to_csv
+    """
+    extension = os.path.splitext(strip_compression(file_path))[1].lower()
+
+    if extension == '.csv':
+        if float_format is not None:
+            df.to_csv(file_path, sep=delimiter, encoding='utf-8', index=False, float_format=float_format)
+        else:
+            df.to_csv(file_path, sep=delimiter, encoding='utf-8', index=False)
+        return
+
+    decimal_places = _decimal_places(float_format)
+    columns = [str(col) for col in df.columns]
+    text_columns = [col for col in df.columns if not pd.api.types.is_numeric_dtype(df[col])]
+
+    arrays = {}
+    for i, col in enumerate(df.columns):
+        if col in text_columns:
+            continue
+        values = df[col].to_numpy()
+        if decimal_places is not None and values.dtype.kind == 'f':
+            values = round_as_written(values, decimal_places)
+        arrays[f"c{i}"] = values
+
+    header = {
+        'columns': columns,
+        'text_columns': [columns[list(df.columns).index(col)] for col in text_columns],
+        'delimiter': delimiter,
+        'float_format': float_format,
+    }
+
+    if extension == '.npz':
+        # Text columns are kept as CSV text and parsed when the file is loaded
+        if text_columns:
+            arrays['text'] = np.array(df[text_columns].to_csv(index=False, float_format=float_format))
+        if OUTPUT_COMPRESSION:
+            np.savez_compressed(file_path, **arrays)
+        else:
+            np.savez(file_path, **arrays)
+    elif extension in ('.feather', '.parquet'):
+        df_out = pd.DataFrame({col: arrays[f"c{i}"] for i, col in enumerate(columns) if f"c{i}" in arrays})
+        if text_columns:
+            df_text = _csv_roundtrip(df[text_columns], float_format)
+            df_text.columns = header['text_columns']
+            df_out = pd.concat([df_out, df_text], axis=1)[columns]
+        if extension == '.feather':
+            df_out.to_feather(file_path)
+        else:
+            df_out.to_parquet(file_path, index=False)
+    else:
+        raise ValueError(f"Unknown table file type: {file_path}")
+
+    with open(header_path(file_path), 'w', encoding='utf-8') as f:
+        json.dump(header, f)
+
+
+def read_table_auto(file_path, encoding='utf-8'):
+    """
+    Reads a step table saved by save_table, detecting the format from the extension
+
+    Args:
+        file_path: Path to the table file
+        encoding: Encoding of CSV files
+
+    Returns:
+        Tuple (DataFrame, delimiter), like read_csv_auto
+    """
+    extension = os.path.splitext(strip_compression(file_path))[1].lower()
+    if extension == '.csv':
+        return read_csv_auto(file_path, encoding)
+
+    with open(header_path(file_path), 'r', encoding='utf-8') as f:
+        header = json.load(f)
+    columns = header['columns']
+
+    if extension == '.npz':
+        with np.load(file_path, allow_pickle=False) as data:
+            if header['text_columns']:
+                df_text = pd.read_csv(io.StringIO(str(data['text'])), low_memory=False)
+                df_text.columns = header['text_columns']
+            df = pd.DataFrame({
+                col: df_text[col] if col in header['text_columns'] else data[f"c{i}"]
+                for i, col in enumerate(columns)
+            })
+    elif extension == '.feather':
+        df = pd.read_feather(file_path)
+    elif extension == '.parquet':
+        df = pd.read_parquet(file_path)
+    else:
+        raise ValueError(f"Unknown table file type: {file_path}")
+
+    print(f"[INFO] Detected delimiter: '{header['delimiter']}'")
+    return df[columns], header['delimiter']
+
+
+def _npz_column_reader(archive, name):
+    """
+    Opens one array of an .npz file for sequential reading
+
+    Returns:
+        Tuple (file object positioned at the first value, dtype, number of values)
+    """
+    f = archive.open(name + ".npy")
+    version = np.lib.format.read_magic(f)
+    if version == (1, 0):
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+    else:
+        shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+    if dtype.hasobject or len(shape) != 1:
+        raise ValueError(f"Unexpected array in table file: {name} {shape} {dtype}")
+    return f, dtype, shape[0]
+
+
+def _npz_chunks(file_path, columns, chunk_size):
+    """
+    Yields blocks of rows of a numeric .npz table, reading each column array in order
+    (only one block of each column is in memory, also for np.savez_compressed files)
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        readers = [_npz_column_reader(archive, f"c{i}") for i in range(len(columns))]
+        try:
+            rows = readers[0][2] if readers else 0
+            for start in range(0, max(rows, 1), chunk_size):
+                n = min(chunk_size, rows - start)
+                yield pd.DataFrame({
+                    col: np.frombuffer(f.read(n * dtype.itemsize), dtype=dtype, count=n).copy()
+                    for col, (f, dtype, _) in zip(columns, readers)
+                })
+        finally:
+            for f, _, _ in readers:
+                f.close()
+
+
+def read_table_chunks(file_path, chunk_size, encoding='utf-8'):
+    """
+    Reads a step table saved by save_table in blocks of rows
+
+    CSV files are parsed chunk by chunk (column types are detected per block, like pd.read_csv;
+    the aligned tables have no missing values, so they match the types of the whole table).
+    Numeric .npz files are read column array by column array. Other files (.feather, .parquet,
+    .npz with text columns) are read whole and then split
+
+    Args:
+        file_path: Path to the table file
+        chunk_size: Number of rows per block
+        encoding: Encoding of CSV files
+
+    Returns:
+        Tuple (iterator of DataFrames, at least one even for an empty table, delimiter)
+    """
+    extension = os.path.splitext(strip_compression(file_path))[1].lower()
+    if extension == '.csv':
+        delimiter = detect_delimiter(file_path, encoding)
+        print(f"[INFO] Detected delimiter: '{delimiter}'")
+        return pd.read_csv(file_path, delimiter=delimiter, encoding=encoding, chunksize=chunk_size), delimiter
+
+    with open(header_path(file_path), 'r', encoding='utf-8') as f:
+        header = json.load(f)
+
+    if extension == '.npz' and not header['text_columns']:
+        print(f"[INFO] Detected delimiter: '{header['delimiter']}'")
+        return _npz_chunks(file_path, header['columns'], chunk_size), header['delimiter']
+
+    df, delimiter = read_table_auto(file_path, encoding)
+    chunks = (df.iloc[start:start + chunk_size].reset_index(drop=True)
+              for start in range(0, max(len(df), 1), chunk_size))
+    return chunks, delimiter